@@ -1,13 +1,35 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
 from datetime import datetime, timedelta
 import json
 import base64
+import functools
+import os
+import queue
+import secrets
 import time
 
+from inclusive_research import archive
+from inclusive_research.aggregates import FILTER_FIELDS, DashboardAggregates
+from inclusive_research.bitmaps import AGE_BAND_LABELS
+from inclusive_research.cohort import frame_counts, generate_cohort, index_columns, symptom_columns
+from inclusive_research.drafts import DraftStore
+from inclusive_research.export import mime_type, write_export
+from inclusive_research.figures import (FigureCache, funnel_figure, region_figure, stage_figure, symptom_figure,
+                                        trend_figure)
+from inclusive_research.fragments import card_html, footer_html, header_html, progress_html
+from inclusive_research.funnel import FunnelJournal
+from inclusive_research.ids import QuestionnaireIds
+from inclusive_research.ingest import ingest
+from inclusive_research.schema import QUESTIONNAIRE
+from inclusive_research.store import SYMPTOM_SCORES, SubmissionStore
+from inclusive_research.styles import GLOBAL_CSS
+from inclusive_research.symptoms import GROUP_FIELDS as SYMPTOM_GROUPS
+from inclusive_research.texts import EXPORT_FORMATS, LANGUAGES, TEXTS
+from inclusive_research.timeseries import day_series
+from inclusive_research.timing import SectionTimings, serve
+from inclusive_research.workers import DONE, PENDING, JobPool
+
 
 # 页面配置
 st.set_page_config(
@@ -17,465 +39,442 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 扩展的多语言支持
-LANGUAGES = {
-    "en": "English",
-    "zh": "中文"
-}
 
-TEXTS = {
-    "en": {
-        # Header and General
-        "title": "🌍 SYPHU-CHINA iGEM Inclusive Research Platform",
-        "subtitle": "Diverse Participant Engagement for Global Health Innovation",
-        "global_participation": "Global Participation",
-        "accessibility_design": "Accessibility Designed",
-        "diversity_inclusion": "Diversity & Inclusion",
-        "data_protection": "Data Protection",
-        "scientific_research": "Scientific Research",
-        "team": "SYPHU-CHINA iGEM Team 2025",
-        "data_promise_title": "🔒 Our Data Usage Promise",
-        "data_promise": "We sincerely promise that all data collected through this platform will be used exclusively for the iGEM synthetic biology competition and related scientific research purposes.",
-        "inclusive_research": "Inclusive Research Commitment",
-        "diversity_statement": "We believe that medical research should represent all people.",
-
-        # Navigation
-        "progress": "Progress",
-        "complete": "Complete",
-        "next": "Next →",
-        "previous": "← Previous",
-        "submit": "Submit",
-        "save": "Save Progress",
-        "required": "Required *",
-
-        # Steps
-        "basic_info": "Basic Information",
-        "medical_history": "Medical History",
-        "symptoms": "Symptoms Assessment",
-        "treatment": "Treatment Information",
-        "research": "Research Participation",
-        "completion": "Completion",
-        "dashboard": "Live Dashboard",
-        "analytics": "Data Analytics",
-        "export": "Export Data",
-        "consent": "Informed Consent",
-        "demographics": "Demographic Details",
-        "accessibility": "Accessibility Needs",
-
-        # Form Labels - Basic Info
-        "questionnaire_id": "Questionnaire ID",
-        "survey_date": "Survey Date",
-        "survey_method": "Survey Method",
-        "gender": "Gender Identity",
-        "birth_date": "Date of Birth",
-        "height": "Height (cm)",
-        "weight": "Weight (kg)",
-        "education_level": "Highest Education",
-        "occupation": "Employment Status",
-        "income_level": "Annual Household Income",
-        "ethnicity": "Ethnicity",
-        "residence_type": "Residence Type",
-        "region": "Region",
-
-        # Options - Basic Info
-        "survey_methods": ["Clinic Paper", "Ward Paper", "WeChat QR", "Phone", "Video Conference", "Other"],
-        "genders": ["Male", "Female", "Non-binary", "Transgender", "Prefer not to say", "Other"],
-        "education_levels": ["Primary School", "Middle School", "High School", "College", "Bachelor", "Master", "PhD",
-                             "Other"],
-        "occupations": ["Employed", "Retired", "Student", "Unemployed", "Homemaker", "Disabled", "Other"],
-        "income_levels": ["Under 50k", "50k-100k", "100k-200k", "200k-500k", "500k-1M", "Over 1M", "Prefer not to say"],
-        "ethnicities": ["Han", "Mongolian", "Hui", "Tibetan", "Uyghur", "Miao", "Other Minority"],
-        "residence_types": ["Urban", "Town", "Rural", "Pastoral", "Other"],
-        "regions": ["East China", "South China", "North China", "Central China", "Southwest", "Northwest", "Northeast",
-                    "Hong Kong/Macao/Taiwan", "Overseas"],
-
-        # Accessibility
-        "accessibility_needs": "Accessibility Support Needs",
-        "communication_preference": "Preferred Communication Methods",
-        "accessibility_options": ["Visual Assistance", "Hearing Assistance", "Mobility Assistance", "Cognitive Support",
-                                  "Language Translation", "Other", "No Needs"],
-        "communication_options": ["Text", "Voice", "Video", "Face-to-face", "Email", "Phone", "Other"],
-
-        # Medical History
-        "diagnosis_date": "Diagnosis Date",
-        "tumor_stage": "Tumor Stage",
-        "diagnosis_location": "Diagnosis Hospital Type",
-        "hepatitis_b": "Hepatitis B Infection",
-        "hepatitis_c": "Hepatitis C Infection",
-        "other_liver_disease": "Other Liver Diseases",
-        "treatment_experience": "Previous Treatment Experience",
-        "current_treatment": "Currently Receiving Treatment",
-
-        # Medical Options
-        "tumor_stages": ["Stage I", "Stage II", "Stage III", "Stage IV", "Unknown", "Initial Diagnosis"],
-        "hospital_types": ["Tertiary Hospital", "Cancer Specialist Hospital", "City-level Hospital", "County Hospital",
-                           "Private Hospital", "Overseas Hospital"],
-        "yes_no_unknown": ["Yes", "No", "Unknown"],
-        "liver_diseases": ["Fatty Liver", "Cirrhosis", "Autoimmune Liver Disease", "Alcoholic Liver Disease", "None",
-                           "Other"],
-        "treatments": ["Surgery", "Liver Transplant", "TACE", "Ablation Therapy", "Targeted Therapy", "Immunotherapy",
-                       "Chemotherapy", "Radiotherapy", "Traditional Medicine", "Supportive Care", "No Treatment"],
-
-        # Buttons and Messages
-        "start_questionnaire": "Start Questionnaire →",
-        "continue": "Continue",
-        "thank_you": "Thank you for completing the questionnaire!",
-        "consent_required": "Please agree to all terms to continue",
-        "all_consent_required": "Please agree to all terms to submit the questionnaire"
-    },
-    "zh": {
-        # Header and General
-        "title": "🌍 SYPHU-CHINA iGEM 包容性研究平台",
-        "subtitle": "多元化参与者参与，推动全球健康创新",
-        "global_participation": "全球参与",
-        "accessibility_design": "无障碍设计",
-        "diversity_inclusion": "多元包容",
-        "data_protection": "数据保护",
-        "scientific_research": "科学研究",
-        "team": "SYPHU-CHINA iGEM 团队 2025",
-        "data_promise_title": "🔒 我们的数据使用承诺",
-        "data_promise": "我们真诚承诺，通过本平台收集的所有数据将仅用于iGEM合成生物学竞赛及相关科学研究目的。",
-        "inclusive_research": "包容性研究承诺",
-        "diversity_statement": "我们相信医学研究应该代表所有人。",
-
-        # Navigation
-        "progress": "进度",
-        "complete": "完成",
-        "next": "下一步 →",
-        "previous": "← 上一步",
-        "submit": "提交",
-        "save": "保存进度",
-        "required": "必填 *",
-
-        # Steps
-        "basic_info": "基本信息",
-        "medical_history": "疾病历史",
-        "symptoms": "症状评估",
-        "treatment": "治疗信息",
-        "research": "研究参与",
-        "completion": "完成问卷",
-        "dashboard": "实时仪表盘",
-        "analytics": "数据分析",
-        "export": "导出数据",
-        "consent": "知情同意",
-        "demographics": "人口统计详情",
-        "accessibility": "无障碍需求",
-
-        # Form Labels - Basic Info
-        "questionnaire_id": "问卷编号",
-        "survey_date": "调查日期",
-        "survey_method": "调查方式",
-        "gender": "性别认同",
-        "birth_date": "出生日期",
-        "height": "身高 (cm)",
-        "weight": "体重 (kg)",
-        "education_level": "最高教育程度",
-        "occupation": "职业状况",
-        "income_level": "家庭年收入",
-        "ethnicity": "民族",
-        "residence_type": "居住类型",
-        "region": "常住地区",
-
-        # Options - Basic Info
-        "survey_methods": ["门诊纸质", "病房纸质", "微信二维码", "电话", "视频会议", "其他"],
-        "genders": ["男性", "女性", "非二元性别", "跨性别", "不愿透露", "其他"],
-        "education_levels": ["小学", "初中", "高中", "大专", "本科", "硕士", "博士", "其他"],
-        "occupations": ["在职", "退休", "学生", "失业", "家庭主妇/主夫", "残疾", "其他"],
-        "income_levels": ["5万以下", "5-10万", "10-20万", "20-50万", "50-100万", "100万以上", "不愿透露"],
-        "ethnicities": ["汉族", "蒙古族", "回族", "藏族", "维吾尔族", "苗族", "其他少数民族"],
-        "residence_types": ["城市", "乡镇", "农村", "牧区", "其他"],
-        "regions": ["华东", "华南", "华北", "华中", "西南", "西北", "东北", "港澳台", "海外"],
-
-        # Accessibility
-        "accessibility_needs": "无障碍支持需求",
-        "communication_preference": "偏好的沟通方式",
-        "accessibility_options": ["视觉辅助", "听觉辅助", "移动辅助", "认知支持", "语言翻译", "其他", "无需求"],
-        "communication_options": ["文字", "语音", "视频", "面对面", "电子邮件", "电话", "其他"],
-
-        # Medical History
-        "diagnosis_date": "确诊日期",
-        "tumor_stage": "肿瘤分期",
-        "diagnosis_location": "确诊医院类型",
-        "hepatitis_b": "乙肝感染",
-        "hepatitis_c": "丙肝感染",
-        "other_liver_disease": "其他肝脏疾病",
-        "treatment_experience": "既往治疗经历",
-        "current_treatment": "是否正在接受治疗",
-
-        # Medical Options
-        "tumor_stages": ["I期", "II期", "III期", "IV期", "不确定", "初次诊断"],
-        "hospital_types": ["三甲医院", "肿瘤专科医院", "地市级医院", "县级医院", "私立医院", "海外医院"],
-        "yes_no_unknown": ["是", "否", "不确定"],
-        "liver_diseases": ["脂肪肝", "肝硬化", "自身免疫性肝病", "酒精性肝病", "无", "其他"],
-        "treatments": ["手术切除", "肝移植", "TACE", "消融治疗", "靶向治疗", "免疫治疗", "化疗", "放疗", "中医治疗",
-                       "支持治疗", "未治疗"],
-
-        # Buttons and Messages
-        "start_questionnaire": "开始问卷 →",
-        "continue": "继续",
-        "thank_you": "感谢您完成问卷！",
-        "consent_required": "请同意所有条款以继续",
-        "all_consent_required": "请确认所有条款以提交问卷"
-    }
-}
+@st.cache_resource
+def get_timings():
+    # 各部分的耗时直方图：每个服务进程一份，常驻开启
+    return SectionTimings()
+
+
+@st.cache_resource
+def get_metrics_server():
+    # 设置 IGEM_METRICS_PORT 时另开 /metrics 端口（0 为由系统分配），默认只监听本机（IGEM_METRICS_HOST）；
+    # 多个服务进程用同一端口时只有第一个能绑定，其余进程记下错误、不提供该端口，页面照常运行
+    if not os.environ.get("IGEM_METRICS_PORT"):
+        return None
+    try:
+        return serve(get_timings(), int(os.environ["IGEM_METRICS_PORT"]),
+                     os.environ.get("IGEM_METRICS_HOST", "127.0.0.1"))
+    except OSError as error:
+        return error
+
+
+timings = get_timings()
+metrics_server = get_metrics_server()
 
 # 初始化session state
-if 'language' not in st.session_state:
-    st.session_state.language = "zh"
-if 'current_step' not in st.session_state:
-    st.session_state.current_step = 0
-if 'form_data' not in st.session_state:
-    st.session_state.form_data = {}
-if 'consent_given' not in st.session_state:
-    st.session_state.consent_given = False
-if 'participants_data' not in st.session_state:
-    # 模拟数据用于演示
-    st.session_state.participants_data = pd.DataFrame({
-        'id': range(1, 101),
-        'region': np.random.choice(TEXTS['zh']['regions'], 100),
-        'gender': np.random.choice(TEXTS['zh']['genders'], 100),
-        'age': np.random.randint(18, 80, 100),
-        'tumor_stage': np.random.choice(TEXTS['zh']['tumor_stages'], 100),
-        'completion_date': [datetime.now() - timedelta(days=x) for x in np.random.randint(1, 30, 100).tolist()]    })
+with timings.span('session_state'):
+    if 'language' not in st.session_state:
+        st.session_state.language = "zh"
+    if 'current_step' not in st.session_state:
+        st.session_state.current_step = 0
+    if 'form_data' not in st.session_state:
+        st.session_state.form_data = {}
+    if 'consent_given' not in st.session_state:
+        st.session_state.consent_given = False
+
+# 问卷存储：每个服务进程共享一个实例（单写线程分组提交）
+DB_PATH = os.environ.get("IGEM_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "submissions.db"))
+# 未完成问卷的草稿（断线后凭问卷编号继续填写）
+DRAFT_PATH = os.path.join(os.path.dirname(DB_PATH), "drafts.db")
+# 演示用合成队列的规模与随机种子（默认不加入；演示或容量评估时设置，计入仪表盘的计数器并在仪表盘上注明）
+DEMO_PARTICIPANTS = int(os.environ.get("IGEM_DEMO_PARTICIPANTS", 0))
+DEMO_SEED = 2025
+# 各步骤的计时名称；管理面板在 URL 带 ?admin=<IGEM_ADMIN_TOKEN> 时显示
+STEP_SECTIONS = ['consent', 'demographics', 'medical_history', 'symptoms', 'research', 'completion']
+# 漏斗各阶段（TEXTS 中的名称）：六个步骤加上“已提交”
+FUNNEL_STAGES = ['consent', 'basic_info', 'medical_history', 'symptoms', 'research', 'completion', 'submit']
+SUBMITTED_STAGE = len(FUNNEL_STAGES) - 1
+# 参与趋势图的可见范围（天数，None 为全部）；粒度随范围自动选择
+TREND_RANGES = {"Last 30 days": 30, "Last 90 days": 90, "Last year": 365, "All time": None}
+ADMIN_TOKEN = os.environ.get("IGEM_ADMIN_TOKEN")
+# 列式归档（按月分区的 Arrow 文件，需要 pyarrow）与后台压缩间隔（秒，0 为不定期压缩）
+ARCHIVE_DIR = os.path.join(os.path.dirname(DB_PATH), "archive")
+ARCHIVE_INTERVAL = float(os.environ.get("IGEM_ARCHIVE_INTERVAL", 3600))
+# 仪表盘自动刷新的间隔（秒）
+DASHBOARD_REFRESH = float(os.environ.get("IGEM_DASHBOARD_REFRESH", 5))
+# 浏览器下载整份文件会读入内存（Streamlit 的媒体存储），超过此大小（MB）的导出只给出服务器上的路径
+DOWNLOAD_LIMIT_MB = float(os.environ.get("IGEM_DOWNLOAD_LIMIT_MB", 200))
+# Parquet 导出由归档写出，未安装 pyarrow 时不提供
+EXPORT_CHOICES = EXPORT_FORMATS + ["Parquet"] if archive.available() else EXPORT_FORMATS
+
+
+@st.cache_resource
+def get_store():
+    return SubmissionStore(DB_PATH)
+
+
+@st.cache_resource
+def get_drafts():
+    return DraftStore(DRAFT_PATH)
+
+
+@st.cache_resource
+def get_funnel():
+    # 步骤漏斗的事件日志：记录只追加到内存缓冲区，后台每秒批量写盘（单独的库，不与问卷提交争用写锁）
+    return FunnelJournal(os.path.join(os.path.dirname(DB_PATH), "funnel.db"))
+
+
+@st.cache_resource
+def get_questionnaire_ids():
+    # 已提交编号的布隆过滤器：启动时加载一次，之后只追读新写入的行（包括其他服务进程写入的）
+    return QuestionnaireIds(get_store())
+
+
+@st.cache_resource
+def load_participants_data():
+    # 模拟数据用于演示（每个服务进程生成一次，所有会话只读共享；紧凑的整数编码列，渲染时再套用文字）
+    return generate_cohort(DEMO_PARTICIPANTS, seed=DEMO_SEED)
+
+
+@st.cache_resource
+def get_aggregates():
+    # 仪表盘计数器：由演示数据和库中已有问卷初始化一次，之后随每次提交增量更新
+    aggregates = DashboardAggregates()
+    participants_data = load_participants_data()
+    field_counts, daily_counts, data_points = frame_counts(participants_data)
+    aggregates.index.extend(*index_columns(participants_data, FILTER_FIELDS))
+    aggregates.symptoms.add_columns(*symptom_columns(participants_data))
+    aggregates.merge(field_counts, daily_counts, len(participants_data), data_points)
+    # 已归档的部分从归档按列读取，只有归档之后的新行查询存储
+    aggregates.sync(get_store(), ARCHIVE_DIR)
+    return aggregates
+
+
+def current_aggregates():
+    # 渲染前与库同步：多个服务进程共用一个库，其他进程写入的问卷在库的数据版本变化后追读（没有变化时只是一条 PRAGMA）
+    aggregates = get_aggregates()
+    aggregates.sync(get_store(), ARCHIVE_DIR)
+    return aggregates
+
+
+@st.cache_resource
+def get_figures():
+    # 仪表盘图表缓存：按 (图表, 数据版本, 语言等参数) 复用建好的图，数据不变时各会话不再重复建图
+    return FigureCache()
+
+
+@st.cache_resource
+def get_archive():
+    # 归档的定期压缩（后台线程，每个服务进程一个；多个进程同时压缩时由文件锁排队）
+    if not archive.available() or ARCHIVE_INTERVAL <= 0:
+        return None
+    return archive.ArchiveCompactor(get_store(), ARCHIVE_DIR, ARCHIVE_INTERVAL)
+
+
+@st.cache_resource
+def get_jobs():
+    # 后台任务池（导出等）与回执登记，每个服务进程一个
+    return JobPool()
+
+
+def prepare_export(store, export_format):
+    # 导出任务（在后台线程执行）：流式写出到导出目录，返回文件路径
+    return write_export(store, export_format, os.path.join(os.path.dirname(DB_PATH), "exports"), archive_dir=ARCHIVE_DIR)
+
+
+def prepare_import(store, path):
+    # 导入任务（在后台线程执行）：分块写入后让仪表盘计数器追上新写入的问卷
+    report = ingest(store, path)
+    get_aggregates().load_store(store, ARCHIVE_DIR)
+    return report
+
+
+def prepare_compaction(store):
+    # 归档任务（在后台线程执行）：把新提交追加到列式归档
+    return archive.compact(store, ARCHIVE_DIR)
+
 
-# 动态CSS样式
-st.markdown("""
-<style>
-    /* 包容性设计配色 */
-    :root {
-        --primary-blue: #1f77b4;
-        --primary-green: #0FEE07;
-        --primary-orange: #ff7f0e;
-        --primary-red: #d62728;
-        --primary-purple: #9467bd;
-        --accessibility-yellow: #ffd700;
-        --inclusion-teal: #17becf;
-        --diversity-pink: #e377c2;
-    }
-    .main .block-container {
-        text-align: center;
-    }
-
-    .inclusive-header {
-        background: linear-gradient(135deg, #CC6CE7, #060270, #5DE2E7);
-        background-size: 400% 400%;
-        animation: gradientShift 15s ease infinite;
-        padding: 3rem 2rem;
-        border-radius: 20px;
-        color: white;
-        text-align: center;
-        margin-bottom: 2rem;
-        box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-        position: relative;
-        overflow: hidden;
-    }
-
-    @keyframes gradientShift {
-        0% { background-position: 0% 50%; }
-        50% { background-position: 100% 50%; }
-        100% { background-position: 0% 50%; }
-    }
-
-    /* 修复徽章样式 */
-    .diversity-badge {
-        background: linear-gradient(135deg, #ff6b6b, #4ecdc4, #45b7d1, #96ceb4, #feca57);
-        background-size: 400% 400%;
-        animation: gradientShift 8s ease infinite;
-        color: white;
-        padding: 0.8rem 1.5rem;
-        border-radius: 25px;
-        font-size: 0.9rem;
-        font-weight: 600;
-        display: inline-flex;
-        align-items: center;
-        margin: 0.3rem;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.2);
-        border: 2px solid rgba(255,255,255,0.3);
-        backdrop-filter: blur(10px);
-        transition: all 0.3s ease;
-        min-width: 120px;
-        justify-content: center;
-        text-shadow: 1px 1px 2px rgba(0,0,0,0.3);
-    }
-
-    .diversity-badge:hover {
-        transform: translateY(-3px) scale(1.05);
-        box-shadow: 0 8px 25px rgba(0,0,0,0.3);
-    }
-
-    .badge-container {
-        display: flex;
-        justify-content: center;
-        gap: 0.8rem;
-        margin-top: 1.5rem;
-        flex-wrap: wrap;
-        padding: 1rem;
-    }
-
-    .promise-banner {
-        background: linear-gradient(135deg, var(--primary-green), var(--inclusion-teal));
-        color: white;
-        padding: 1.5rem;
-        border-radius: 15px;
-        margin: 1rem 0;
-        border-left: 6px solid var(--accessibility-yellow);
-        box-shadow: 0 8px 25px rgba(44, 160, 44, 0.2);
-        text-align: center;
-    }
-
-    .inclusive-card {
-        background: rgba(255, 255, 255, 0.95);
-        backdrop-filter: blur(10px);
-        padding: 2.5rem;
-        border-radius: 20px;
-        margin: 1.5rem 0;
-        box-shadow: 0 15px 35px rgba(0,0,0,0.1);
-        border: 2px solid transparent;
-        background-clip: padding-box;
-        position: relative;
-        transition: all 0.3s ease;
-        text-align: center;
-    }
-
-    .inclusive-card::before {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        border-radius: 20px;
-        padding: 2px;
-        background: linear-gradient(135deg, var(--primary-blue), var(--primary-green), var(--primary-orange));
-        -webkit-mask: linear-gradient(#fff 0 0) content-box, linear-gradient(#fff 0 0);
-        -webkit-mask-composite: xor;
-        mask-composite: exclude;
-        z-index: -1;
-    }
-
-    .inclusive-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 20px 40px rgba(0,0,0,0.15);
-    }
-    h1, h2, h3, h4, h5, h6, p {
-        text-align: center;
-    }
-    .stProgress > div > div > div > div {
-        background: linear-gradient(90deg, var(--primary-blue), var(--inclusion-teal), var(--primary-green));
-        background-size: 200% 100%;
-        animation: gradientShift 3s ease infinite;
-    }
-
-    .stButton > button {
-        background: linear-gradient(135deg, var(--primary-blue), var(--primary-green));
-        color: white;
-        border: none;
-        padding: 0.75rem 2rem;
-        border-radius: 50px;
-        font-weight: 600;
-        transition: all 0.3s ease;
-        box-shadow: 0 5px 15px rgba(31, 119, 180, 0.4);
-        margin: 0 auto;
-        display: block;
-    }
-
-    .stButton > button:hover {
-        transform: translateY(-3px);
-        box-shadow: 0 8px 25px rgba(31, 119, 180, 0.6);
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# 语言切换器
-col1, col2, col3 = st.columns([3, 1, 1])
-with col3:
-    language = st.radio(
-        "🌐",
-        ["中文", "English"],
-        horizontal=True,
-        index=0 if st.session_state.language == "zh" else 1,
-        label_visibility="collapsed",
-        key="language_selector"
-    )
-    # 当语言切换时，更新session state
-    new_language = "zh" if language == "中文" else "en"
-    if new_language != st.session_state.language:
-        st.session_state.language = new_language
+def read_export(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def offer_download(label, path, mime):
+    # 点击时才读取文件内容；整份文件会留在本进程内存中直到会话结束，过大的文件不经浏览器下载
+    size_mb = os.path.getsize(path) / 2 ** 20
+    if size_mb > DOWNLOAD_LIMIT_MB:
+        st.info(f"The file is {size_mb:,.1f} MB, above the {DOWNLOAD_LIMIT_MB:g} MB browser download limit. "
+                f"Copy it from the server instead: `{path}`")
+    else:
+        st.download_button(label, data=functools.partial(read_export, path), file_name=os.path.basename(path),
+                           mime=mime)
+        st.caption(f"{size_mb:,.1f} MB · files above {DOWNLOAD_LIMIT_MB:g} MB are kept on the server: `{path}`")
+
+
+def record_step(step):
+    # 进入步骤时记入漏斗日志；本次填写第一次到达该步骤时计入该阶段的到达次数
+    state = st.session_state
+    first = step > state.funnel_reached
+    get_funnel().record(state.funnel_session, 'enter', step, reached=step if first else None)
+    state.funnel_reached = max(state.funnel_reached, step)
+
+
+def set_step(step):
+    # 步骤切换统一经过这里
+    state = st.session_state
+    get_funnel().record(state.funnel_session, 'leave', state.current_step)
+    state.current_step = step
+    record_step(step)
+
+
+# 导航回调：状态在回调中修改，一次交互只执行一次脚本，无需 st.rerun()
+def on_language_change():
+    state = st.session_state
+    state.language = "zh" if state.language_selector == LANGUAGES["zh"] else "en"
+    get_funnel().record(state.funnel_session, 'language', state.current_step, state.language)
+
+
+def save_draft(**sections):
+    # 检查点：只写入本步的数据；草稿库在后台合并写盘，连续点击不会每次都写磁盘
+    state = st.session_state
+    if 'questionnaire_id' in state.form_data:
+        get_drafts().save(state.form_data['questionnaire_id'], state.language, state.current_step, sections)
+
+
+def go_to_step(step):
+    set_step(step)
+    save_draft()
+
+
+def on_resume_draft():
+    # 凭问卷编号和出生日期恢复草稿（出生日期用于防止仅凭编号读取他人的问卷）
+    state = st.session_state
+    draft = get_drafts().load(state.resume_id.strip())
+    if draft is None or draft[2].get('demographics', {}).get('birth_date') != str(state.resume_birth_date):
+        state.resume_error = TEXTS[state.language]['resume_not_found']
+        return
+    language, state.current_step, state.form_data = draft
+    # 恢复的填写在原会话中已计入之前各阶段，这里只记录事件，从恢复的步骤接着统计
+    get_funnel().record(state.funnel_session, 'resume', state.current_step)
+    state.funnel_reached = state.current_step
+    state.language = language
+    state.language_selector = LANGUAGES[language]
+    state.consent_given = True
+
+
+def on_consent_submit():
+    if all(st.session_state[f"consent_{i}"] for i in range(1, 5)):
+        st.session_state.consent_given = True
+        set_step(1)
+    else:
+        st.session_state.step_error = TEXTS[st.session_state.language]['consent_required']
+
+
+def validate_step(section):
+    # 按编译好的问卷结构读取并校验本步答案；有错误时设置 step_error 并返回 None
+    state = st.session_state
+    fields = QUESTIONNAIRE.steps[section].fields
+    values, errors = QUESTIONNAIRE.validate(section, {field.name: state.get(field.key) for field in fields})
+    if errors:
+        texts = TEXTS[state.language]
+        state.step_error = "\n\n".join(
+            texts[f'field_{problem}'].format(field=QUESTIONNAIRE.fields[name].label_text(texts))
+            for name, problem in errors
+        )
+        return None
+    return values
+
+
+def complete_step(section, values, next_step):
+    st.session_state.form_data[section] = values
+    set_step(next_step)
+    save_draft(**{section: values})
+
+
+def on_demographics_submit():
+    state = st.session_state
+    values = validate_step('demographics')
+    if values is None:
+        return
+    if get_questionnaire_ids().exists(values['questionnaire_id']):
+        state.step_error = TEXTS[state.language]['duplicate_id']
+        return
+    state.form_data['questionnaire_id'] = values['questionnaire_id']
+    complete_step('demographics', values, 2)
+
+
+def on_step_submit(section, next_step):
+    values = validate_step(section)
+    if values is not None:
+        complete_step(section, values, next_step)
+
+
+def on_final_submit():
+    # 交给存储的写线程分组提交，立即拿到回执号并重置表单；落盘后再计入仪表盘统计
+    state = st.session_state
+    record = QUESTIONNAIRE.encode(state.form_data, state.language)
+    aggregates = get_aggregates()
+    drafts = get_drafts()
+    try:
+        future = get_store().submit_async(record)
+    except queue.Full:
+        state.step_error = TEXTS[state.language]['server_busy']
+        return
+
+    def count_submission(f):
+        if f.exception() is None:
+            aggregates.add_record(f.result(), record)
+            drafts.discard(record['questionnaire_id'])
+
+    future.add_done_callback(count_submission)
+    state.submission_receipt = get_jobs().track(future)
+    get_funnel().record(state.funnel_session, 'submit', state.current_step, reached=SUBMITTED_STAGE)
+    # 回到知情同意页即开始新的一次填写
+    state.funnel_reached = -1
+    set_step(0)
+    state.form_data = {}
+    state.just_submitted = True
+
+
+def on_generate_export():
+    state = st.session_state
+    try:
+        state.export_receipt = get_jobs().run(prepare_export, get_store(), state.export_format)
+    except queue.Full:
+        state.export_error = TEXTS[state.language]['exports_busy']
+
+
+def on_start_compaction():
+    state = st.session_state
+    try:
+        state.compaction_receipt = get_jobs().run(prepare_compaction, get_store())
+    except queue.Full:
+        state.compaction_error = TEXTS[state.language]['jobs_busy']
+
+
+def on_start_import():
+    state = st.session_state
+    upload = state.import_file
+    if upload is None:
+        return
+    # 上传文件先落盘，导入任务按块流式读取，不把整个文件留在内存中
+    directory = os.path.join(os.path.dirname(DB_PATH), "imports")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.path.basename(upload.name)}")
+    with open(path, 'wb') as f:
+        for block in iter(functools.partial(upload.read, 1 << 20), b''):
+            f.write(block)
+    try:
+        state.import_receipt = get_jobs().run(prepare_import, get_store(), path)
+    except queue.Full:
+        state.import_error = TEXTS[state.language]['jobs_busy']
+
+
+# 问卷控件按题型生成；控件的值由 key 存入 session_state，提交回调再按问卷结构读取
+WIDGETS = {
+    'text': st.text_input, 'textarea': st.text_area, 'date': st.date_input, 'number': st.number_input,
+    'slider': st.slider, 'select': st.selectbox, 'radio': st.radio, 'multiselect': st.multiselect,
+}
+
+
+def render_field(field, texts):
+    label = field.label_text(texts)
+    if field.required:
+        label += " *"
+    if field.show_if is not None:
+        # 表单内的选择提交前不会触发重跑，有前提的题目始终显示并注明前提；不满足前提时答案不会记录
+        parent = QUESTIONNAIRE.fields[field.show_if[0]]
+        label += f" ({parent.label_text(texts)}: {parent.option_list(texts)[field.show_if[1]]})"
+    args = (label,) if field.options is None else (label, field.option_list(texts))
+    value = WIDGETS[field.kind](*args, key=field.key, **field.widget)
+    if field.note is not None:
+        st.info(field.note(value))
+
+
+def render_layout(layout, texts):
+    for item in layout:
+        if not isinstance(item, tuple):
+            render_field(item, texts)
+        elif item[0] == 'columns':
+            for column, items in zip(st.columns(len(item[1])), item[1]):
+                with column:
+                    render_layout(items, texts)
+        else:
+            getattr(st, item[0])(item[1].format_map(texts))
+
+
+def show_step_error():
+    if 'step_error' in st.session_state:
+        st.error(st.session_state.pop('step_error'))
+
+
+@st.fragment(run_every=1)
+def pending_job(receipt, message):
+    # 后台任务未完成时每秒检查一次；完成后整页重跑一次以显示结果，轮询随之停止
+    status, _ = get_jobs().status(receipt)
+    if status == PENDING:
+        st.info("⏳ " + TEXTS[st.session_state.language]['job_receipt'].format(message=message, receipt=receipt))
+    else:
         st.rerun()
 
-texts = TEXTS[st.session_state.language]
-
-# 修复后的包容性Header
-st.markdown(f"""
-<div class="inclusive-header">
-    <h1 style="font-size: 3rem; margin-bottom: 0.5rem; text-shadow: 2px 2px 4px rgba(0,0,0,0.3);">{texts['title']}</h1>
-    <h2 style="font-size: 1.5rem; font-weight: 300; margin-bottom: 1rem; opacity: 0.9;">{texts['subtitle']}</h2>
-</div>
-""", unsafe_allow_html=True)
-
-# 修复后的徽章容器
-st.markdown(f"""
-<div class="badge-container">
-    <div class="diversity-badge">🌍 {texts['global_participation']}</div>
-    <div class="diversity-badge">♿ {texts['accessibility_design']}</div>
-    <div class="diversity-badge">🌈 {texts['diversity_inclusion']}</div>
-    <div class="diversity-badge">🔒 {texts['data_protection']}</div>
-    <div class="diversity-badge">🎯 {texts['scientific_research']}</div>
-</div>
-""", unsafe_allow_html=True)
-
-# 数据使用承诺横幅
-st.markdown(f"""
-<div class="promise-banner" style="text-align: center;">
-    <h3 style="margin: 0 0 1rem 0; display: inline-flex; align-items: center; gap: 0.5rem; justify-content: center;">
-        <span>🤝</span> {texts['data_promise_title']}
-    </h3>
-    <p style="margin: 0; font-size: 1rem; line-height: 1.6;">{texts['data_promise']}</p>
-</div>
-""", unsafe_allow_html=True)
 
-# 主内容区域
-tab1, tab2, tab3 = st.tabs(["📝 " + texts['basic_info'], "📊 " + texts['dashboard'], "🔍 Research Transparency"])
+def show_job_status(receipt, pending_message, done_message):
+    texts = TEXTS[st.session_state.language]
+    status, result = get_jobs().status(receipt)
+    if status == PENDING:
+        pending_job(receipt, pending_message)
+    elif status == DONE:
+        st.success(texts['job_receipt'].format(message=done_message, receipt=receipt))
+    else:
+        st.error(texts['job_failed'].format(receipt=receipt, error=result))
+    return status, result
 
-with tab1:
-    # 进度指示器
-    steps = [texts['basic_info'], texts['medical_history'], texts['symptoms'],
-             texts['treatment'], texts['research'], texts['completion']]
-
-    progress_percent = (st.session_state.current_step / (len(steps) - 1)) * 100 if len(steps) > 1 else 0
-
-    # 使用st.components.html来渲染HTML内容
-    progress_html = f"""
-    <div style="margin-bottom: 2rem;">
-        <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;">
-            <span style="color: #1f77b4; font-weight: 600; font-size: 1.1rem;">{texts['progress']}</span>
-            <span style="background: #1f77b4; color: white; padding: 0.3rem 1rem; border-radius: 20px; font-size: 0.9rem;">
-                {st.session_state.current_step + 1} / {len(steps)}
-            </span>
-        </div>
-
-        <div style="background: #e9ecef; height: 12px; border-radius: 8px; overflow: hidden; position: relative;">
-            <div style="background: linear-gradient(90deg, #1f77b4, #2ca02c, #ff7f0e); 
-                        width: {progress_percent}%; 
-                        height: 100%; transition: width 0.8s ease; border-radius: 8px;"></div>
-        </div>
-
-        <div style="display: flex; justify-content: space-between; margin-top: 1rem; font-size: 0.9rem;">
-            {''.join([f'<span style="color: {"#1f77b4" if i <= st.session_state.current_step else "#999"}; font-weight: {"600" if i == st.session_state.current_step else "400"}; text-align: center; flex: 1;">{step}</span>' for i, step in enumerate(steps)])}
-        </div>
-    </div>
-    """
-    # 确保HTML正确渲染而不是显示为纯文本
-    st.components.v1.html(progress_html, height=150)
+
+# 新会话：分配漏斗日志的匿名会话键（与问卷编号无关），记录进入第一个页面
+if 'funnel_session' not in st.session_state:
+    st.session_state.funnel_session = secrets.token_hex(8)
+    st.session_state.funnel_reached = -1  # 本次填写到达过的最远步骤
+    record_step(st.session_state.current_step)
+
+# 启动归档的后台定期压缩（每个服务进程只在第一次运行时创建）
+get_archive()
+
+# 动态CSS样式
+st.markdown(GLOBAL_CSS, unsafe_allow_html=True)
+
+with timings.span('header'):
+    # 语言切换器
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col3:
+        # 当语言切换时，由回调更新session state
+        st.radio(
+            "🌐",
+            [LANGUAGES["zh"], LANGUAGES["en"]],
+            horizontal=True,
+            index=0 if st.session_state.language == "zh" else 1,
+            label_visibility="collapsed",
+            key="language_selector",
+            on_change=on_language_change
+        )
+
+    texts = TEXTS[st.session_state.language]
+
+    # 包容性Header、徽章容器与数据使用承诺横幅（按语言缓存的预渲染片段）
+    st.markdown(header_html(st.session_state.language), unsafe_allow_html=True)
+
+# 各标签页作为独立的 fragment：在其中交互只重跑该 fragment，不会重建其他标签页的图表
+@st.fragment
+def questionnaire(texts):
+    # 按当前步骤计时（导航回调在脚本运行前已更新步骤）
+    with get_timings().span(f"step.{STEP_SECTIONS[st.session_state.current_step]}"):
+        questionnaire_step(texts)
+
+
+def questionnaire_step(texts):
+    # 提交回执（由 on_final_submit 设置），写入完成情况异步更新
+    if st.session_state.pop('just_submitted', False):
+        st.balloons()
+        st.info("Your data will contribute to important research in liver cancer treatment.")
+    if 'submission_receipt' in st.session_state and st.session_state.current_step == 0:
+        show_job_status(st.session_state.submission_receipt, texts['saving_response'], texts['response_saved'])
+
+    # 进度指示器（直接用 st.markdown 渲染，不再经过 iframe）
+    st.markdown(progress_html(st.session_state.language, st.session_state.current_step), unsafe_allow_html=True)
 
     # 步骤1: 知情同意
     if st.session_state.current_step == 0:
-        st.markdown(f"""
-        <div class="inclusive-card">
-            <h2 style="color: #1f77b4; margin-bottom: 1.5rem;">🤝 {texts['consent']}</h2>
-            <p style="color: #666; margin-bottom: 2rem;">{texts['inclusive_research']}</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(card_html(f"🤝 {texts['consent']}", texts['inclusive_research']), unsafe_allow_html=True)
 
         with st.form("informed_consent"):
             st.markdown("<h3 style='text-align:center'>📋 Research Participation Agreement</h3>", unsafe_allow_html=True)
@@ -531,268 +530,85 @@ with tab1:
             with col3:
                 c1, c2, c3 = st.columns([1, 2, 1])
                 with c2:
-                    consent_1 = st.checkbox("**I understand the research purpose and process**", value=False)
+                    st.checkbox("**I understand the research purpose and process**", value=False, key="consent_1")
                 c1, c2, c3 = st.columns([1, 2, 1])
                 with c2:
-                    consent_2 = st.checkbox("**I agree to participate in this research**", value=False)
+                    st.checkbox("**I agree to participate in this research**", value=False, key="consent_2")
                 c1, c2, c3 = st.columns([1, 2, 1])
                 with c2:
-                    consent_3 = st.checkbox("**I understand the data usage promise**", value=False)
+                    st.checkbox("**I understand the data usage promise**", value=False, key="consent_3")
                 c1, c2, c3 = st.columns([1, 2, 1])
                 with c2:
-                    consent_4 = st.checkbox("**I confirm I am 18 years or older**", value=False)
+                    st.checkbox("**I confirm I am 18 years or older**", value=False, key="consent_4")
             
             st.markdown("<br>", unsafe_allow_html=True)
 
             col1, col2, col3, col4, col5, col6, col7, col8, col9 = st.columns([1, 1, 1, 1, 1, 1, 1, 1, 1])
             with col5:
-                if st.form_submit_button(f"**{texts['start_questionnaire']}**"):
-                    if all([consent_1, consent_2, consent_3, consent_4]):
-                        st.session_state.consent_given = True
-                        st.session_state.current_step = 1
-                        st.rerun()
-                    else:
-                        st.error(texts['consent_required'])
-            
+                st.form_submit_button(f"**{texts['start_questionnaire']}**", on_click=on_consent_submit)
+                show_step_error()
+
+        # 继续填写未完成的问卷
+        with st.expander(f"💾 {texts['resume_title']}"):
+            with st.form("resume_draft"):
+                st.caption(texts['resume_help'])
+                st.text_input(texts['questionnaire_id'], placeholder="A001", key="resume_id")
+                st.date_input(texts['birth_date'], datetime(1980, 1, 1), key="resume_birth_date")
+                st.form_submit_button(texts['resume_button'], on_click=on_resume_draft)
+                if 'resume_error' in st.session_state:
+                    st.error(st.session_state.pop('resume_error'))
 
     # 步骤2: 扩展的基本信息
     elif st.session_state.current_step == 1:
-        st.markdown(f"""
-        <div class="inclusive-card">
-            <h2 style="color: #1f77b4; margin-bottom: 1.5rem;">👥 {texts['demographics']}</h2>
-            <p style="color: #666; margin-bottom: 2rem;">We value everyone's unique experiences and backgrounds</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(card_html(f"👥 {texts['demographics']}", "We value everyone's unique experiences and backgrounds"), unsafe_allow_html=True)
 
         with st.form("extended_demographics"):
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.subheader("📋 Basic Identity Information")
-                questionnaire_id = st.text_input(f"{texts['questionnaire_id']} *", placeholder="A001")
-                survey_date = st.date_input(f"{texts['survey_date']} *", datetime.now())
-                survey_method = st.selectbox(f"{texts['survey_method']} *", texts['survey_methods'])
-
-                # 扩展的人口统计信息
-                st.subheader("👤 Identity Characteristics")
-                gender = st.selectbox(f"{texts['gender']} *", texts['genders'])
-                birth_date = st.date_input(f"{texts['birth_date']} *", datetime(1980, 1, 1))
-
-                # 计算年龄
-                age = datetime.now().year - birth_date.year
-                st.info(f"**Age**: {age} years")
-
-            with col2:
-                st.subheader("🏠 Socioeconomic Background")
-                education_level = st.selectbox(texts['education_level'], texts['education_levels'])
-                occupation = st.selectbox(texts['occupation'], texts['occupations'])
-                income_level = st.selectbox(texts['income_level'], texts['income_levels'])
-
-                st.subheader("🌍 Cultural Background")
-                ethnicity = st.selectbox(texts['ethnicity'], texts['ethnicities'])
-                residence_type = st.selectbox(texts['residence_type'], texts['residence_types'])
-                region = st.selectbox(f"{texts['region']} *", texts['regions'])
-
-            # 无障碍需求部分
-            st.markdown("---")
-            st.markdown(f"### ♿ {texts['accessibility']}")
-            col3, col4 = st.columns(2)
-
-            with col3:
-                accessibility_needs = st.multiselect(
-                    texts['accessibility_needs'],
-                    texts['accessibility_options']
-                )
-
-            with col4:
-                preferred_communication = st.multiselect(
-                    texts['communication_preference'],
-                    texts['communication_options']
-                )
+            render_layout(QUESTIONNAIRE.steps['demographics'].layout, texts)
 
             col1, col2, col3, col4, col5, col6, col7, col8, col9, col10, col11, col312, col13, col14, col15, col16, col17, col18, col19 = st.columns([1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1])
             with col10:
-                if st.form_submit_button(f"**{texts['next']}**"):
-                    if questionnaire_id:
-                        st.session_state.form_data.update({
-                            'questionnaire_id': questionnaire_id,
-                            'demographics': {
-                                'gender': gender,
-                                'birth_date': str(birth_date),
-                                'education': education_level,
-                                'occupation': occupation,
-                                'income': income_level,
-                                'ethnicity': ethnicity,
-                                'residence': residence_type,
-                                'region': region,
-                                'accessibility_needs': accessibility_needs,
-                                'communication_preference': preferred_communication
-                            }
-                        })
-                        st.session_state.current_step = 2
-                        st.rerun()
-                    else:
-                        st.error("Please enter a Questionnaire ID")
+                st.form_submit_button(f"**{texts['next']}**", on_click=on_demographics_submit)
+                show_step_error()
 
     # 步骤3: 扩展的医疗信息
     elif st.session_state.current_step == 2:
-        st.markdown(f"""
-        <div class="inclusive-card">
-            <h2 style="color: #1f77b4; margin-bottom: 1.5rem;">🏥 {texts['medical_history']}</h2>
-            <p style="color: #666; margin-bottom: 2rem;">Comprehensive health status assessment</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(card_html(f"🏥 {texts['medical_history']}", "Comprehensive health status assessment"), unsafe_allow_html=True)
 
         with st.form("extended_medical_history"):
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.subheader("🩺 Liver Cancer Diagnosis Information")
-                diagnosis_date = st.date_input(f"{texts['diagnosis_date']} *", datetime.now())
-                tumor_stage = st.selectbox(f"{texts['tumor_stage']} *", texts['tumor_stages'])
-                diagnosis_location = st.selectbox(texts['diagnosis_location'], texts['hospital_types'])
-
-                st.subheader("🦠 Hepatitis and Liver Health")
-                has_hepatitis_b = st.radio(f"{texts['hepatitis_b']} *", texts['yes_no_unknown'])
-                if has_hepatitis_b == texts['yes_no_unknown'][0]:  # "Yes"
-                    hbv_treatment = st.radio("HBV Antiviral Treatment", texts['yes_no_unknown'])
-                    hbv_duration = st.number_input("Years of HBV History", min_value=0, max_value=50, value=5)
-
-                has_hepatitis_c = st.radio(f"{texts['hepatitis_c']} *", texts['yes_no_unknown'])
-                other_liver_disease = st.multiselect(texts['other_liver_disease'], texts['liver_diseases'])
-
-            with col2:
-                st.subheader("💊 Treatment Experience")
-                treatment_experience = st.multiselect(
-                    f"{texts['treatment_experience']} *",
-                    texts['treatments']
-                )
-
-                st.subheader("🔬 Current Treatment Status")
-                current_treatment = st.radio(f"{texts['current_treatment']} *", texts['yes_no_unknown'])
-                if current_treatment == texts['yes_no_unknown'][0]:  # "Yes"
-                    treatment_types = st.multiselect("Current Treatment Methods",
-                                                     ["Targeted Drugs", "Immunotherapy", "Chemotherapy", "Radiation",
-                                                      "Interventional", "Other"])
-                    treatment_duration = st.number_input("Current Treatment Duration (months)", min_value=1,
-                                                         max_value=120, value=6)
-                    monthly_cost = st.selectbox("Monthly Treatment Cost",
-                                                ["Under 10k", "10k-30k", "30k-50k", "50k-100k", "Over 100k",
-                                                 "Insurance Covered"])
+            render_layout(QUESTIONNAIRE.steps['medical_history'].layout, texts)
 
             col1, col2, col3, col4, col5, col6, col7, col8, col9, col10, col11, col312, col13, col14, col15, col16, col17, col18, col19 = st.columns([1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1])
             with col10:
-                if st.form_submit_button(f"**{texts['next']}**"):
-                    st.session_state.current_step = 3
-                    st.rerun()
+                st.form_submit_button(f"**{texts['next']}**", on_click=on_step_submit, args=('medical_history', 3))
+                show_step_error()
 
     # 步骤4: 症状评估（简化版）
     elif st.session_state.current_step == 3:
-        st.markdown(f"""
-        <div class="inclusive-card">
-            <h2 style="color: #1f77b4; margin-bottom: 1.5rem;">📊 {texts['symptoms']}</h2>
-            <p style="color: #666; margin-bottom: 2rem;">Please rate your symptoms over the past week</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(card_html(f"📊 {texts['symptoms']}", "Please rate your symptoms over the past week"), unsafe_allow_html=True)
 
         with st.form("symptoms_assessment"):
-            st.subheader("🩺 Symptom Severity (1-10 scale)")
-
-            col1, col2 = st.columns(2)
-
-            with col1:
-                fatigue = st.slider("Fatigue", 1, 10, 5)
-                pain = st.slider("Pain", 1, 10, 3)
-                nausea = st.slider("Nausea", 1, 10, 2)
-
-            with col2:
-                appetite = st.slider("Appetite Loss", 1, 10, 4)
-                sleep = st.slider("Sleep Disturbance", 1, 10, 3)
-                mobility = st.slider("Mobility Issues", 1, 10, 2)
-
-            st.subheader("📝 Additional Symptoms")
-            additional_symptoms = st.multiselect(
-                "Select any additional symptoms you've experienced:",
-                ["Weight Loss", "Fever", "Jaundice", "Abdominal Swelling", "Shortness of Breath", "Other"]
-            )
-
-            other_symptoms = st.text_area("Please describe any other symptoms:")
+            render_layout(QUESTIONNAIRE.steps['symptoms'].layout, texts)
 
             col1, col2, col3, col4, col5, col6, col7, col8, col9, col10, col11, col312, col13, col14, col15, col16, col17, col18, col19 = st.columns([1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1])
             with col10:
-                if st.form_submit_button(f"**{texts['next']}**"):
-                    st.session_state.form_data['symptoms'] = {
-                        'fatigue': fatigue,
-                        'pain': pain,
-                        'nausea': nausea,
-                        'appetite': appetite,
-                        'sleep': sleep,
-                        'mobility': mobility,
-                        'additional_symptoms': additional_symptoms,
-                        'other_symptoms': other_symptoms
-                    }
-                    st.session_state.current_step = 4
-                    st.rerun()
+                st.form_submit_button(f"**{texts['next']}**", on_click=on_step_submit, args=('symptoms', 4))
+                show_step_error()
 
     # 步骤5: 研究参与
     elif st.session_state.current_step == 4:
-        st.markdown(f"""
-        <div class="inclusive-card">
-            <h2 style="color: #1f77b4; margin-bottom: 1.5rem;">🔬 {texts['research']}</h2>
-            <p style="color: #666; margin-bottom: 2rem;">Your contribution to scientific advancement</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(card_html(f"🔬 {texts['research']}", "Your contribution to scientific advancement"), unsafe_allow_html=True)
 
         with st.form("research_participation"):
-            st.subheader("📋 Future Research Opportunities")
-
-            col1, col2 = st.columns(2)
-
-            with col1:
-                future_contact = st.radio(
-                    "Would you be willing to be contacted for future research studies?",
-                    ["Yes", "No", "Maybe"]
-                )
-
-                sample_collection = st.radio(
-                    "Would you consider providing biological samples (e.g., blood, tissue) for research?",
-                    ["Yes", "No", "Need more information"]
-                )
-
-            with col2:
-                data_sharing = st.radio(
-                    "Would you allow your anonymized data to be shared with other researchers?",
-                    ["Yes, fully anonymized", "Yes, with restrictions", "No"]
-                )
-
-                follow_up = st.radio(
-                    "Would you participate in follow-up surveys?",
-                    ["Yes", "No", "Depends on timing"]
-                )
-
-            suggestions = st.text_area("Any suggestions for improving our research or this platform:")
+            render_layout(QUESTIONNAIRE.steps['research'].layout, texts)
 
             col1, col2, col3, col4, col5, col6, col7, col8, col9, col10, col11, col312, col13, col14, col15, col16, col17, col18, col19 = st.columns([1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1])
             with col10:
-                if st.form_submit_button(f"**{texts['next']}**"):
-                    st.session_state.form_data['research'] = {
-                        'future_contact': future_contact,
-                        'sample_collection': sample_collection,
-                        'data_sharing': data_sharing,
-                        'follow_up': follow_up,
-                        'suggestions': suggestions
-                    }
-                    st.session_state.current_step = 5
-                    st.rerun()
+                st.form_submit_button(f"**{texts['next']}**", on_click=on_step_submit, args=('research', 5))
+                show_step_error()
 
     # 步骤6: 完成
     elif st.session_state.current_step == 5:
-        st.markdown(f"""
-        <div class="inclusive-card">
-            <h2 style="color: #1f77b4; margin-bottom: 1.5rem;">🎉 {texts['completion']}</h2>
-            <p style="color: #666; margin-bottom: 2rem;">Thank you for your valuable contribution to research</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(card_html(f"🎉 {texts['completion']}", "Thank you for your valuable contribution to research"), unsafe_allow_html=True)
 
         st.success("### ✅ " + texts['thank_you'])
 
@@ -803,6 +619,10 @@ with tab1:
             with st.expander("Demographic Information"):
                 st.json(st.session_state.form_data['demographics'])
 
+        if 'medical_history' in st.session_state.form_data:
+            with st.expander("Medical History"):
+                st.json(st.session_state.form_data['medical_history'])
+
         if 'symptoms' in st.session_state.form_data:
             with st.expander("Symptoms Assessment"):
                 st.json(st.session_state.form_data['symptoms'])
@@ -814,101 +634,180 @@ with tab1:
         # 提交按钮
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            if st.button(f"**{texts['submit']}**", type="primary", use_container_width=True):
-                # 在实际应用中，这里会将数据保存到数据库
-                st.balloons()
-                st.success("### 🎉 Your response has been recorded!")
-                st.info("Your data will contribute to important research in liver cancer treatment.")
-
-                # 重置表单
-                time.sleep(2)
-                st.session_state.current_step = 0
-                st.session_state.form_data = {}
-                st.rerun()
+            st.button(f"**{texts['submit']}**", type="primary", use_container_width=True, on_click=on_final_submit)
+            show_step_error()
 
     # 导航按钮（除了第一步和最后一步）
     if st.session_state.current_step > 0 and st.session_state.current_step < 5:
         col1, col2, col3 = st.columns([1, 2, 1])
         with col1:
-            if st.button(f"**{texts['previous']}**", use_container_width=True):
-                st.session_state.current_step -= 1
-                st.rerun()
+            st.button(f"**{texts['previous']}**", use_container_width=True,
+                      on_click=go_to_step, args=(st.session_state.current_step - 1,))
 
-with tab2:
+
+@st.fragment
+def dashboard(texts):
+    dashboard_view(texts)
+
+
+@st.fragment(run_every=DASHBOARD_REFRESH)
+def live_dashboard(texts):
+    # 自动刷新：每个周期先与库同步（库没有变化时只是一条 PRAGMA，有变化时只追读新增的行），再在原位重绘计数器和图表；
+    # 图表与筛选结果按数据版本缓存，没有新问卷时直接复用，一个周期的开销取决于新增问卷数而不是队列规模
+    with get_timings().span('dashboard.live'):
+        total = dashboard_view(texts)['total']
+    # 本会话上次看到的问卷总数：提示两次刷新之间新增了多少份
+    new = total - st.session_state.get('dashboard_seen_total', total)
+    st.session_state.dashboard_seen_total = total
+    st.caption(f"🔄 Refreshed {datetime.now():%H:%M:%S} · +{new:,} since last refresh · every {DASHBOARD_REFRESH:g}s")
+
+
+def dashboard_view(texts):
     # 实时仪表盘
-    st.markdown(f"""
-    <div class="inclusive-card">
-        <h2 style="color: #1f77b4; margin-bottom: 1.5rem;">📊 {texts['dashboard']}</h2>
-        <p style="color: #666; margin-bottom: 2rem;">Real-time data visualization and research metrics</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-    # 实时指标
+    st.markdown(card_html(f"📊 {texts['dashboard']}", "Real-time data visualization and research metrics"), unsafe_allow_html=True)
+
+    timings = get_timings()
+
+    # 实时指标：直接读取增量维护的计数器，不扫描数据
+    aggregates = current_aggregates()
+    # 先读版本号再取数建图：建图期间若有新提交，图中的数据只会更新，不会比版本号旧
+    version = aggregates.version
+    metrics = aggregates.live_metrics()
+    # 漏斗：各阶段的到达次数（预聚合），完成率 = 提交数 / 同意参与后开始填写的次数
+    funnel = get_funnel()
+    funnel_version = funnel.version
+    reached = funnel.reached(len(FUNNEL_STAGES))
+    started, submitted = reached[1], reached[SUBMITTED_STAGE]
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("Total Participants", "156", "+12")
+        st.metric("Total Participants", f"{metrics['total']:,}", f"+{metrics['today']:,} today")
     with col2:
-        st.metric("Completion Rate", "92%", "+3%")
+        st.metric("Completion Rate", f"{submitted / started:.0%}" if started else "—",
+                  f"{submitted:,} of {started:,} started", delta_color="off")
     with col3:
-        st.metric("Active Today", "23", "+5")
+        st.metric("Active Today", f"{metrics['today']:,}", f"{metrics['today'] - metrics['yesterday']:+,} vs yesterday")
     with col4:
-        st.metric("Ethnic Diversity", "8+", "ethnicities")
+        st.metric("Ethnic Diversity", f"{metrics['ethnicities']}", "ethnicities", delta_color="off")
+    if DEMO_PARTICIPANTS:
+        st.caption(f"⚠️ Includes {DEMO_PARTICIPANTS:,} synthetic demo participants (IGEM_DEMO_PARTICIPANTS), "
+                   "generated when this server process started; they are not real submissions.")
 
     # 数据可视化
     st.subheader("📈 Participation Analytics")
 
+    # 交叉筛选：同一字段所选取值之间为“或”，字段之间为“且”；由位图索引求交得到，不扫描数据
+    with st.expander("🔎 Filter"):
+        filter_cols = st.columns(4)
+        selection = []
+        for i, field in enumerate(FILTER_FIELDS):
+            if field == 'age_band':
+                label, options = "Age", AGE_BAND_LABELS
+            else:
+                label, options = QUESTIONNAIRE.fields[field].label_text(texts), QUESTIONNAIRE.fields[field].option_list(texts)
+            with filter_cols[i % len(filter_cols)]:
+                values = st.multiselect(label, range(len(options)), format_func=options.__getitem__, key=f"filter_{field}")
+            if values:
+                selection.append((field, tuple(sorted(values))))
+    selection = tuple(selection)
+    figures = get_figures()
+    if selection:
+        with timings.span('dashboard.filter'):
+            # 筛选结果与图表一样按数据版本缓存：自动刷新时没有新问卷就不再对位图求交
+            matched, filtered_counts, (filtered_days, filtered_day_counts) = figures.get(
+                'filter', version, selection, lambda: aggregates.filtered(dict(selection)))
+        st.caption(f"{matched:,} of {metrics['total']:,} participants match the filter")
+        region_counts, stage_counts = filtered_counts['region'], filtered_counts['tumor_stage']
+    else:
+        region_counts = stage_counts = None
+
+    language = st.session_state.language
     col1, col2 = st.columns(2)
 
     with col1:
         # 地区分布图
-        region_counts = st.session_state.participants_data['region'].value_counts()
-        fig1 = px.pie(
-            values=region_counts.values,
-            names=region_counts.index,
-            title="Regional Distribution of Participants"
-        )
-        st.plotly_chart(fig1, use_container_width=True)
+        with timings.span('dashboard.fig1'):
+            fig1 = figures.get('fig1', version, (language, selection), lambda: region_figure(
+                aggregates.ranked('region') if region_counts is None else region_counts, texts))
+            st.plotly_chart(fig1, use_container_width=True)
 
     with col2:
         # 肿瘤分期分布
-        stage_counts = st.session_state.participants_data['tumor_stage'].value_counts()
-        fig2 = px.bar(
-            x=stage_counts.index,
-            y=stage_counts.values,
-            title="Tumor Stage Distribution",
-            labels={'x': 'Tumor Stage', 'y': 'Count'}
-        )
-        st.plotly_chart(fig2, use_container_width=True)
+        with timings.span('dashboard.fig2'):
+            fig2 = figures.get('fig2', version, (language, selection), lambda: stage_figure(
+                aggregates.ranked('tumor_stage') if stage_counts is None else stage_counts, texts))
+            st.plotly_chart(fig2, use_container_width=True)
 
     # 时间趋势图
     st.subheader("📅 Participation Over Time")
-    daily_counts = st.session_state.participants_data.groupby(
-        st.session_state.participants_data['completion_date'].dt.date
-    ).size().reset_index(name='count')
-
-    fig3 = px.line(
-        daily_counts,
-        x='completion_date',
-        y='count',
-        title="Daily Participation Trend"
-    )
-    st.plotly_chart(fig3, use_container_width=True)
-
-with tab3:
+    trend_days = TREND_RANGES[st.radio("Range", list(TREND_RANGES), index=len(TREND_RANGES) - 1,
+                                       horizontal=True, key="trend_range")]
+    with timings.span('dashboard.fig3'):
+        if trend_days is None:
+            start = end = None
+        else:
+            end = datetime.now().date()
+            start = end - timedelta(days=trend_days - 1)
+        if selection:
+            trend = lambda: trend_figure(*day_series(filtered_days, filtered_day_counts,
+                                                     start and start.toordinal(), end and end.toordinal()))
+        else:
+            trend = lambda: trend_figure(*aggregates.trend(start, end))
+        fig3 = figures.get('fig3', version, (start, end, selection), trend)
+        st.plotly_chart(fig3, use_container_width=True)
+
+    # 症状评分：分布与百分位都由分组直方图得到，不读取原始答卷
+    st.subheader("🩺 Symptom Burden")
+    col1, col2 = st.columns(2)
+    with col1:
+        group_by = st.radio("Group by", list(SYMPTOM_GROUPS), horizontal=True, key="symptom_group",
+                            format_func=lambda name: QUESTIONNAIRE.fields[name].label_text(texts))
+    with col2:
+        symptom = st.selectbox("Symptom", range(len(SYMPTOM_SCORES)), key="symptom_field",
+                               format_func=lambda i: QUESTIONNAIRE.fields[SYMPTOM_SCORES[i]].label_text(texts))
+    with timings.span('dashboard.fig5'):
+        summary = aggregates.symptoms.summary(group_by)
+        options = QUESTIONNAIRE.fields[group_by].option_list(texts)
+        groups = [options[code] if code is not None else "—" for code in summary['groups']]
+        title = (f"{QUESTIONNAIRE.fields[SYMPTOM_SCORES[symptom]].label_text(texts)} by "
+                 f"{QUESTIONNAIRE.fields[group_by].label_text(texts)}")
+        fig5 = figures.get('fig5', version, (language, group_by, symptom),
+                           lambda: symptom_figure(summary, symptom, groups, title))
+        st.plotly_chart(fig5, use_container_width=True)
+        # 各组各症状的中位数（P25–P75）
+        _, p25, p50, p75, _ = summary['percentiles']
+        st.dataframe(pd.DataFrame(
+            {'n': summary['n'],
+             **{QUESTIONNAIRE.fields[name].label_text(texts): [f"{p50[g, i]} ({p25[g, i]}–{p75[g, i]})"
+                                                               for g in range(len(groups))]
+                for i, name in enumerate(SYMPTOM_SCORES)}},
+            index=groups,
+        ), use_container_width=True)
+
+    # 各步骤的流失
+    st.subheader("🔻 Questionnaire Funnel")
+    with timings.span('dashboard.fig4'):
+        fig4 = figures.get('fig4', funnel_version, language,
+                           lambda: funnel_figure(reached, [texts[stage] for stage in FUNNEL_STAGES]))
+        st.plotly_chart(fig4, use_container_width=True)
+    return metrics
+
+
+@st.fragment
+def transparency(texts):
+    with get_timings().span('transparency'):
+        transparency_tab(texts)
+
+
+def transparency_tab(texts):
     # 研究透明度
-    st.markdown(f"""
-    <div class="inclusive-card">
-        <h2 style="color: #1f77b4; margin-bottom: 1.5rem;">🔍 Research Transparency</h2>
-        <p style="color: #666; margin-bottom: 2rem;">Open and transparent research data management</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(card_html("🔍 Research Transparency", "Open and transparent research data management"), unsafe_allow_html=True)
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("📊 Data Usage Statistics")
-        st.metric("Data Points Collected", "15,642")
+        st.metric("Data Points Collected", f"{current_aggregates().live_metrics()['data_points']:,}")
         st.metric("Research Questions Answered", "42")
         st.metric("Publications Supported", "3")
 
@@ -923,28 +822,96 @@ with tab3:
 
     st.subheader("📋 Data Export Options")
 
-    export_format = st.selectbox("Select export format:", ["CSV", "JSON", "Excel"])
+    st.selectbox("Select export format:", EXPORT_CHOICES, key="export_format")
 
-    if st.button("Generate Export"):
-        with st.spinner("Preparing your data export..."):
-            time.sleep(2)
-            st.success("Export ready! This would download the data in production.")
+    # 导出在后台任务池中进行，页面不阻塞
+    st.button("Generate Export", on_click=on_generate_export)
+    if 'export_error' in st.session_state:
+        st.warning(st.session_state.pop('export_error'))
+    elif 'export_receipt' in st.session_state:
+        status, path = show_job_status(st.session_state.export_receipt, "Preparing your data export...",
+                                       "Export ready!")
+        if status == DONE:
+            offer_download("Download export", path, mime_type(path))
+
+
+# 主内容区域
+tab1, tab2, tab3 = st.tabs(["📝 " + texts['basic_info'], "📊 " + texts['dashboard'], "🔍 Research Transparency"])
+
+with tab1:
+    questionnaire(texts)
+
+with tab2:
+    # 开关在 fragment 之外：切换时整页重跑一次，换用按间隔自动重跑的 fragment
+    if st.toggle("🔄 Auto-refresh", key="dashboard_auto_refresh",
+                 help=f"Update the counters and charts every {DASHBOARD_REFRESH:g} seconds"):
+        live_dashboard(texts)
+    else:
+        dashboard(texts)
+
+with tab3:
+    transparency(texts)
 
 # 页脚
-st.markdown("---")
-footer_col1, footer_col2, footer_col3 = st.columns([1, 1, 1])
-
-with footer_col2:
-    st.markdown(f"""
-    <div style="width: 100%; display: flex; justify-content: center;">
-        <div style="max-width: 800px; text-align: center; color: #666; padding: 2rem;">
-            <h4 style="color: #1f77b4; margin-bottom: 1rem;">{texts['team']}</h4>
-            <p style="margin: 0 auto 1.5rem auto; max-width: 600px;"><strong>Inclusive Research Commitment:</strong> We are committed to enabling everyone to participate in scientific research, regardless of age, gender, ethnicity, ability, or background.</p>
-            <div style="display: inline-block;">
-                <div style="background: linear-gradient(135deg, #ff6b6b, #ee5a24); padding: 0.5rem 1rem; margin: 0.3rem; border-radius: 8px; display: inline-block;">🔬 Scientific Research</div>
-                <div style="background: linear-gradient(135deg, #4ecdc4, #00b894); padding: 0.5rem 1rem; margin: 0.3rem; border-radius: 8px; display: inline-block;">🤝 Ethical Compliance</div>
-                <div style="background: linear-gradient(135deg, #45b7d1, #0984e3); padding: 0.5rem 1rem; margin: 0.3rem; border-radius: 8px; display: inline-block;">🌍 Global Collaboration</div>
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+with timings.span('footer'):
+    st.markdown("---")
+    footer_col1, footer_col2, footer_col3 = st.columns([1, 1, 1])
+
+    with footer_col2:
+        st.markdown(footer_html(st.session_state.language), unsafe_allow_html=True)
+
+# 隐藏的管理面板：各部分耗时（本进程自启动以来）
+if ADMIN_TOKEN and st.query_params.get("admin") == ADMIN_TOKEN:
+    st.subheader("⏱️ Section Timings")
+    st.dataframe(
+        pd.DataFrame(timings.summary(), columns=["section", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms"]),
+        hide_index=True
+    )
+    st.code(timings.prometheus(), language="text")
+    if isinstance(metrics_server, OSError):
+        st.warning(f"The /metrics endpoint is not served by this process: {metrics_server}")
+    elif metrics_server is not None:
+        host, port = metrics_server.server_address[:2]
+        st.caption(f"Also served at http://{host}:{port}/metrics")
+
+    # 纸质 / 电话问卷批量导入（列与导出文件相同），在后台任务池中执行
+    st.subheader("📥 Bulk Import")
+    st.file_uploader("Questionnaire file (CSV or JSON Lines)", type=["csv", "jsonl", "ndjson", "json"],
+                     key="import_file")
+    st.button("Start Import", on_click=on_start_import)
+    if 'import_error' in st.session_state:
+        st.warning(st.session_state.pop('import_error'))
+    elif 'import_receipt' in st.session_state:
+        status, report = show_job_status(st.session_state.import_receipt, "Importing questionnaires...",
+                                         "Import finished!")
+        if status == DONE:
+            import_col1, import_col2, import_col3, import_col4 = st.columns(4)
+            import_col1.metric("Rows", f"{report['rows']:,}")
+            import_col2.metric("Inserted", f"{report['inserted']:,}")
+            import_col3.metric("Rejected", f"{report['rejected']:,}", f"{report['duplicates']:,} duplicate IDs",
+                               delta_color="off")
+            import_col4.metric("Rows/s", f"{report['rows_per_s']:,.0f}")
+            if report['reject_path']:
+                offer_download("Download rejected rows", report['reject_path'], "text/csv")
+
+    # 列式归档：概况与手动压缩（平时由后台线程按 IGEM_ARCHIVE_INTERVAL 定期进行）
+    st.subheader("🗄️ Columnar Archive")
+    if not archive.available():
+        st.info("Install pyarrow to enable the columnar archive and Parquet exports.")
+    else:
+        compactor = get_archive()
+        summary = archive.status(ARCHIVE_DIR)
+        archive_col1, archive_col2, archive_col3 = st.columns(3)
+        archive_col1.metric("Archived up to ID", f"{summary['watermark']:,}")
+        archive_col2.metric("Months", f"{summary['months']:,}", f"{summary['parts']:,} files", delta_color="off")
+        archive_col3.metric("Size", f"{summary['bytes'] / 2 ** 20:,.1f} MB")
+        if compactor is not None and compactor.error:
+            st.warning(f"Last scheduled compaction failed: {compactor.error}")
+        st.button("Compact Now", on_click=on_start_compaction)
+        if 'compaction_error' in st.session_state:
+            st.warning(st.session_state.pop('compaction_error'))
+        elif 'compaction_receipt' in st.session_state:
+            status, report = show_job_status(st.session_state.compaction_receipt, "Compacting...",
+                                             "Compaction finished!")
+            if status == DONE:
+                st.caption(f"{report['rows']:,} rows archived in {report['seconds']:.1f}s")
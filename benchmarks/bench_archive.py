@@ -0,0 +1,106 @@
+"""列式归档压测：向空库导入 N 行（默认 100 万）合成问卷，压缩到按月分区的 Arrow 归档，
+再对比几种读取方式的耗时与峰值内存：从归档内存映射读取 region + tumor_stage + submitted_at 三列、
+从归档读取全部列、从存储查询同样三列，以及从存储物化完整的行（导出等现有路径的做法）。
+每种读取在单独的子进程中运行，峰值内存取子进程的 VmHWM（仅 Linux），imports only 一行为导入各模块（含 pyarrow）本身的基线。需要 pyarrow。
+
+用法：python benchmarks/bench_archive.py [--rows 1000000]（500 万行：--rows 5000000，导入约需 3～4 分钟）
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from inclusive_research import archive  # noqa: E402
+from inclusive_research.cohort import flat_frame, generate_cohort  # noqa: E402
+from inclusive_research.ingest import ingest  # noqa: E402
+from inclusive_research.store import SubmissionStore  # noqa: E402
+
+COLUMNS = ['region', 'tumor_stage', 'submitted_at']
+# 子进程：argv 为 (读法, 库路径, 归档目录)；输出行数、耗时和 VmHWM
+CHILD = """
+import sys, time
+import numpy as np
+import pyarrow, pyarrow.compute, pyarrow.ipc
+from inclusive_research import archive
+from inclusive_research.store import SubmissionStore
+method, db_path, archive_dir = sys.argv[1:]
+start = time.perf_counter()
+if method == 'imports only':
+    rows = 0
+elif method == 'archive 3 columns':
+    table = archive.read(archive_dir, %(columns)r)
+    columns = [archive.codes(table[name].combine_chunks()) for name in %(columns)r[:2]]
+    columns.append(table['submitted_at'].to_numpy())
+    rows = len(columns[0])
+elif method == 'archive all columns':
+    rows = len(archive.read(archive_dir, archive.to_table([]).column_names).to_pandas())
+elif method == 'store 3 columns':
+    store = SubmissionStore(db_path)
+    rows = len(np.array(store.query(
+        "SELECT d.region, m.tumor_stage, s.submitted_at FROM submissions s "
+        "JOIN demographics d ON d.submission_id = s.id JOIN medical_history m ON m.submission_id = s.id"
+    ).fetchall(), dtype=np.int64))
+else:
+    store = SubmissionStore(db_path)
+    rows = len([row for chunk in store.iter_rows(50000) for row in chunk])
+print(rows, time.perf_counter() - start)
+print(next(line for line in open('/proc/self/status') if line.startswith('VmHWM')))
+""" % {'columns': COLUMNS}
+METHODS = ('imports only', 'archive 3 columns', 'archive all columns', 'store 3 columns', 'store full rows')
+
+
+def populate(db_path, rows, chunk=200_000):
+    # 分块生成导入文件并导入，生成和导入都不需要把 N 行同时放在内存中
+    store = SubmissionStore(db_path)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "responses.csv")
+        for offset in range(0, rows, chunk):
+            flat = flat_frame(generate_cohort(min(chunk, rows - offset), seed=offset, days=3 * 365))
+            flat['questionnaire_id'] = [f"S{i:09d}" for i in range(offset, offset + len(flat))]
+            flat.to_csv(csv_path, index=False)
+            ingest(store, csv_path, chunk_size=50000)
+    return store
+
+
+def measure(method, db_path, archive_dir):
+    output = subprocess.run([sys.executable, "-c", CHILD, method, db_path, archive_dir],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    lines = output.strip().splitlines()
+    rows, seconds = lines[-2].split()
+    return int(rows), float(seconds), int(lines[-1].split()[1]) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    if not archive.available():
+        sys.exit("pyarrow is not installed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        archive_dir = os.path.join(tmp, "archive")
+        start = time.perf_counter()
+        store = populate(db_path, args.rows)
+        print(f"imported {args.rows} rows in {time.perf_counter() - start:.0f}s")
+        report = archive.compact(store, archive_dir)
+        store.close()
+        summary = archive.status(archive_dir)
+        print(f"compacted {report['rows']} rows in {report['seconds']:.1f}s "
+              f"({report['rows'] / report['seconds']:.0f} rows/s): {summary['months']} months, "
+              f"{summary['parts']} files, {summary['bytes'] / 2 ** 20:.0f} MB")
+
+        print(f"{'read':<20} {'rows':>9} {'seconds':>8} {'peak MB':>8}")
+        for method in METHODS:
+            rows, seconds, peak_mb = measure(method, db_path, archive_dir)
+            assert rows == args.rows or method == 'imports only', (method, rows)
+            print(f"{method:<20} {rows:>9} {seconds:>8.2f} {peak_mb:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
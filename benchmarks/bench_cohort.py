@@ -0,0 +1,35 @@
+"""合成队列生成压测：不同规模下的生成速度（行/秒）与每行内存，并检查同一种子的可复现性。
+
+用法：python benchmarks/bench_cohort.py [--rows 100000 1000000 10000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inclusive_research.cohort import generate_cohort  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    first, second = (generate_cohort(10_000, seed=args.seed, end='2025-01-01') for _ in range(2))
+    assert first.equals(second), "same seed produced different cohorts"
+
+    print(f"{'rows':>12} {'seconds':>8} {'rows/s':>12} {'bytes/row':>10} {'MB':>8}")
+    for rows in args.rows:
+        start = time.perf_counter()
+        frame = generate_cohort(rows, seed=args.seed)
+        elapsed = time.perf_counter() - start
+        size = frame.memory_usage(deep=True).sum()
+        print(f"{rows:>12} {elapsed:>8.2f} {rows / elapsed:>12.0f} {size / rows:>10.1f} {size / 2 ** 20:>8.1f}")
+        del frame
+
+
+if __name__ == "__main__":
+    main()
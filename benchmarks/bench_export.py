@@ -0,0 +1,78 @@
+"""导出压测：向临时存储写入 N 份合成问卷，分别以 CSV / JSON Lines / Excel 流式导出，
+报告每种格式的吞吐量（行/秒）与进程峰值 RSS。每种格式在独立子进程中运行，峰值内存互不影响。
+
+用法：python benchmarks/bench_export.py [--rows 1000000]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from inclusive_research.store import SubmissionStore  # noqa: E402
+
+
+def populate(path, rows, chunk=50000):
+    from inclusive_research.cohort import generate_cohort, iter_records
+
+    # 合成队列按年分布完成时间，逐块转换为入库记录后批量写入
+    frame = generate_cohort(rows, seed=0, days=365)
+    store = SubmissionStore(path)
+    for start in range(0, rows, chunk):
+        store.bulk_insert(iter_records(frame.iloc[start:start + chunk]))
+    store.close()
+
+
+def child(path, export_format):
+    from inclusive_research.export import write_export
+
+    store = SubmissionStore(path)
+    rows = store.count()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    out = write_export(store, export_format, os.path.join(os.path.dirname(path), "exports"))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        'format': export_format, 'rows': rows, 'seconds': elapsed, 'rows_per_s': rows / elapsed,
+        'baseline_rss_mb': baseline / 1024, 'peak_rss_mb': peak / 1024,
+        'file_mb': os.path.getsize(out) / 2 ** 20,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--child", nargs=2, metavar=("DB", "FORMAT"), help=argparse.SUPPRESS)
+    parser.add_argument("--populate", metavar="DB", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+    if args.populate:
+        populate(args.populate, args.rows)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        # 写库也放在子进程里：exec 后的子进程会继承父进程的 ru_maxrss 峰值
+        subprocess.run([sys.executable, __file__, "--populate", path, "--rows", str(args.rows)], check=True)
+        print(f"populated {args.rows} rows in {time.perf_counter() - start:.1f}s")
+        print(f"{'format':>7} {'rows/s':>10} {'seconds':>8} {'baseline MB':>12} {'peak RSS MB':>12} {'file MB':>8}")
+        for export_format in ("CSV", "JSON", "Excel"):
+            out = subprocess.run([sys.executable, __file__, "--child", path, export_format],
+                                 capture_output=True, text=True, check=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{r['format']:>7} {r['rows_per_s']:>10.0f} {r['seconds']:>8.1f} {r['baseline_rss_mb']:>12.1f} "
+                  f"{r['peak_rss_mb']:>12.1f} {r['file_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""仪表盘图表缓存压测：N 个会话（默认 200，8 个线程并发）各渲染一次 fig1～fig3，数据不变；
+对照不用缓存时每个会话各自建图。报告建图次数、总耗时和每个会话的平均耗时（含 st.plotly_chart 的序列化）。
+然后模拟一次新提交，再渲染一轮，确认每张图只重建一次。
+
+用法：python benchmarks/bench_figures.py [--sessions 200]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import plotly.io
+import plotly.tools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inclusive_research.aggregates import DashboardAggregates  # noqa: E402
+from inclusive_research.cohort import frame_counts, generate_cohort  # noqa: E402
+from inclusive_research.figures import FigureCache, region_figure, stage_figure, trend_figure  # noqa: E402
+from inclusive_research.texts import TEXTS  # noqa: E402
+
+FIGURES = {
+    'fig1': lambda aggregates, texts: region_figure(aggregates.ranked('region'), texts),
+    'fig2': lambda aggregates, texts: stage_figure(aggregates.ranked('tumor_stage'), texts),
+    'fig3': lambda aggregates, texts: trend_figure(*aggregates.trend()),
+}
+
+
+def serialize(fig):
+    # 与 st.plotly_chart 对 Figure 所做的相同
+    return plotly.io.to_json(plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True),
+                             validate=False)
+
+
+def render(aggregates, cache, language):
+    texts = TEXTS[language]
+    version = aggregates.version
+    for name, build in FIGURES.items():
+        if cache is None:
+            fig = build(aggregates, texts)
+        else:
+            fig = cache.get(name, version, language, lambda build=build: build(aggregates, texts))
+        serialize(fig)
+
+
+def round_of(aggregates, cache, sessions):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: render(aggregates, cache, 'zh' if i % 2 else 'en'), range(sessions)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200)
+    args = parser.parse_args()
+
+    aggregates = DashboardAggregates()
+    cohort = generate_cohort(100_000, seed=0, days=365)
+    field_counts, daily_counts, data_points = frame_counts(cohort)
+    aggregates.merge(field_counts, daily_counts, len(cohort), data_points)
+
+    print(f"{'mode':<18} {'builds':>6} {'total s':>8} {'ms/session':>11}")
+    elapsed = round_of(aggregates, None, args.sessions)
+    print(f"{'no cache':<18} {args.sessions * len(FIGURES):>6} {elapsed:>8.2f} {elapsed / args.sessions * 1000:>11.1f}")
+
+    cache = FigureCache()
+    for name in ("cache (cold)", "cache (warm)", "after submission"):
+        if name == "after submission":
+            aggregates.add(date.today(), region=0, gender=0, tumor_stage=0)
+        builds = cache.builds
+        elapsed = round_of(aggregates, cache, args.sessions)
+        print(f"{name:<18} {cache.builds - builds:>6} {elapsed:>8.2f} {elapsed / args.sessions * 1000:>11.1f}")
+    # 两种语言各建一次；数据不变时不再建图
+    assert cache.builds == 2 * len(FIGURES) * 2, cache.builds
+
+
+if __name__ == "__main__":
+    main()
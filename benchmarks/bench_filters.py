@@ -0,0 +1,77 @@
+"""仪表盘交叉筛选压测：N 行（默认 100 万和 300 万）合成队列上，几组典型筛选条件各求一次
+筛选人数 + 地区 / 分期分布 + 按日趋势，对照位图索引与 pandas 布尔掩码两种做法的耗时，并核对结果一致。
+另报告建索引的耗时与索引占用的内存。
+
+用法：python benchmarks/bench_filters.py [--rows 1000000 3000000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inclusive_research.aggregates import FILTER_FIELDS, DashboardAggregates  # noqa: E402
+from inclusive_research.bitmaps import age_band  # noqa: E402
+from inclusive_research.cohort import generate_cohort, index_columns  # noqa: E402
+
+SELECTIONS = {
+    'gender': {'gender': (1,)},
+    'age+income': {'age_band': (2, 3), 'income': (0, 1)},
+    'region+stage+res': {'region': (0, 1, 2), 'tumor_stage': (3,), 'residence': (2,)},
+    '5 fields': {'gender': (0,), 'age_band': (1, 2, 3), 'ethnicity': (0,), 'income': (0, 1, 2), 'residence': (0, 1)},
+}
+
+
+def with_masks(frame, codes, days, selection):
+    # 对照：逐行比较的布尔掩码，再分组计数
+    mask = np.ones(len(frame), dtype=bool)
+    for field, values in selection.items():
+        mask &= np.isin(codes[field], values)
+    ranked = {}
+    for field in ('region', 'tumor_stage'):
+        counts = np.bincount(codes[field][mask], minlength=FILTER_FIELDS[field])
+        order = np.argsort(-counts, kind='stable')
+        ranked[field] = [(int(code), int(counts[code])) for code in order if counts[code]]
+    ordinals, day_counts = np.unique(days[mask], return_counts=True)
+    return int(mask.sum()), ranked, (ordinals, day_counts)
+
+
+def timed(query, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = query()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 3_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'selection':<17} {'matched':>9} {'bitmap ms':>9} {'mask ms':>8} {'speedup':>7}")
+    for rows in args.rows:
+        frame = generate_cohort(rows, seed=rows, days=3 * 365)
+        aggregates = DashboardAggregates()
+        start = time.perf_counter()
+        aggregates.index.extend(*index_columns(frame, FILTER_FIELDS))
+        built = time.perf_counter() - start
+        size = aggregates.index.nbytes / 2 ** 20
+        print(f"{rows:>9} index built in {built:.2f} s, index {size:.1f} MB")
+
+        codes = {field: frame[field].cat.codes.to_numpy() for field in FILTER_FIELDS if field != 'age_band'}
+        codes['age_band'] = age_band(frame['age'].to_numpy().astype(np.int64))
+        _, days = index_columns(frame, ())
+        for name, selection in SELECTIONS.items():
+            bitmap_ms, expected = timed(lambda: aggregates.filtered(selection), args.repeat)
+            mask_ms, result = timed(lambda: with_masks(frame, codes, days, selection), args.repeat)
+            assert expected[:2] == result[:2]
+            assert all(np.array_equal(a, b) for a, b in zip(expected[2], result[2]))
+            print(f"{rows:>9} {name:<17} {expected[0]:>9} {bitmap_ms:>9.2f} {mask_ms:>8.2f} {mask_ms / bitmap_ms:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""问卷交互的脚本耗时：整页重跑 vs. 仅重跑问卷 fragment。
+
+AppTest 本身总是整页重跑；这里像浏览器一样在重跑请求中带上问卷 fragment 的 id，
+从而测出 fragment 作用域重跑的真实耗时。测量的交互是症状评估页调整滑块后点击“下一步”
+（表单内的滑块本身不会触发重跑，提交表单才会）。
+
+用法：python benchmarks/bench_fragments.py [--rounds 20]
+"""
+import argparse
+import inspect
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+SCRIPT = os.path.join(ROOT, "SYPHU-CHINA iGEM - Inclusive Clinical Research.py")
+
+from streamlit.runtime.scriptrunner import RerunData  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1 import local_script_runner  # noqa: E402
+
+fragment_scope = []
+
+
+def scoped_rerun_data(**kwargs):
+    return RerunData(fragment_id_queue=list(fragment_scope), **kwargs)
+
+
+local_script_runner.RerunData = scoped_rerun_data
+
+
+def fragment_id(at, name):
+    for fid, fragment in at._fragment_storage._fragments.items():
+        func = inspect.getclosurevars(fragment).nonlocals.get('non_optional_func')
+        if func is not None and func.__name__ == name:
+            return fid
+    raise LookupError(name)
+
+
+def button(at, label):
+    return next(b for b in at.button if label in b.label)
+
+
+def measure(rounds, scoped):
+    os.environ["IGEM_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+    at = AppTest.from_file(SCRIPT, default_timeout=60)
+    at.session_state.language = "en"
+    at.run()
+    for checkbox in at.checkbox:
+        checkbox.check()
+    button(at, "Start Questionnaire").click().run()
+    at.text_input(key="questionnaire_id").input("BENCH-001")
+    button(at, "Next").click().run()
+    # 病史页的治疗经历为必填
+    at.multiselect(key="treatment_experience").select("Surgery")
+    button(at, "Next").click().run()
+
+    if scoped:
+        fragment_scope[:] = [fragment_id(at, "questionnaire")]
+    timings = []
+    for i in range(rounds):
+        at.slider(key="fatigue").set_value(i % 10 + 1)
+        start = time.perf_counter()
+        button(at, "Next").click().run()
+        timings.append(time.perf_counter() - start)
+        assert at.session_state.current_step == 4
+        button(at, "Previous").click().run()
+    fragment_scope.clear()
+    return np.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    full = measure(args.rounds, scoped=False)
+    scoped = measure(args.rounds, scoped=True)
+    print(f"full-app rerun:        {full:.1f} ms")
+    print(f"fragment-scoped rerun: {scoped:.1f} ms ({(1 - scoped / full) * 100:.0f}% less)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""漏斗事件记录的开销：每次 record() 的耗时（后台线程同时按秒批量写盘），单线程与 8 个线程并发；
+结束后检查写盘的事件条数和阶段计数与记录的一致。
+
+用法：python benchmarks/bench_funnel.py [--events 1000000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inclusive_research.funnel import FunnelJournal  # noqa: E402
+
+
+def per_event_us(journal, events, session):
+    # 每 5 条事件中有一条“首次到达”，与一次六步填写中进入 / 离开的比例相近
+    start = time.perf_counter()
+    for i in range(events):
+        journal.record(session, 'enter', i % 6, reached=i % 6 if i % 5 == 0 else None)
+    return (time.perf_counter() - start) / events * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "funnel.db")
+        # 容量足够大，压测期间不丢事件
+        journal = FunnelJournal(path, capacity=args.events * 2)
+        print(f"single thread: {per_event_us(journal, args.events, 'bench'):.2f} us/event")
+
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(
+            per_event_us(journal, args.events // 8, f"bench-{i}"))) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # 多线程时各线程的墙钟时间包含等待 GIL 的时间，这里报告每条事件摊到的整体开销
+        print(f"8 threads:     {sum(results) / len(results) / len(results):.2f} us/event (amortized)")
+
+        start = time.perf_counter()
+        journal.close()
+        print(f"final flush:   {time.perf_counter() - start:.2f} s")
+        total = args.events + args.events // 8 * 8
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == total
+        reached = conn.execute("SELECT SUM(reached) FROM stage_counts").fetchone()[0]
+        assert reached == (args.events + 4) // 5 + 8 * ((args.events // 8 + 4) // 5), reached
+        assert journal.dropped == 0
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""问卷编号查重压测：库中问卷数从小到大增长时，“下一步”查重的单次耗时（微秒）。
+
+分别测量：未提交过的编号（布隆过滤器直接否定，最常见的情况）、已提交的编号（过滤器命中后走唯一索引确认）、
+以及只用唯一索引查询作对照；同时报告过滤器启动加载耗时和内存。
+只有 submissions 表参与查重，这里直接批量写入编号行，不生成完整问卷。
+
+用法：python benchmarks/bench_ids.py [--sizes 10000 100000 1000000] [--lookups 20000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inclusive_research.ids import QuestionnaireIds  # noqa: E402
+from inclusive_research.store import SubmissionStore, connect  # noqa: E402
+
+
+def grow(path, start, stop, chunk=100_000):
+    conn = connect(path)
+    for offset in range(start, stop, chunk):
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT INTO submissions (questionnaire_id, language, submitted_at) VALUES (?, 'zh', 0)",
+            ((f"S{i:08d}",) for i in range(offset, min(offset + chunk, stop)))
+        )
+        conn.execute("COMMIT")
+    conn.close()
+
+
+def latencies(check, keys):
+    values = np.empty(len(keys))
+    for i, key in enumerate(keys):
+        start = time.perf_counter_ns()
+        check(key)
+        values[i] = time.perf_counter_ns() - start
+    return values / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    print(f"{'rows':>10} {'warm s':>7} {'filter MB':>10} {'path':<14} {'p50 µs':>8} {'p99 µs':>8} {'false +':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ids.db")
+        store = SubmissionStore(path)
+        rows = 0
+        for size in sorted(args.sizes):
+            grow(path, rows, size)
+            rows = size
+            start = time.perf_counter()
+            ids = QuestionnaireIds(store)
+            warm = time.perf_counter() - start
+
+            absent = [f"N{rng.randrange(10 ** 8):08d}" for _ in range(args.lookups)]
+            present = [f"S{rng.randrange(rows):08d}" for _ in range(args.lookups)]
+            false_positives = sum(key in ids._filter for key in absent) / len(absent)
+            for name, check, keys in (("filter/new", ids.exists, absent), ("filter/dup", ids.exists, present),
+                                      ("index/new", store.has_questionnaire_id, absent),
+                                      ("index/dup", store.has_questionnaire_id, present)):
+                values = latencies(check, keys)
+                print(f"{rows:>10} {warm:>7.2f} {ids._filter.size_bytes / 2 ** 20:>10.2f} {name:<14} "
+                      f"{np.percentile(values, 50):>8.1f} {np.percentile(values, 99):>8.1f} "
+                      f"{false_positives:>8.2%}")
+
+        # 其他进程写入的编号：下一次查重时追读水位线之后的新行即可发现
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("INSERT INTO submissions (questionnaire_id, language, submitted_at) VALUES ('OTHER-1', 'en', 0)")
+        other.close()
+        assert ids.exists("OTHER-1"), "ID written by another connection was not seen"
+        try:
+            grow(path, 0, 1)
+        except sqlite3.IntegrityError:
+            pass
+        else:
+            raise AssertionError("unique index accepted a duplicate questionnaire ID")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
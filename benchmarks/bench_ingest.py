@@ -0,0 +1,83 @@
+"""批量导入压测：生成 N 行与导出文件同列的 CSV（约 1% 不合法行），用命令行导入到空库，报告行/秒与峰值内存；
+再导入同一文件一次，所有行都应因编号重复被拒收（测去重路径）。导入在子进程中运行，峰值内存只含导入本身。
+
+用法：python benchmarks/bench_ingest.py [--rows 1000000] [--chunk-size 20000]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from inclusive_research.cohort import flat_frame, generate_cohort  # noqa: E402
+from inclusive_research.store import SubmissionStore  # noqa: E402
+
+INVALID_RATE = 0.01
+# 在子进程内读取 /proc 的 VmHWM（本地址空间的峰值 RSS）：ru_maxrss 在 exec 之后仍会计入 fork 时父进程
+# （已生成过数据）的内存，不能反映导入本身（仅 Linux）
+CHILD = ("import runpy, sys; sys.argv[0] = 'ingest'; "
+         "runpy.run_module('inclusive_research.ingest', run_name='__main__'); "
+         "print(next(line for line in open('/proc/self/status') if line.startswith('VmHWM')))")
+
+
+def write_csv(path, rows, chunk=200_000, seed=0):
+    # 分块生成，生成文件本身也不需要把 N 行同时放在内存中
+    rng = np.random.default_rng(seed)
+    invalid = 0
+    for offset in range(0, rows, chunk):
+        flat = flat_frame(generate_cohort(min(chunk, rows - offset), seed=seed + offset))
+        flat['questionnaire_id'] = [f"S{i:09d}" for i in range(offset, offset + len(flat))]
+        bad = rng.random(len(flat)) < INVALID_RATE
+        flat.loc[bad, 'gender'] = 'Unknown'
+        invalid += int(bad.sum())
+        flat.to_csv(path, mode='w' if offset == 0 else 'a', header=offset == 0, index=False)
+    return invalid
+
+
+def run_ingest(csv_path, db_path, chunk_size):
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, csv_path, "--db", db_path, "--chunk-size", str(chunk_size)],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    elapsed = time.perf_counter() - start
+    lines = output.strip().splitlines()
+    # VmHWM:   123456 kB
+    peak_mb = int(lines[-1].split()[1]) / 1024
+    summary = next(line for line in lines if line.startswith("done:"))
+    return elapsed, peak_mb, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "responses.csv")
+        db_path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        invalid = write_csv(csv_path, args.rows)
+        print(f"generated {args.rows} rows ({os.path.getsize(csv_path) / 2 ** 20:.0f} MB, {invalid} invalid) "
+              f"in {time.perf_counter() - start:.1f}s")
+        SubmissionStore(db_path).close()
+
+        print(f"{'run':<8} {'seconds':>8} {'rows/s':>10} {'peak MB':>8}  summary")
+        for name in ("fresh", "reimport"):
+            elapsed, peak_mb, summary = run_ingest(csv_path, db_path, args.chunk_size)
+            print(f"{name:<8} {elapsed:>8.1f} {args.rows / elapsed:>10.0f} {peak_mb:>8.0f}  {summary}")
+
+        store = SubmissionStore(db_path)
+        assert store.count() == args.rows - invalid, (store.count(), args.rows - invalid)
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""仪表盘自动刷新的单次耗时：打开自动刷新后，像浏览器的定时器一样只重跑 live_dashboard fragment，
+每个周期之前由另一个存储连接（相当于另一个服务进程）写入 0 / 1 / 10 / 100 份新问卷，
+对比演示队列为 1 万行和 100 万行时每个周期的耗时（fragment 内 dashboard.live 计时段的中位数，
+不含 AppTest 自身每次重新编译脚本的开销）：耗时应随新增问卷数变化，而与队列规模无关。
+每个周期后核对计数器显示的总数已包含新写入的问卷。
+
+用法：python benchmarks/bench_live.py [--cohorts 10000 1000000] [--ticks 10]
+"""
+import argparse
+import inspect
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+SCRIPT = os.path.join(ROOT, "SYPHU-CHINA iGEM - Inclusive Clinical Research.py")
+
+import streamlit as st  # noqa: E402
+from streamlit.runtime.scriptrunner import RerunData  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1 import local_script_runner  # noqa: E402
+
+from inclusive_research.cohort import generate_cohort, iter_records  # noqa: E402
+from inclusive_research.store import SubmissionStore  # noqa: E402
+from inclusive_research.timing import SectionTimings  # noqa: E402
+
+NEW_PER_TICK = (0, 1, 10, 100)
+fragment_scope = []
+
+
+def scoped_rerun_data(**kwargs):
+    return RerunData(fragment_id_queue=list(fragment_scope), **kwargs)
+
+
+local_script_runner.RerunData = scoped_rerun_data
+ticks_ns = []
+
+
+def record_tick(observe):
+    # 截取 app 中 dashboard.live 计时段的每次耗时
+    def wrapper(self, name, elapsed_ns):
+        if name == 'dashboard.live':
+            ticks_ns.append(elapsed_ns)
+        observe(self, name, elapsed_ns)
+    return wrapper
+
+
+SectionTimings.observe = record_tick(SectionTimings.observe)
+
+
+def fragment_id(at, name):
+    for fid, fragment in at._fragment_storage._fragments.items():
+        func = inspect.getclosurevars(fragment).nonlocals.get('non_optional_func')
+        if func is not None and func.__name__ == name:
+            return fid
+    raise LookupError(name)
+
+
+def measure(cohort, ticks):
+    directory = tempfile.mkdtemp()
+    os.environ["IGEM_DB_PATH"] = os.path.join(directory, "bench.db")
+    os.environ["IGEM_DEMO_PARTICIPANTS"] = str(cohort)
+    os.environ["IGEM_ARCHIVE_INTERVAL"] = "0"
+    # 每种队列规模从头加载（cache_resource 在进程内共享）
+    st.cache_resource.clear()
+    at = AppTest.from_file(SCRIPT, default_timeout=120)
+    at.session_state.language = "en"
+    at.run()
+    at.toggle(key="dashboard_auto_refresh").set_value(True).run()
+    fragment_scope[:] = [fragment_id(at, "live_dashboard")]
+
+    writer = SubmissionStore(os.environ["IGEM_DB_PATH"])
+    records = iter_records(generate_cohort(ticks * sum(NEW_PER_TICK), seed=cohort))
+    results = {}
+    for new in NEW_PER_TICK:
+        ticks_ns.clear()
+        for _ in range(ticks):
+            writer.bulk_insert(next(records) for _ in range(new))
+            expected = cohort + writer.count()
+            at.run()
+            assert not at.exception, at.exception
+            assert at.metric[0].value == f"{expected:,}", (at.metric[0].value, expected)
+        assert len(ticks_ns) == ticks
+        results[new] = np.median(ticks_ns) / 1e6
+    fragment_scope.clear()
+    writer.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cohorts", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--ticks", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'cohort':>9} " + " ".join(f"{f'+{new}/tick ms':>13}" for new in NEW_PER_TICK))
+    for cohort in args.cohorts:
+        results = measure(cohort, args.ticks)
+        print(f"{cohort:>9} " + " ".join(f"{results[new]:>13.1f}" for new in NEW_PER_TICK))
+
+
+if __name__ == "__main__":
+    main()
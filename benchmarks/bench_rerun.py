@@ -0,0 +1,42 @@
+"""单次脚本重跑耗时：用 AppTest 在无界面模式下反复重跑页面脚本，报告每次重跑的墙钟时间。
+
+用法：python benchmarks/bench_rerun.py [--runs 50] [--language zh|en]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+SCRIPT = os.path.join(ROOT, "SYPHU-CHINA iGEM - Inclusive Clinical Research.py")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--language", choices=["zh", "en"], default="zh")
+    args = parser.parse_args()
+
+    os.environ.setdefault("IGEM_DB_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(SCRIPT, default_timeout=60)
+    at.session_state.language = args.language
+    at.run()  # 预热：导入模块、初始化进程级缓存
+
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = np.array(timings)
+    print(f"runs={args.runs} mean={timings.mean():.2f}ms median={np.median(timings):.2f}ms "
+          f"p95={np.percentile(timings, 95):.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""计时 span 的开销：空代码块包在 span() 中与不包时的每次耗时之差，以及 8 个线程并发时的开销。
+
+用法：python benchmarks/bench_spans.py [--iterations 1000000]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inclusive_research.timing import SectionTimings  # noqa: E402
+
+
+def per_span_us(timings, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with timings.span('bench'):
+            pass
+    spans = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(iterations):
+        pass
+    empty = time.perf_counter() - start
+    return (spans - empty) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    timings = SectionTimings()
+    print(f"single thread: {per_span_us(timings, args.iterations):.2f} us/span")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(per_span_us(timings, args.iterations // 8)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 多线程时各线程的墙钟时间包含等待 GIL 的时间，这里报告每个 span 摊到的整体开销
+    print(f"8 threads:     {sum(results) / len(results) / len(results):.2f} us/span (amortized)")
+    count = timings.summary()[0][1]
+    assert count == args.iterations + args.iterations // 8 * 8, count
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""问卷存储压测：1 / 10 / 100 个并发写入者下的吞吐量（份/秒）与 p99 提交延迟。
+
+用法：python benchmarks/bench_store.py [--per-writer 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inclusive_research.cohort import generate_cohort, iter_records  # noqa: E402
+from inclusive_research.store import SubmissionStore  # noqa: E402
+
+
+def run(writers, per_writer):
+    # 记录预先生成，计时只覆盖提交本身
+    records = list(iter_records(generate_cohort(writers * per_writer, seed=writers)))
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SubmissionStore(os.path.join(tmp, "bench.db"))
+        latencies = [[] for _ in range(writers)]
+
+        def writer(w):
+            for j in range(per_writer):
+                start = time.perf_counter()
+                store.submit(records[w * per_writer + j])
+                latencies[w].append(time.perf_counter() - start)
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        assert store.count() == writers * per_writer
+        store.close()
+
+    all_latencies = np.concatenate([np.array(x) for x in latencies])
+    return writers * per_writer / elapsed, np.percentile(all_latencies, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--per-writer", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'writers':>8} {'submissions/s':>14} {'p99 ms':>8}")
+    for writers in (1, 10, 100):
+        rate, p99 = run(writers, args.per_writer)
+        print(f"{writers:>8} {rate:>14.0f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""无界面基准套件：用 AppTest 逐个驱动问卷六个步骤以及仪表盘、研究透明度两个标签页（中英文各一遍），
+记录每次交互的脚本墙钟时间、tracemalloc 内存分配和 delta 消息字节数；
+再以 N 个并行会话（同一进程内的多个脚本线程，与 Streamlit 服务端一致）测量单进程吞吐量的变化。
+结果写入 JSON 文件，便于在不同版本之间比较。
+
+两个标签页按浏览器的方式只重跑各自的 fragment。所有会话像服务端一样共用一份脚本字节码缓存
+（AppTest 默认每次重跑都重新编译脚本）。墙钟时间在关闭 tracemalloc 时测量，
+内存分配另跑一遍单独测量（tracemalloc 会显著拖慢执行）。
+
+用法：python benchmarks/bench_suite.py [--rounds 5] [--sessions 1 2 4 8] [--output bench-results.json]
+"""
+import argparse
+import inspect
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+SCRIPT = os.path.join(ROOT, "SYPHU-CHINA iGEM - Inclusive Clinical Research.py")
+os.environ.setdefault("IGEM_DB_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import streamlit  # noqa: E402
+from streamlit import config  # noqa: E402
+from streamlit.runtime import Runtime  # noqa: E402
+from streamlit.runtime.scriptrunner import RerunData, ScriptRunnerEvent  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1 import local_script_runner  # noqa: E402
+
+from inclusive_research.texts import TEXTS  # noqa: E402
+
+# 每个调用线程（即每个模拟会话）各自的 fragment 作用域和 delta 统计
+session = threading.local()
+script_cache = ScriptCache()
+runtime = []  # 最近一次 AppTest 运行创建的模拟 Runtime
+walk_ids = itertools.count()  # 每遍问卷用新的编号（已提交的编号会被拒绝）
+
+
+def instrument():
+    """让 AppTest 的脚本执行器统计 delta 消息，并支持按 fragment 作用域重跑。"""
+    runner_class = local_script_runner.LocalScriptRunner
+    original_init, original_run = runner_class.__init__, runner_class.run
+
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        if Runtime._instance is not None:
+            runtime[:] = [Runtime._instance]
+        self._script_cache = script_cache
+        self.delta_bytes = self.delta_msgs = 0
+
+        def on_event(sender, event, **kwargs):
+            if event == ScriptRunnerEvent.ENQUEUE_FORWARD_MSG and kwargs['forward_msg'].HasField('delta'):
+                self.delta_bytes += kwargs['forward_msg'].ByteSize()
+                self.delta_msgs += 1
+
+        self.on_event.connect(on_event, weak=False)
+
+    def run(self, *args, **kwargs):
+        try:
+            return original_run(self, *args, **kwargs)
+        finally:
+            session.delta = (self.delta_bytes, self.delta_msgs)
+
+    def rerun_data(**kwargs):
+        return RerunData(fragment_id_queue=list(getattr(session, 'fragment_scope', [])), **kwargs)
+
+    runner_class.__init__, runner_class.run = init, run
+    local_script_runner.RerunData = rerun_data
+    # AppTest 每次运行时临时打开 global.appTest、设置 Runtime 单例，结束后恢复/清空；
+    # 并行会话下其他会话的脚本仍在运行，需要整个进程保持打开并沿用最近的 Runtime
+    config.set_option("global.appTest", True)
+    Runtime.instance = classmethod(lambda cls: cls._instance or runtime[0])
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(runtime))
+
+
+def fragment_id(at, name):
+    for fid, fragment in at._fragment_storage._fragments.items():
+        func = inspect.getclosurevars(fragment).nonlocals.get('non_optional_func')
+        if func is not None and func.__name__ == name:
+            return fid
+    raise LookupError(name)
+
+
+def button(at, label):
+    return next(b for b in at.button if label in b.label)
+
+
+def interactions(language):
+    """[(名称, 交互函数)]：依次走完六个步骤，再分别重跑两个标签页的 fragment。"""
+    texts = TEXTS[language]
+
+    def consent(at):
+        for checkbox in at.checkbox:
+            checkbox.check()
+        button(at, texts['start_questionnaire']).click()
+
+    def demographics(at):
+        at.text_input(key="questionnaire_id").input(f"BENCH-{next(walk_ids):06d}")
+        button(at, texts['next']).click()
+
+    def medical_history(at):
+        at.multiselect(key="treatment_experience").select(texts['treatments'][0])
+        button(at, texts['next']).click()
+
+    def tab(name):
+        def rerun(at):
+            session.fragment_scope = [fragment_id(at, name)]
+        return rerun
+
+    return [
+        ("consent", lambda at: None),
+        ("demographics", consent),
+        ("medical_history", demographics),
+        ("symptoms", medical_history),
+        ("research", lambda at: button(at, texts['next']).click()),
+        ("completion", lambda at: button(at, texts['next']).click()),
+        ("submit", lambda at: button(at, texts['submit']).click()),
+        ("dashboard_tab", tab("dashboard")),
+        ("transparency_tab", tab("transparency")),
+    ]
+
+
+def walk(language, on_interaction):
+    """完整走一遍；每次交互后调用 on_interaction(名称, 秒数)。交互名为执行后所在的页面。"""
+    at = AppTest.from_file(SCRIPT, default_timeout=60)
+    at.session_state.language = language
+    for name, interact in interactions(language):
+        session.fragment_scope = []
+        if name != "consent":
+            interact(at)
+        start = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(f"{language}/{name}: {at.exception[0].message}")
+        on_interaction(name, elapsed)
+    session.fragment_scope = []
+
+
+def measure_sequential(language, rounds):
+    timings, deltas, memory = {}, {}, {}
+
+    def record_time(name, elapsed):
+        timings.setdefault(name, []).append(elapsed * 1000)
+        deltas[name] = session.delta
+
+    walk(language, lambda name, elapsed: None)  # 预热：导入模块、初始化进程级缓存
+    for _ in range(rounds):
+        walk(language, record_time)
+
+    tracemalloc.start()
+    try:
+        def record_memory(name, elapsed):
+            current, peak = tracemalloc.get_traced_memory()
+            memory[name] = {'alloc_peak_kb': (peak - baseline[0]) / 1024,
+                            'alloc_net_kb': (current - baseline[0]) / 1024}
+            tracemalloc.reset_peak()
+            baseline[0] = tracemalloc.get_traced_memory()[0]
+
+        baseline = [tracemalloc.get_traced_memory()[0]]
+        walk(language, record_memory)
+    finally:
+        tracemalloc.stop()
+
+    results = []
+    for name, values in timings.items():
+        values = np.array(values)
+        results.append({
+            'language': language, 'interaction': name, 'runs': len(values),
+            'wall_ms_median': float(np.median(values)), 'wall_ms_p95': float(np.percentile(values, 95)),
+            'wall_ms_mean': float(values.mean()),
+            'delta_bytes': deltas[name][0], 'delta_msgs': deltas[name][1],
+            **memory[name],
+        })
+    return results
+
+
+def measure_parallel(sessions, rounds):
+    latencies = [[] for _ in range(sessions)]
+    errors = []
+
+    def run_session(i):
+        try:
+            for _ in range(rounds):
+                walk(("zh", "en")[i % 2], lambda name, elapsed: latencies[i].append(elapsed * 1000))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run_session, args=(i,)) for i in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+
+    values = np.concatenate([np.array(x) for x in latencies])
+    return {
+        'sessions': sessions, 'interactions': len(values), 'seconds': elapsed,
+        'interactions_per_s': len(values) / elapsed,
+        'latency_ms_median': float(np.median(values)), 'latency_ms_p95': float(np.percentile(values, 95)),
+    }
+
+
+def build_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'), 'commit': commit or None,
+        'python': platform.python_version(), 'streamlit': streamlit.__version__,
+        'platform': platform.platform(), 'cpus': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--output", default="bench-results.json")
+    args = parser.parse_args()
+    instrument()
+
+    results = {'build': build_info(), 'args': vars(args), 'interactions': [], 'parallel': []}
+    print(f"{'lang':<4} {'interaction':<18} {'median ms':>10} {'p95 ms':>8} {'alloc peak KB':>14} "
+          f"{'alloc net KB':>13} {'delta KB':>9} {'msgs':>5}")
+    for language in ("zh", "en"):
+        for r in measure_sequential(language, args.rounds):
+            results['interactions'].append(r)
+            print(f"{language:<4} {r['interaction']:<18} {r['wall_ms_median']:>10.1f} {r['wall_ms_p95']:>8.1f} "
+                  f"{r['alloc_peak_kb']:>14.0f} {r['alloc_net_kb']:>13.0f} {r['delta_bytes'] / 1024:>9.1f} "
+                  f"{r['delta_msgs']:>5}")
+
+    print(f"\n{'sessions':>8} {'interactions/s':>15} {'median ms':>10} {'p95 ms':>8}")
+    for sessions in args.sessions:
+        r = measure_parallel(sessions, args.rounds)
+        results['parallel'].append(r)
+        print(f"{sessions:>8} {r['interactions_per_s']:>15.1f} {r['latency_ms_median']:>10.1f} "
+              f"{r['latency_ms_p95']:>8.1f}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""参与趋势图压测：研究时长从 30 天增长到 20 年时，“全部时间”和“最近 90 天”两种可见范围下
+取数加建图的耗时、图中的点数与图表 JSON 大小；并与每天一个点的旧做法对照。
+
+用法：python benchmarks/bench_trend.py [--participants 1000000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import plotly.express as px
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inclusive_research.aggregates import DashboardAggregates  # noqa: E402
+from inclusive_research.cohort import frame_counts, generate_cohort  # noqa: E402
+
+STUDY_DAYS = (30, 365, 5 * 365, 20 * 365)
+
+
+def build(aggregates, days):
+    end = date.today()
+    start = None if days is None else end - timedelta(days=days - 1)
+    x, y, granularity = aggregates.trend(start, None if days is None else end)
+    return px.line(x=x, y=y, labels={'x': 'completion_date', 'y': 'count'}), len(x), granularity
+
+
+def build_daily(aggregates):
+    # 旧做法：每天一个点
+    daily = aggregates.rollups['day']
+    x = [date.fromordinal(key) for key in daily.keys]
+    return px.line(x=x, y=[daily.counts[key] for key in daily.keys]), len(x), 'day'
+
+
+def measure(make, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fig, points, granularity = make()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    return elapsed, points, granularity, len(fig.to_json()) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--participants", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'study days':>10} {'range':<10} {'granularity':<11} {'points':>6} {'ms':>7} {'JSON KB':>8}")
+    for study_days in STUDY_DAYS:
+        aggregates = DashboardAggregates()
+        cohort = generate_cohort(args.participants, seed=study_days, days=study_days)
+        field_counts, daily_counts, data_points = frame_counts(cohort)
+        aggregates.merge(field_counts, daily_counts, len(cohort), data_points)
+        for name, make in (("all", lambda: build(aggregates, None)), ("90 days", lambda: build(aggregates, 90)),
+                           ("daily/old", lambda: build_daily(aggregates))):
+            elapsed, points, granularity, kb = measure(make, args.repeat)
+            print(f"{study_days:>10} {name:<10} {granularity:<11} {points:>6} {elapsed:>7.2f} {kb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
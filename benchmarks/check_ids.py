@@ -0,0 +1,53 @@
+"""检查问卷编号查重在布隆过滤器超出容量、按新规模重建之后仍然正确：
+已提交的编号全部判为存在，未提交的编号判为不存在。任一编号判错即以非零状态退出。
+
+用法：python benchmarks/check_ids.py [--capacity 10] [--rows 15]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inclusive_research.ids import QuestionnaireIds  # noqa: E402
+from inclusive_research.store import SubmissionStore, connect  # noqa: E402
+
+
+def insert(path, questionnaire_ids):
+    conn = connect(path)
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany("INSERT INTO submissions (questionnaire_id, language, submitted_at) VALUES (?, 'zh', 0)",
+                     [(questionnaire_id,) for questionnaire_id in questionnaire_ids])
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--capacity", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SubmissionStore(os.path.join(tmp, "check.db"))
+        ids = QuestionnaireIds(store, min_capacity=args.capacity)
+        capacity = ids._filter.capacity
+        # 启动之后由“其他进程”写入，超过过滤器容量，下一次查重时触发重建
+        submitted = [f"Q{i}" for i in range(args.rows)]
+        insert(store.path, submitted)
+        wrong = [q for q in submitted if not ids.exists(q)]
+        wrong += [q for q in (f"N{i}" for i in range(args.rows)) if ids.exists(q)]
+        rebuilt = ids._filter.capacity != capacity
+        store.close()
+
+    print(f"capacity {capacity} -> {ids._filter.capacity} after {args.rows} rows, "
+          f"{len(wrong)} wrong answer(s)")
+    if not rebuilt:
+        raise SystemExit("the filter was not rebuilt; raise --rows above --capacity")
+    if wrong:
+        raise SystemExit(f"wrong answers for: {', '.join(wrong)}")
+
+
+if __name__ == "__main__":
+    main()
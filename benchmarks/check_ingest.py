@@ -0,0 +1,48 @@
+"""检查导出文件能原样导回：把合成问卷写入一个库，导出为 CSV（提交时间、调查日期、出生日期等都是 ISO 日期字符串），
+再导入到空库。每一行都应写入、没有拒收，提交时间与原库相同；否则以非零状态退出。
+
+用法：python benchmarks/check_ingest.py [--rows 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inclusive_research.cohort import generate_cohort, iter_records  # noqa: E402
+from inclusive_research.export import write_export  # noqa: E402
+from inclusive_research.ingest import ingest  # noqa: E402
+from inclusive_research.store import SubmissionStore  # noqa: E402
+
+
+def submitted_at(store):
+    return [row[0] for row in store.query("SELECT submitted_at FROM submissions ORDER BY questionnaire_id")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = SubmissionStore(os.path.join(tmp, "source.db"))
+        source.bulk_insert(iter_records(generate_cohort(args.rows, seed=11)))
+        path = write_export(source, 'CSV', os.path.join(tmp, "exports"))
+
+        target = SubmissionStore(os.path.join(tmp, "target.db"))
+        report = ingest(target, path, os.path.join(tmp, "rejects.csv"))
+        same_times = submitted_at(target) == submitted_at(source)
+        source.close()
+        target.close()
+
+    print(f"{report['rows']} rows: {report['inserted']} inserted, {report['rejected']} rejected, "
+          f"submitted_at {'preserved' if same_times else 'changed'}")
+    if report['inserted'] != args.rows or report['rejected']:
+        raise SystemExit("the exported rows were not all imported")
+    if not same_times:
+        raise SystemExit("submitted_at changed on the way through export and import")
+
+
+if __name__ == "__main__":
+    main()
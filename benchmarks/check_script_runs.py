@@ -0,0 +1,90 @@
+"""检查每次用户交互只执行一次页面脚本（导航全部走回调，不再调用 st.rerun()）。
+
+依次驱动：切换语言、同意条款、各步骤“下一步”、“上一步”、最终提交，统计每次交互触发的脚本执行次数。
+任一交互超过一次即以非零状态退出。
+
+用法：python benchmarks/check_script_runs.py
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+SCRIPT = os.path.join(ROOT, "SYPHU-CHINA iGEM - Inclusive Clinical Research.py")
+
+from streamlit.runtime.scriptrunner import ScriptRunnerEvent  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner  # noqa: E402
+
+script_starts = 0
+
+
+def count_script_runs():
+    """给 AppTest 每次创建的脚本执行器挂上 SCRIPT_STARTED 计数。"""
+    original_init = LocalScriptRunner.__init__
+
+    def on_event(sender, event, **kwargs):
+        global script_starts
+        if event == ScriptRunnerEvent.SCRIPT_STARTED:
+            script_starts += 1
+
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self.on_event.connect(on_event, weak=False)
+
+    LocalScriptRunner.__init__ = init
+
+
+def button(at, label):
+    return next(b for b in at.button if label in b.label)
+
+
+def main():
+    global script_starts
+    os.environ.setdefault("IGEM_DB_PATH", os.path.join(tempfile.mkdtemp(), "check.db"))
+    count_script_runs()
+    at = AppTest.from_file(SCRIPT, default_timeout=60).run()
+
+    def consent(at):
+        for checkbox in at.checkbox:
+            checkbox.check()
+        button(at, "Start Questionnaire").click()
+
+    def demographics(at):
+        at.text_input(key="questionnaire_id").input("CHECK-001")
+        button(at, "Next").click()
+
+    def medical_history(at):
+        at.multiselect(key="treatment_experience").select("Surgery")
+        button(at, "Next").click()
+
+    interactions = [
+        ("language switch", lambda at: at.radio(key="language_selector").set_value("English")),
+        ("consent", consent),
+        ("demographics next", demographics),
+        ("previous", lambda at: button(at, "Previous").click()),
+        ("demographics next again", demographics),
+        ("medical history next", medical_history),
+        ("symptoms next", lambda at: button(at, "Next").click()),
+        ("research next", lambda at: button(at, "Next").click()),
+        ("submit", lambda at: button(at, "Submit").click()),
+    ]
+
+    failures = 0
+    for name, interact in interactions:
+        script_starts = 0
+        interact(at)
+        at.run()
+        if at.exception:
+            raise SystemExit(f"{name}: {at.exception[0].message}")
+        status = "ok" if script_starts == 1 else "FAIL"
+        failures += script_starts != 1
+        print(f"{name:<26} runs={script_starts} step={at.session_state.current_step} {status}")
+
+    if failures:
+        raise SystemExit(f"{failures} interaction(s) ran the script more than once")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""检查批量导入的向量化校验与逐份校验口径一致：合成问卷的扁平表（日期为 ISO 字符串）交给 validate_frame，
+同样的答案按控件的原始值（日期为 date）逐份交给 validate。两边对每一行的通过与否、清理后的日期都应相同，
+而且合成问卷全部合法；任一行不一致即以非零状态退出。
+
+用法：python benchmarks/check_validate.py [--rows 2000]
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inclusive_research.cohort import flat_frame, generate_cohort  # noqa: E402
+from inclusive_research.schema import MULTI_SEPARATOR, QUESTIONNAIRE  # noqa: E402
+
+
+def widget_value(field, value):
+    # 扁平表中的取值 -> 问卷控件给出的原始值
+    if pd.isna(value) or value == '':
+        return [] if field.multi else None
+    if field.multi:
+        return [v.strip() for v in value.split(MULTI_SEPARATOR) if v.strip()]
+    if field.kind == 'date':
+        return date.fromisoformat(value)
+    if field.kind in ('number', 'slider'):
+        return int(value)
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    flat = flat_frame(generate_cohort(args.rows, seed=5))
+    encoded, errors = QUESTIONNAIRE.validate_frame(flat)
+    dates = [field.name for field in QUESTIONNAIRE.fields.values() if field.kind == 'date']
+
+    mismatches = []
+    for i, row in enumerate(flat.to_dict('records')):
+        answers = {name: widget_value(field, row.get(name)) for name, field in QUESTIONNAIRE.fields.items()}
+        values, problems = {}, []
+        for step in QUESTIONNAIRE.steps:
+            cleaned, step_errors = QUESTIONNAIRE.validate(step, answers)
+            values.update(cleaned)
+            problems += step_errors
+        if bool(problems) != bool(errors.iloc[i]) or any(values[name] != encoded[name].iloc[i] for name in dates):
+            mismatches.append((row['questionnaire_id'], problems, errors.iloc[i]))
+
+    rejected = int((errors != '').sum())
+    print(f"{args.rows} rows: validate_frame rejected {rejected}, {len(mismatches)} row(s) disagree with validate")
+    if mismatches:
+        raise SystemExit(f"first disagreement: {mismatches[0]}")
+    if rejected:
+        raise SystemExit(f"valid rows were rejected: {errors[errors != ''].iloc[0]}")
+
+
+if __name__ == "__main__":
+    main()
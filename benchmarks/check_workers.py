@@ -0,0 +1,116 @@
+"""多进程部署检查：几个工作进程（模拟负载均衡后面的多个 Streamlit 服务进程）共用一个问卷库和漏斗库，
+各自持有一份仪表盘计数器，交替提交问卷、同步，最后确认每个进程都看到了全部问卷：
+总数、各字段计数、数据点数、筛选索引、症状直方图都与从库重新加载的结果相同，漏斗计数也相同。
+同时报告库没有变化时 sync() 的单次耗时，以及每个进程实际追读的次数（只在库变化后追读）。
+任一进程不一致即以非零状态退出。
+
+用法：python benchmarks/check_workers.py [--workers 4] [--per-worker 500]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from inclusive_research.aggregates import DashboardAggregates  # noqa: E402
+from inclusive_research.cohort import generate_cohort, iter_records  # noqa: E402
+from inclusive_research.funnel import FunnelJournal  # noqa: E402
+from inclusive_research.store import SubmissionStore  # noqa: E402
+
+SEED = 7
+ROUNDS = 5
+
+
+def snapshot(aggregates):
+    # 可比较的统计快照
+    return {
+        'total': aggregates.total,
+        'data_points': aggregates.data_points,
+        'counts': {field: dict(counts) for field, counts in aggregates.counts.items()},
+        'filtered': aggregates.filtered({'gender': (0,)})[:2],
+        'symptoms': aggregates.symptoms.snapshot().tolist(),
+    }
+
+
+def worker(w, workers, per_worker, directory, start, results):
+    store = SubmissionStore(os.path.join(directory, "submissions.db"))
+    funnel = FunnelJournal(os.path.join(directory, "funnel.db"), flush_interval=0.05)
+    aggregates = DashboardAggregates()
+    aggregates.sync(store)
+    records = list(iter_records(generate_cohort(workers * per_worker, seed=SEED)))[w::workers]
+    start.wait()
+
+    calls = reloads = 0
+    # 分几轮提交，每轮之后同步一次：其他进程的问卷随库的版本变化陆续追读进来
+    for batch in (records[i::ROUNDS] for i in range(ROUNDS)):
+        for record in batch:
+            aggregates.add_record(store.submit(record), record)
+            funnel.record(f"w{w}", 'submit', reached=0)
+        reloads += aggregates.sync(store)
+        calls += 1
+    # 等所有进程都写完后再同步，直到看到全部问卷
+    deadline = time.monotonic() + 30
+    while aggregates.total < workers * per_worker or funnel.reached(1)[0] < workers * per_worker:
+        if time.monotonic() > deadline:
+            break
+        reloads += aggregates.sync(store)
+        calls += 1
+        time.sleep(0.01)
+
+    # 库不再变化时 sync() 只是一条 PRAGMA
+    repeat = 2000
+    started = time.perf_counter()
+    for _ in range(repeat):
+        reloads += aggregates.sync(store)
+    idle_us = (time.perf_counter() - started) / repeat * 1e6
+    results.put((w, snapshot(aggregates), funnel.reached(1)[0], calls + repeat, reloads, idle_us))
+    funnel.close()
+    store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--per-worker", type=int, default=500)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        # 先建好库，避免各进程同时建表
+        SubmissionStore(os.path.join(directory, "submissions.db")).close()
+        FunnelJournal(os.path.join(directory, "funnel.db")).close()
+        start = context.Barrier(args.workers)
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(w, args.workers, args.per_worker, directory, start, results))
+                     for w in range(args.workers)]
+        for process in processes:
+            process.start()
+        reports = sorted(results.get(timeout=300) for _ in processes)
+        for process in processes:
+            process.join()
+
+        store = SubmissionStore(os.path.join(directory, "submissions.db"))
+        expected = DashboardAggregates()
+        expected.load_store(store)
+        store.close()
+        expected = snapshot(expected)
+
+    total = args.workers * args.per_worker
+    print(f"{args.workers} workers x {args.per_worker} submissions, expected total {total}")
+    print(f"{'worker':>6} {'total':>7} {'funnel':>7} {'syncs':>6} {'reloads':>8} {'idle sync us':>12} status")
+    failures = 0
+    for w, seen, funnel_total, calls, reloads, idle_us in reports:
+        ok = seen == expected and expected['total'] == total and funnel_total == total
+        failures += not ok
+        print(f"{w:>6} {seen['total']:>7} {funnel_total:>7} {calls:>6} {reloads:>8} {idle_us:>12.1f} "
+              f"{'ok' if ok else 'FAIL'}")
+    if failures:
+        raise SystemExit(f"{failures} worker(s) did not converge to the store's contents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""SYPHU-CHINA iGEM 包容性研究平台的后端模块（存储、统计等），与 Streamlit 页面脚本分离。"""
@@ -0,0 +1,293 @@
+"""仪表盘的增量统计：每个服务进程一份，新问卷提交时 O(1) 更新，渲染时只读计数器。
+
+交叉筛选另有一份位图索引（见 bitmaps.py），症状评分另有分组直方图（见 symptoms.py），
+都与计数器在同样的时机、对同样的行更新。有列式归档（见 archive.py）时，启动加载已归档的部分只内存映射读取所需的列。
+多个服务进程共用一个库时，各进程渲染前调用 sync()：库的 data_version 变化后才追读水位线之后的新行，
+其他进程写入的问卷因此也会计入，而库没有变化时不读任何表。
+"""
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from . import archive
+from .bitmaps import AGE_BAND_LABELS, BitmapIndex, age_band
+from .schema import QUESTIONNAIRE
+from .store import SYMPTOM_SCORES
+from .symptoms import SymptomHistograms
+from .texts import TEXTS
+from .timeseries import EPOCH_ORDINAL, GRANULARITIES, MAX_POINTS, Rollup, downsample, granularity_for
+
+# 分组计数的字段 -> 所在的表
+FIELDS = {'region': 'demographics', 'gender': 'demographics', 'ethnicity': 'demographics',
+          'tumor_stage': 'medical_history'}
+# 仪表盘交叉筛选的字段（位图索引）-> 取值个数；age_band 由出生日期和调查日期推算
+FILTER_FIELDS = {
+    **{name: len(QUESTIONNAIRE.fields[name].option_list(TEXTS['en'])) for name in ('region', 'gender', 'ethnicity')},
+    'age_band': len(AGE_BAND_LABELS),
+    **{name: len(QUESTIONNAIRE.fields[name].option_list(TEXTS['en'])) for name in ('tumor_stage', 'income', 'residence')},
+}
+# 从存储加载位图索引和症状直方图的各列；日期换算为 date.toordinal()（0001-01-01 的儒略日为 1721425.5），
+# 年龄为调查日期（缺失时为提交日期）时的周岁
+_LOCAL_DAY = "date(s.submitted_at, 'unixepoch', 'localtime')"
+_SURVEY_DAY = f"COALESCE(s.survey_date, {_LOCAL_DAY})"
+ROWS_QUERY = f"""
+SELECT CAST(julianday({_LOCAL_DAY}) - 1721424.5 AS INTEGER) AS day,
+       CAST(strftime('%Y', {_SURVEY_DAY}) AS INTEGER) - CAST(strftime('%Y', d.birth_date) AS INTEGER)
+           - (strftime('%m-%d', {_SURVEY_DAY}) < strftime('%m-%d', d.birth_date)) AS age,
+       d.region, d.gender, d.ethnicity, d.income, d.residence, m.tumor_stage, m.current_treatment,
+       {', '.join(f'y.{symptom}' for symptom in SYMPTOM_SCORES)}
+FROM submissions s
+LEFT JOIN demographics d ON d.submission_id = s.id
+LEFT JOIN medical_history m ON m.submission_id = s.id
+LEFT JOIN symptoms y ON y.submission_id = s.id
+WHERE s.id > ? AND s.id <= ? {{exclude}}
+"""
+# 从归档加载时读取的列（其余列不载入内存）：选项下标与评分列，以及日期、数据点数
+ARCHIVE_CODES = ['current_treatment', *(field for field in FILTER_FIELDS if field != 'age_band'), *SYMPTOM_SCORES]
+ARCHIVE_COLUMNS = ['id', 'submitted_at', 'survey_date', 'birth_date', 'answered', *ARCHIVE_CODES]
+# 各表中属于问卷题目的列（表名与步骤名相同），用于从存储统计数据点
+ANSWER_COLUMNS = {
+    'submissions': [field.name for field in QUESTIONNAIRE.fields.values() if field.root],
+    **{step.name: [field.name for field in step.fields if not field.root] for step in QUESTIONNAIRE.steps.values()},
+}
+
+
+def _age(birth, survey):
+    # datetime64[D] 数组 -> 调查日期时的周岁；出生日期缺失（NaT）为 -1
+    def month_day(days):
+        return (days.astype('datetime64[M]') - days.astype('datetime64[Y]')).astype(np.int64) * 32 + \
+            (days - days.astype('datetime64[M]')).astype(np.int64)
+
+    missing = np.isnat(birth)
+    birth = np.where(missing, survey, birth)
+    age = (survey.astype('datetime64[Y]') - birth.astype('datetime64[Y]')).astype(np.int64) \
+        - (month_day(survey) < month_day(birth))
+    return np.where(missing, -1, age)
+
+
+class DashboardAggregates:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {field: Counter() for field in FIELDS}
+        self.rollups = {granularity: Rollup(granularity) for granularity in GRANULARITIES}  # 日 / 周 / 月完成数
+        self.total = 0
+        self.data_points = 0  # 已作答的题目总数（见 schema.Questionnaire.answered）
+        self.version = 0  # 数据版本：计数每变化一次加一，图表缓存据此失效
+        self.watermark = 0  # 不大于它的 submission id 都已计入统计
+        self._ahead = set()  # 已由 add_record 计入、但与水位线之间还有空缺的 id（空缺是批量导入等其他途径写入的行）
+        self._store_version = None  # 上次追读时库的 data_version
+        self.index = BitmapIndex(FILTER_FIELDS)
+        self.symptoms = SymptomHistograms()
+
+    def add(self, day, data_points=0, **codes):
+        """计入一份问卷；codes 为各字段的选项下标，缺失的字段不计数。"""
+        with self._lock:
+            self.total += 1
+            self.data_points += data_points
+            self.version += 1
+            for rollup in self.rollups.values():
+                rollup.add(day.toordinal())
+            for field, code in codes.items():
+                if code is not None:
+                    self.counts[field][code] += 1
+
+    def add_record(self, submission_id, record):
+        """计入刚写入存储的记录（见 schema.Questionnaire.encode）。启动时已从存储加载过的 id 会被跳过。"""
+        with self._lock:
+            if submission_id <= self.watermark or submission_id in self._ahead:
+                return
+            self._ahead.add(submission_id)
+            while self.watermark + 1 in self._ahead:
+                self.watermark += 1
+                self._ahead.remove(self.watermark)
+        demographics = record.get('demographics') or {}
+        medical = record.get('medical_history') or {}
+        day = datetime.fromtimestamp(record['submitted_at']).date()
+        survey_day = date.fromisoformat(record['survey_date']) if record.get('survey_date') else day
+        birth = demographics.get('birth_date')
+        if birth:
+            birth = date.fromisoformat(birth)
+            age = survey_day.year - birth.year - ((survey_day.month, survey_day.day) < (birth.month, birth.day))
+        else:
+            age = -1
+        self.index.append({
+            'age_band': int(age_band(age)), 'tumor_stage': medical.get('tumor_stage'),
+            **{field: demographics.get(field) for field in ('region', 'gender', 'ethnicity', 'income', 'residence')},
+        }, day.toordinal())
+        self.symptoms.add(medical.get('tumor_stage'), medical.get('current_treatment'), record.get('symptoms') or {})
+        self.add(
+            day,
+            QUESTIONNAIRE.answered(record),
+            region=demographics.get('region'),
+            gender=demographics.get('gender'),
+            ethnicity=demographics.get('ethnicity'),
+            tumor_stage=medical.get('tumor_stage'),
+        )
+
+    def merge(self, field_counts, daily_counts, total, data_points=0):
+        """批量并入预先分组好的计数（用于启动时加载）。"""
+        with self._lock:
+            self.total += total
+            self.data_points += data_points
+            self.version += 1
+            for field, counts in field_counts.items():
+                self.counts[field].update(counts)
+            for ordinal, n in daily_counts.items():
+                for rollup in self.rollups.values():
+                    rollup.add(ordinal, n)
+
+    def sync(self, store, archive_dir=None):
+        """库有变化（store.data_version() 与上次不同，例如其他服务进程写入了问卷）时追读水位线之后的新行。
+
+        库没有变化时只执行一条 PRAGMA；有变化时的开销与新行数成正比。返回是否追读过。
+        """
+        version = store.data_version()
+        with self._lock:
+            if version == self._store_version:
+                return False
+            self._store_version = version
+        self.load_store(store, archive_dir)
+        return True
+
+    def load_store(self, store, archive_dir=None):
+        """从存储分组统计水位线之后的全部问卷（启动时、批量导入后调用），之后的在线提交靠 add_record 增量更新。
+
+        archive_dir 为列式归档目录且已安装 pyarrow 时，已归档的 id 段从归档读取，只有其后的行查询存储。
+        """
+        with self._lock:
+            # 先占下 (水位线, 当前最大 id] 这一段：统计期间到达的 add_record 若落在其中会被跳过，不会重复计数
+            start = self.watermark
+            end = store.query("SELECT COALESCE(MAX(id), 0) FROM submissions").fetchone()[0]
+            if end <= start:
+                return
+            counted = sorted(i for i in self._ahead if i <= end)
+            self._ahead.difference_update(counted)
+            self.watermark = end
+            while self.watermark + 1 in self._ahead:
+                self.watermark += 1
+                self._ahead.remove(self.watermark)
+        field_counts = {field: Counter() for field in FIELDS}
+        daily_counts = Counter()
+        data_points = 0
+        if archive_dir is not None and archive.available():
+            archived = min(archive.watermark(archive_dir), end)
+            if archived > start:
+                data_points += self._load_archive(archive_dir, start, archived, counted, field_counts, daily_counts)
+                start = archived
+        if end > start:
+            data_points += self._load_rows(store, start, end, counted, field_counts, daily_counts)
+        self.merge(field_counts, daily_counts, sum(daily_counts.values()), data_points)
+
+    def _load_rows(self, store, start, end, counted, field_counts, daily_counts):
+        # 存储中 (start, end] 段（除去 counted）：分组计数累加到 field_counts / daily_counts，行写入索引与直方图，返回数据点数
+        exclude = f"AND {{id}} NOT IN ({', '.join(map(str, counted))})" if counted else ""
+        for field, table in FIELDS.items():
+            field_counts[field].update(dict(store.query(
+                f"SELECT {field}, COUNT(*) FROM {table} WHERE submission_id > ? AND submission_id <= ? "
+                f"AND {field} IS NOT NULL {exclude.format(id='submission_id')} GROUP BY {field}",
+                (start, end)
+            ).fetchall()))
+        daily_counts.update({
+            date.fromisoformat(day).toordinal(): n
+            for day, n in store.query(
+                "SELECT date(submitted_at, 'unixepoch', 'localtime'), COUNT(*) FROM submissions "
+                f"WHERE id > ? AND id <= ? {exclude.format(id='id')} GROUP BY 1", (start, end)
+            )
+        })
+        data_points = 0
+        for table, columns in ANSWER_COLUMNS.items():
+            # 空文字和空多选（'[]'）不算作答；不满足显示条件的题目为 NULL
+            answered = ' + '.join(f"({column} IS NOT NULL AND {column} NOT IN ('', '[]'))" for column in columns)
+            key = 'id' if table == 'submissions' else 'submission_id'
+            data_points += store.query(
+                f"SELECT COALESCE(SUM({answered}), 0) FROM {table} WHERE {key} > ? AND {key} <= ? "
+                f"{exclude.format(id=key)}", (start, end)
+            ).fetchone()[0]
+        cursor = store.query(ROWS_QUERY.format(exclude=exclude.format(id='s.id')), (start, end))
+        names = [column[0] for column in cursor.description]
+        while rows := cursor.fetchmany(100_000):
+            # NULL -> NaN -> -1（缺失）
+            self._extend(dict(zip(names, np.nan_to_num(np.array(rows, dtype=np.float64), nan=-1).astype(np.int64).T)))
+        return data_points
+
+    def _load_archive(self, directory, start, end, counted, field_counts, daily_counts):
+        # 同 _load_rows，数据来自归档中 (start, end] 段：只打开 id 范围与之相交的分片，逐个 RecordBatch 只读 ARCHIVE_COLUMNS
+        data_points = 0
+        for batch in archive.iter_batches(directory, ARCHIVE_COLUMNS, ids=(start, end)):
+            ids = batch['id'].to_numpy()
+            keep = (ids > start) & (ids <= end)
+            if counted:
+                keep &= ~np.isin(ids, counted)
+            if not keep.any():
+                continue
+            chunk = {name: archive.codes(batch[name])[keep] for name in ARCHIVE_CODES}
+            days = batch['submitted_at'].to_numpy().astype('datetime64[D]')[keep]
+            survey = batch['survey_date'].to_numpy(zero_copy_only=False)[keep]
+            chunk['day'] = days.astype(np.int64) + EPOCH_ORDINAL
+            chunk['age'] = _age(batch['birth_date'].to_numpy(zero_copy_only=False)[keep],
+                                np.where(np.isnat(survey), days, survey))
+            for field in FIELDS:
+                values, counts = np.unique(chunk[field][chunk[field] >= 0], return_counts=True)
+                field_counts[field].update(dict(zip(values.tolist(), counts.tolist())))
+            values, counts = np.unique(chunk['day'], return_counts=True)
+            daily_counts.update(dict(zip(values.tolist(), counts.tolist())))
+            data_points += int(batch['answered'].to_numpy()[keep].sum())
+            self._extend(chunk)
+        return data_points
+
+    def _extend(self, chunk):
+        # chunk 为 {列: int64 数组}（列见 ROWS_QUERY，缺失为 -1）
+        columns = {field: chunk[field] for field in FILTER_FIELDS if field != 'age_band'}
+        columns['age_band'] = age_band(chunk['age'])
+        self.index.extend(columns, chunk['day'].astype(np.int32))
+        self.symptoms.add_columns(chunk['tumor_stage'], chunk['current_treatment'],
+                                  np.column_stack([chunk[symptom] for symptom in SYMPTOM_SCORES]))
+
+    def filtered(self, selection, fields=('region', 'tumor_stage')):
+        """交叉筛选：selection 为 {字段: (取值下标, ...)}（见 FILTER_FIELDS）。
+
+        返回 (人数, {字段: [(选项下标, 数量), ...] 按数量降序}, (日期序号数组, 每日人数数组))，全部由位图求交得到。
+        """
+        mask, rows = self.index.select(selection)
+        ranked = {}
+        for field in fields:
+            counts = self.index.counts(field, mask)
+            order = np.argsort(-counts, kind='stable')
+            ranked[field] = [(int(code), int(counts[code])) for code in order if counts[code]]
+        ordinals, day_counts = self.index.day_counts(mask, rows)
+        return int(day_counts.sum()), ranked, (ordinals, day_counts)
+
+    def ranked(self, field):
+        """[(选项下标, 数量), ...]，按数量降序。"""
+        with self._lock:
+            return self.counts[field].most_common()
+
+    def live_metrics(self, today=None):
+        """仪表盘顶部的实时指标：只读计数器，与问卷总数无关。"""
+        today = today or date.today()
+        with self._lock:
+            daily = self.rollups['day']
+            return {
+                'total': self.total,
+                'today': daily.get(today.toordinal()),
+                'yesterday': daily.get((today - timedelta(days=1)).toordinal()),
+                'ethnicities': sum(1 for n in self.counts['ethnicity'].values() if n),
+                'data_points': self.data_points,
+            }
+
+    def trend(self, start=None, end=None, max_points=MAX_POINTS):
+        """可见范围 [start, end]（date，缺省为有数据的全部日期）内的参与趋势：([桶起始日期], [数量], 粒度)。
+
+        粒度按范围长度自动选择（见 timeseries.granularity_for），桶数仍超过 max_points 时用 LTTB 降采样。
+        """
+        with self._lock:
+            days = self.rollups['day'].keys
+            if not days:
+                return [], [], 'day'
+            start = start.toordinal() if start else days[0]
+            end = end.toordinal() if end else days[-1]
+            granularity = granularity_for(start, end, max_points)
+            keys, counts = self.rollups[granularity].window(start, end)
+        return downsample(keys, counts, granularity, max_points)
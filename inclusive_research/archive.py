@@ -0,0 +1,429 @@
+"""问卷的列式归档：把扁平化的问卷行按提交月份分区写成 Arrow IPC 文件，供仪表盘与分析按列读取。
+
+目录结构为 <directory>/month=YYYY-MM/part-<首 id>-<末 id>.arrow，WATERMARK 文件记录已归档的最大 id。
+提交只追加、不修改，归档按水位线增量进行：每次压缩只读库中水位线之后的行，每个涉及的月份追加一个分片，
+全部分片落盘后才推进水位线；某月分片超过 MAX_PARTS 个（或批次过碎）时合并为一个。
+写入时把行攒成约 BATCH_ROWS 行的批次：批次内每列的缓冲区是连续的一段，只读几列时不会因为缓冲区过小
+而把相邻列所在的页一并读入。
+分片不压缩，读取时直接内存映射：只解析文件尾部的元数据，所选列的缓冲区按页按需载入，其余列既不读盘也不占内存
+（Parquet 需要逐列解码到内存，做不到这一点）。单选题存为以英文选项为字典的 dictionary<int8, string>，
+多选题为选项文字的列表，日期为 date32，submitted_at 为本地时间；另有 answered 列（该行的数据点数，口径同仪表盘）。
+
+依赖 pyarrow（可选，用到时才导入）：未安装时 available() 为 False，归档不可用，其余功能不受影响。
+"""
+import importlib.util
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .schema import QUESTIONNAIRE
+from .store import FLAT_COLUMNS, SubmissionStore
+from .texts import LANGUAGES, TEXTS
+
+PART = re.compile(r'part-(\d+)-(\d+)\.arrow$')
+MAX_PARTS = 8  # 每个月份的分片数上限，超过后合并
+BATCH_ROWS = 65536  # 每个 RecordBatch 的目标行数
+PENDING_ROWS = 4 * BATCH_ROWS  # 压缩时各月份合计最多缓存的行数，超过后全部写出
+# 计入数据点的列（问卷题目），口径同 aggregates.ANSWER_COLUMNS
+ANSWER_FIELDS = [column for column in FLAT_COLUMNS if column in QUESTIONNAIRE.fields]
+
+
+def available():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _converters():
+    """列名 -> 把一列库中取值（列表）转为 Arrow 数组的函数。"""
+    import pyarrow as pa
+
+    def dictionary(options, lookup=None):
+        values = pa.array(options, pa.string())
+
+        def convert(column):
+            if lookup is not None:
+                column = [None if value is None else lookup[value] for value in column]
+            return pa.DictionaryArray.from_arrays(pa.array(column, pa.int8()), values)
+        return convert
+
+    def multi(options):
+        def convert(column):
+            lists = [None if value is None else json.loads(value) for value in column]
+            if options is not None:
+                lists = [None if codes is None else [options[code] for code in codes] for codes in lists]
+            return pa.array(lists, pa.list_(pa.string()))
+        return convert
+
+    converters = {
+        'id': lambda column: pa.array(column, pa.int64()),
+        'language': dictionary(list(LANGUAGES), {code: i for i, code in enumerate(LANGUAGES)}),
+    }
+    texts = TEXTS['en']
+    for column in ANSWER_FIELDS:
+        field = QUESTIONNAIRE.fields[column]
+        if field.options is not None:
+            options = field.option_list(texts)
+            if field.multi:
+                converters[column] = multi(options if field.codes else None)
+            else:
+                # codes=False 的单选题库中存选项文字，换成下标后与其他单选题一样存为字典列
+                converters[column] = dictionary(options, None if field.codes else {o: i for i, o in enumerate(options)})
+        elif field.kind == 'date':
+            converters[column] = lambda column: pa.array(column, pa.string()).cast(pa.date32())
+        elif field.kind in ('number', 'slider'):
+            converters[column] = lambda column: pa.array(column, pa.int16())
+        else:
+            converters[column] = lambda column: pa.array(column, pa.string())
+    return converters
+
+
+def _answered(arrays):
+    # 非空、且不是空文字 / 空列表的题目数
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    total = np.zeros(len(arrays['id']), dtype=np.int16)
+    for column in ANSWER_FIELDS:
+        array = arrays[column]
+        if pa.types.is_list(array.type):
+            answered = pc.greater(pc.list_value_length(array), 0)
+        elif pa.types.is_string(array.type):
+            answered = pc.not_equal(array, '')
+        else:
+            answered = array.is_valid()
+        total += answered.fill_null(False).to_numpy(zero_copy_only=False)
+    return total
+
+
+def _local_seconds(timestamps):
+    """Unix 时间戳 -> 本地时间的秒数。每个时间戳按它自己那一刻的时区偏移换算（夏令时前后不同），
+    与 SQLite 的 'localtime' 和导出一致；时区切换都在整 15 分钟上，每个 15 分钟段只查一次偏移。"""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    slots, inverse = np.unique(timestamps // 900, return_inverse=True)
+    offsets = np.array([datetime.fromtimestamp(slot * 900, timezone.utc).astimezone().utcoffset().total_seconds()
+                        for slot in slots.tolist()], dtype=np.int64)
+    return timestamps + offsets[inverse.reshape(-1)]
+
+
+def to_table(rows):
+    """库中的扁平行（store.iter_rows 的一块）-> 归档格式的 pyarrow.Table。"""
+    import pyarrow as pa
+
+    converters = _converters()
+    columns = list(zip(*rows)) if rows else [()] * len(FLAT_COLUMNS)
+    arrays = {}
+    for name, values in zip(FLAT_COLUMNS, columns):
+        if name == 'submitted_at':
+            # Unix 时间戳 -> 本地时间
+            arrays[name] = pa.array(_local_seconds(values).astype('datetime64[s]'))
+        else:
+            arrays[name] = converters[name](list(values))
+    arrays['answered'] = pa.array(_answered(arrays))
+    return pa.table(arrays)
+
+
+def codes(array):
+    """字典列（选项下标）或整数列 -> int64 数组，缺失为 -1。"""
+    import pyarrow as pa
+
+    if pa.types.is_dictionary(array.type):
+        array = array.indices
+    return array.fill_null(-1).to_numpy().astype(np.int64)
+
+
+def watermark(directory):
+    """已归档的最大 submission id（没有归档时为 0）。"""
+    try:
+        with open(os.path.join(directory, 'WATERMARK')) as f:
+            return int(f.read())
+    except FileNotFoundError:
+        return 0
+
+
+def _set_watermark(directory, value):
+    path = os.path.join(directory, 'WATERMARK')
+    with open(path + '.tmp', 'w') as f:
+        f.write(str(value))
+    os.replace(path + '.tmp', path)
+
+
+@contextmanager
+def _exclusive(directory):
+    # 同一时刻只有一个压缩在写（跨进程用文件锁；没有 fcntl 的平台上只在本进程内互斥）
+    os.makedirs(directory, exist_ok=True)
+    with _local_lock, open(os.path.join(directory, '.lock'), 'w') as lock:
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+_local_lock = threading.Lock()
+
+
+def _part_name(first, last):
+    return f"part-{first:012d}-{last:012d}.arrow"
+
+
+def parts(directory, start=None, end=None, ids=None):
+    """[(月份 'YYYY-MM', 分片路径)]，按月份与 id 排序；start / end 为 date 时只列出与 [start, end] 相交的月份，
+    ids 为 (after, upto) 时只列出 id 范围（见文件名）与 (after, upto] 相交的分片。
+
+    水位线之后的分片（未完成的压缩留下的）和被合并后分片包含的旧分片（合并过程中）不列出。
+    """
+    if not os.path.isdir(directory):
+        return []
+    limit = watermark(directory)
+    first_month = start and start.strftime('%Y-%m')
+    last_month = end and end.strftime('%Y-%m')
+    result = []
+    for name in sorted(os.listdir(directory)):
+        if not name.startswith('month='):
+            continue
+        month = name[len('month='):]
+        if (first_month and month < first_month) or (last_month and month > last_month):
+            continue
+        ranges = []
+        for part in os.listdir(os.path.join(directory, name)):
+            match = PART.match(part)
+            if match and int(match[1]) <= limit:
+                ranges.append((int(match[1]), int(match[2]), part))
+        for first, last, part in sorted(ranges):
+            if ids is not None and (last <= ids[0] or first > ids[1]):
+                continue
+            if not any(a <= first and last <= b and (a, b) != (first, last) for a, b, _ in ranges):
+                result.append((month, os.path.join(directory, name, part)))
+    return result
+
+
+def iter_batches(directory, columns, start=None, end=None, ids=None):
+    """逐个产出所选列的 RecordBatch（内存映射、零拷贝；只有被访问到的列的页才会载入内存）。
+
+    start / end（date）只按月份分区裁剪，ids（(after, upto)）只按分片的 id 范围裁剪；
+    分片内的行由调用方按 submitted_at / id 过滤。
+    """
+    for reader in _open_parts(directory, start, end, ids):
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i).select(columns)
+
+
+def _open_parts(directory, start, end, ids):
+    # 读取不持有压缩锁：先把列出的分片全部打开再读。列出之后、打开之前若合并删除了某个旧分片，
+    # 合并后的分片此时已改名就位，重新列出即可；已打开（内存映射）的分片之后被删除也不影响读取
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    while True:
+        try:
+            return [ipc.open_file(pa.memory_map(path)) for _, path in parts(directory, start, end, ids)]
+        except FileNotFoundError:
+            continue
+
+
+def read(directory, columns, start=None, end=None, ids=None):
+    """所选列的 pyarrow.Table（见 iter_batches）。"""
+    import pyarrow as pa
+
+    schema = to_table([]).select(columns).schema
+    return pa.Table.from_batches(list(iter_batches(directory, columns, start, end, ids)), schema=schema)
+
+
+def compact(store, directory, chunk_size=50000, max_parts=MAX_PARTS):
+    """把库中水位线之后的问卷追加到归档，再合并分片过多的月份。
+
+    返回 {'rows': 本次归档的行数, 'watermark': 水位线, 'months': [本次写入的月份], 'seconds': 耗时}。
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    started = time.perf_counter()
+    with _exclusive(directory):
+        after = watermark(directory)
+        _remove_unfinished(directory, after)
+        writers = {}  # 月份 -> [writer, 临时路径, 首 id, 末 id]
+        pending = {}  # 月份 -> 尚未写出的 Table 列表
+        rows = 0
+
+        def flush(month):
+            _write_batches(writers[month][0], pending.pop(month))
+
+        try:
+            for chunk in store.iter_rows(chunk_size, after_id=after):
+                table = to_table(chunk)
+                months = table['submitted_at'].to_numpy().astype('datetime64[M]')
+                for month in np.unique(months):
+                    part = table.filter(pa.array(months == month))
+                    month = str(month)
+                    if month not in writers:
+                        path = os.path.join(directory, f"month={month}", f".part-{os.getpid()}.tmp")
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        writers[month] = [ipc.new_file(path, table.schema), path, part['id'][0].as_py(), None]
+                    pending.setdefault(month, []).append(part)
+                    writers[month][3] = part['id'][-1].as_py()
+                    if sum(len(t) for t in pending[month]) >= BATCH_ROWS:
+                        flush(month)
+                if sum(len(t) for tables in pending.values() for t in tables) >= PENDING_ROWS:
+                    for month in list(pending):
+                        flush(month)
+                rows += len(chunk)
+                after = chunk[-1][0]
+            for month in list(pending):
+                flush(month)
+        except BaseException:
+            for writer, path, _, _ in writers.values():
+                writer.close()
+                os.remove(path)
+            raise
+        for writer, path, first, last in writers.values():
+            writer.close()
+            os.replace(path, os.path.join(os.path.dirname(path), _part_name(first, last)))
+        # 全部分片落盘后再推进水位线；中途失败时这些分片在下次压缩开始时删除
+        _set_watermark(directory, after)
+        for month in writers:
+            _merge(directory, month, max_parts)
+    return {'rows': rows, 'watermark': after, 'months': sorted(writers),
+            'seconds': time.perf_counter() - started}
+
+
+def _remove_unfinished(directory, limit):
+    # 中途失败的压缩留下的：水位线之后的分片，以及写到一半的临时文件（持有压缩锁，此时没有别的压缩在写）
+    for month, path in _all_parts(directory):
+        if int(PART.match(os.path.basename(path))[1]) > limit:
+            os.remove(path)
+    for name in os.listdir(directory):
+        if name.startswith('month='):
+            for temp in os.listdir(os.path.join(directory, name)):
+                if temp.endswith('.tmp'):
+                    os.remove(os.path.join(directory, name, temp))
+
+
+def _all_parts(directory):
+    for name in os.listdir(directory):
+        if name.startswith('month='):
+            for part in os.listdir(os.path.join(directory, name)):
+                if PART.match(part):
+                    yield name, os.path.join(directory, name, part)
+
+
+def _write_batches(writer, tables):
+    # 相邻的小块拼成约 BATCH_ROWS 行再写，每列在批次内连续存放
+    group, rows = [], 0
+    for table in tables:
+        group.append(table)
+        rows += len(table)
+        if rows >= BATCH_ROWS:
+            writer.write_table(_concat(group), max_chunksize=BATCH_ROWS)
+            group, rows = [], 0
+    if group:
+        writer.write_table(_concat(group), max_chunksize=BATCH_ROWS)
+
+
+def _concat(tables):
+    import pyarrow as pa
+
+    return pa.concat_tables(tables).combine_chunks()
+
+
+def _merge(directory, month, max_parts):
+    # 分片过多，或批次平均不到 BATCH_ROWS 的一半（例如一次压缩补录了大量分散在各月的旧问卷）时重写为一个分片。
+    # 合并后的分片先以临时名写完再改名；改名后到旧分片删除前，parts() 会跳过被它包含的旧分片
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    month_parts = [path for name, path in parts(directory) if name == month]
+    readers = [ipc.open_file(pa.memory_map(path)) for path in month_parts]
+    batches = sum(reader.num_record_batches for reader in readers)
+    rows = sum(reader.get_batch(i).num_rows for reader in readers for i in range(reader.num_record_batches))
+    if len(month_parts) <= max_parts and (batches <= len(month_parts) or rows >= batches * BATCH_ROWS // 2):
+        return
+    first = int(PART.match(os.path.basename(month_parts[0]))[1])
+    last = max(int(PART.match(os.path.basename(path))[2]) for path in month_parts)
+    target = os.path.join(directory, f"month={month}", _part_name(first, last))
+    with ipc.new_file(target + '.tmp', to_table([]).schema) as writer:
+        _write_batches(writer, (pa.Table.from_batches([reader.get_batch(i)])
+                                for reader in readers for i in range(reader.num_record_batches)))
+    os.replace(target + '.tmp', target)
+    for path in month_parts:
+        if path != target:
+            os.remove(path)
+
+
+def status(directory):
+    """归档概况：{'watermark', 'months', 'parts', 'bytes'}。"""
+    while True:
+        listed = parts(directory)
+        try:
+            # 同 _open_parts：列出之后被合并删除的分片，重新列出
+            size = sum(os.path.getsize(path) for _, path in listed)
+        except FileNotFoundError:
+            continue
+        return {
+            'watermark': watermark(directory),
+            'months': len({month for month, _ in listed}),
+            'parts': len(listed),
+            'bytes': size,
+        }
+
+
+class ArchiveCompactor:
+    """后台定期压缩：每隔 interval 秒把新提交的问卷追加到归档。最近一次的结果或错误保存在 last / error。"""
+
+    def __init__(self, store, directory, interval=3600.0):
+        self.store = store
+        self.directory = directory
+        self.interval = interval
+        self.last = None
+        self.error = None
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="archive-compactor", daemon=True)
+        self._thread.start()
+
+    def compact(self):
+        try:
+            self.last = compact(self.store, self.directory)
+            self.error = None
+        except Exception as exc:
+            # 下一轮重试；部分写出的分片由下一次压缩清理
+            self.error = repr(exc)
+            raise
+        return self.last
+
+    def _run(self):
+        while True:
+            try:
+                self.compact()
+            except Exception:
+                pass
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.environ.get(
+        "IGEM_DB_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data",
+                                     "submissions.db")))
+    parser.add_argument("--archive", help="归档目录（默认与库同目录的 archive/）")
+    args = parser.parse_args()
+
+    store = SubmissionStore(args.db)
+    try:
+        report = compact(store, args.archive or os.path.join(os.path.dirname(args.db), "archive"))
+    finally:
+        store.close()
+    print(f"archived {report['rows']} rows up to id {report['watermark']} "
+          f"({', '.join(report['months']) or 'no new months'}) in {report['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
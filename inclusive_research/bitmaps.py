@@ -0,0 +1,160 @@
+"""仪表盘交叉筛选的位图索引：每个分类字段的每个取值一张位图，第 i 位对应第 i 个参与者（行号按写入顺序分配）。
+
+位图是 numpy uint64 数组，写入时维护（批量写入整列打包，单份提交只置一位）。
+筛选 = 同一字段所选取值的位图按位或，不同字段之间按位与；筛选后各取值的人数是与该取值位图相与后的 popcount，
+按日趋势不逐行取日期：每批写入的行按日期排序后再分配行号，日期不减的一段行（run）中，某天的人数就是
+该天首行到末行之间筛选位图的 popcount，由逐字 popcount 的前缀和在各天的边界处相减得到。
+三百万行时一次筛选加三张图的计数约几毫秒，不需要逐行比较的布尔掩码。
+"""
+import threading
+
+import numpy as np
+
+# 年龄段（调查时的周岁）：下界
+AGE_BANDS = (0, 40, 50, 60, 70)
+AGE_BAND_LABELS = ('<40', '40-49', '50-59', '60-69', '70+')
+
+
+def age_band(ages):
+    """周岁（数组）-> 年龄段下标；缺失（负数）为 -1。"""
+    ages = np.asarray(ages)
+    return np.where(ages >= 0, np.searchsorted(AGE_BANDS, ages, side='right') - 1, -1)
+
+
+# 逐元素 popcount：NumPy 2.0 起有 np.bitwise_count；1.x 上按字节查表再按字求和
+_BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(words):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    words = np.asarray(words, dtype=np.uint64)
+    flat = np.ascontiguousarray(words.reshape(-1))
+    return _BYTE_COUNTS[flat.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.uint8).reshape(words.shape)
+
+
+def _words(rows):
+    return (rows + 63) // 64
+
+
+class BitmapIndex:
+    def __init__(self, cardinalities, capacity=1 << 16):
+        """cardinalities 为 {字段: 取值个数}；取值为 0..n-1 的下标，-1 表示缺失（不进入任何位图）。"""
+        self.cardinalities = dict(cardinalities)
+        self._lock = threading.Lock()
+        self.rows = 0
+        self._capacity = 0
+        self._bitmaps = {field: np.zeros((n, 0), dtype='<u8') for field, n in self.cardinalities.items()}
+        self._days = np.zeros(0, dtype=np.int32)  # 每行的完成日期（date.toordinal()）
+        self._runs = [0]  # 各段日期不减的行的起始行号
+        self._grow(capacity)
+
+    def _grow(self, rows):
+        # 容量按 64 行对齐、成倍扩大；旧数组原样复制，正在读的会话仍持有旧数组，不受影响
+        capacity = max(rows, 2 * self._capacity)
+        capacity = _words(capacity) * 64
+        for field, bitmaps in self._bitmaps.items():
+            grown = np.zeros((bitmaps.shape[0], capacity // 64), dtype='<u8')
+            grown[:, :bitmaps.shape[1]] = bitmaps
+            self._bitmaps[field] = grown
+        days = np.zeros(capacity, dtype=np.int32)
+        days[:self.rows] = self._days[:self.rows]
+        self._days = days
+        self._capacity = capacity
+
+    def extend(self, columns, days):
+        """批量追加：columns 为 {字段: 取值下标数组}（缺少的字段视为缺失），days 为完成日期序号数组。
+
+        同一批内的行按日期排序后写入（行号只在索引内部使用）。
+        """
+        n = len(days)
+        if not n:
+            return
+        order = np.argsort(days, kind='stable')
+        days = np.asarray(days)[order]
+        with self._lock:
+            start = self.rows
+            if start and days[0] < self._days[start - 1]:
+                self._runs.append(start)
+            if start + n > self._capacity:
+                self._grow(start + n)
+            # 从 start 所在的整字开始打包，前面已有的行补 0，再按位或进去
+            first_word, offset = divmod(start, 64)
+            for field, bitmaps in self._bitmaps.items():
+                codes = np.asarray(columns[field])[order] if field in columns else np.full(n, -1)
+                for value in range(bitmaps.shape[0]):
+                    bits = np.zeros(offset + n, dtype=bool)
+                    bits[offset:] = codes == value
+                    packed = np.packbits(bits, bitorder='little')
+                    packed = np.pad(packed, (0, -len(packed) % 8)).view('<u8')
+                    bitmaps[value, first_word:first_word + len(packed)] |= packed
+            self._days[start:start + n] = days
+            self.rows = start + n
+
+    def append(self, codes, day):
+        """追加一行：codes 为 {字段: 取值下标或 None}。"""
+        with self._lock:
+            row = self.rows
+            if row >= self._capacity:
+                self._grow(row + 1)
+            if row and day < self._days[row - 1]:
+                self._runs.append(row)
+            word, bit = divmod(row, 64)
+            for field, value in codes.items():
+                if value is not None and value >= 0:
+                    self._bitmaps[field][value, word] |= np.uint64(1) << np.uint64(bit)
+            self._days[row] = day
+            self.rows = row + 1
+
+    @property
+    def nbytes(self):
+        """位图与日期列占用的内存（字节）。"""
+        return sum(bitmaps.nbytes for bitmaps in self._bitmaps.values()) + self._days.nbytes
+
+    def select(self, selection):
+        """selection 为 {字段: [取值下标, ...]}（空列表表示该字段不筛选）。返回 (筛选位图, 行数)。"""
+        with self._lock:
+            rows = self.rows
+            bitmaps = {field: self._bitmaps[field] for field in selection}
+        words = _words(rows)
+        mask = np.full(words, np.uint64(0xFFFFFFFFFFFFFFFF), dtype='<u8')
+        if rows % 64:
+            # 最后一个字只保留已写入的行（并发追加的新行不计入本次结果）
+            mask[-1] = np.uint64((1 << (rows % 64)) - 1)
+        for field, values in selection.items():
+            if values:
+                mask &= np.bitwise_or.reduce(bitmaps[field][list(values), :words], axis=0)
+        return mask, rows
+
+    def counts(self, field, mask):
+        """筛选结果中该字段各取值的人数（数组，下标为取值）。"""
+        bitmaps = self._bitmaps[field]
+        return _popcount(bitmaps[:, :len(mask)] & mask).sum(axis=1, dtype=np.int64)
+
+    def day_counts(self, mask, rows):
+        """筛选结果的按日人数：(日期序号数组, 人数数组)，按日期升序，只含有人数的日期。"""
+        with self._lock:
+            days = self._days
+            runs = [start for start in self._runs if start < rows] + [rows]
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        # prefix[w] = 前 w 个字中选中的行数；补一个 0 字，行号 rows 恰为 64 的倍数时也能取到所在的字
+        mask = np.append(mask, np.uint64(0))
+        prefix = np.zeros(len(mask) + 1, dtype=np.int64)
+        np.cumsum(_popcount(mask), out=prefix[1:])
+
+        def selected_before(row):
+            # 行号 < row 的选中行数（row 为数组）
+            word, bit = np.divmod(row, 64)
+            low = (np.uint64(1) << bit.astype(np.uint64)) - np.uint64(1)
+            return prefix[word] + _popcount(mask[word] & low)
+
+        spans = [(start, end, int(days[start]), int(days[end - 1])) for start, end in zip(runs, runs[1:])]
+        first = min(lo for _, _, lo, _ in spans)
+        counts = np.zeros(max(hi for _, _, _, hi in spans) - first + 1, dtype=np.int64)
+        for start, end, lo, hi in spans:
+            # 本段各天的首行：对 [本段首日, 本段末日 + 1] 逐日二分查找
+            bounds = start + np.searchsorted(days[start:end], np.arange(lo, hi + 2))
+            counts[lo - first:hi - first + 1] += np.diff(selected_before(bounds))
+        ordinals = np.flatnonzero(counts)
+        return ordinals + first, counts[ordinals]
@@ -0,0 +1,287 @@
+"""参与者数据的紧凑列式表示与合成队列生成。
+
+分类字段存为 int8 编码的 pandas Categorical（类别为选项列表的下标，与界面语言无关），
+多选题存为位掩码整数（第 i 位对应第 i 个选项），年龄等数值为无符号小整数，完成时间为 datetime64[s]。
+界面语言的选项文字只在渲染时套用。
+"""
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from .bitmaps import age_band
+from .store import FLAT_COLUMNS
+from .texts import ADDITIONAL_SYMPTOMS, CURRENT_TREATMENT_TYPES, MONTHLY_COSTS, RESEARCH_OPTIONS, TEXTS
+
+# 仪表盘统计用的分类列 -> TEXTS 中的选项列表
+CATEGORICAL_FIELDS = {
+    'region': 'regions',
+    'gender': 'genders',
+    'ethnicity': 'ethnicities',
+    'tumor_stage': 'tumor_stages',
+}
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# 合成队列中单选题的选项权重（相对值，顺序与英文选项列表一致），大致参照国内肝癌患者构成
+COHORT_CHOICES = {
+    'survey_method': ('survey_methods', [3, 2, 3, 1, 1, 0.2]),
+    'gender': ('genders', [75, 24, 0.3, 0.2, 0.4, 0.1]),
+    'education': ('education_levels', [15, 25, 20, 12, 18, 6, 2, 2]),
+    'occupation': ('occupations', [30, 45, 1, 8, 8, 5, 3]),
+    'income': ('income_levels', [30, 28, 20, 10, 4, 2, 6]),
+    'ethnicity': ('ethnicities', [91, 1, 1.5, 0.5, 0.8, 0.8, 4.4]),
+    'residence': ('residence_types', [50, 20, 27, 2, 1]),
+    'region': ('regions', [30, 18, 14, 14, 11, 5, 6, 1.5, 0.5]),
+    'tumor_stage': ('tumor_stages', [20, 22, 25, 18, 5, 10]),
+    'diagnosis_location': ('hospital_types', [55, 25, 12, 6, 1.5, 0.5]),
+    'hepatitis_b': ('yes_no_unknown', [65, 30, 5]),
+    'hepatitis_c': ('yes_no_unknown', [5, 88, 7]),
+    'current_treatment': ('yes_no_unknown', [60, 35, 5]),
+    'future_contact': (RESEARCH_OPTIONS['future_contact'], [60, 15, 25]),
+    'sample_collection': (RESEARCH_OPTIONS['sample_collection'], [45, 20, 35]),
+    'data_sharing': (RESEARCH_OPTIONS['data_sharing'], [50, 35, 15]),
+    'follow_up': (RESEARCH_OPTIONS['follow_up'], [55, 15, 30]),
+}
+# 只在前一题答“是”时出现的单选题：(前提字段, 选项, 权重)；未出现时编码为 -1（缺失）
+COHORT_CONDITIONAL_CHOICES = {
+    'hbv_treatment': ('hepatitis_b', 'yes_no_unknown', [70, 20, 10]),
+    'monthly_cost': ('current_treatment', MONTHLY_COSTS, [25, 35, 15, 8, 3, 14]),
+}
+# 多选题：(选项, 各选项被勾选的概率, 其余都未勾选时补上的选项下标或 None, 前提字段或 None)
+COHORT_MULTI_CHOICES = {
+    'accessibility_needs': ('accessibility_options', [.05, .05, .08, .03, .04, .02, 0], 6, None),
+    'communication_preference': ('communication_options', [.5, .3, .1, .2, .05, .4, .02], 5, None),
+    'other_liver_disease': ('liver_diseases', [.2, .3, .02, .08, 0, .03], 4, None),
+    'treatment_experience': ('treatments', [.35, .03, .4, .2, .25, .15, .1, .08, .2, .15, 0], 10, None),
+    'current_treatment_types': (CURRENT_TREATMENT_TYPES, [.45, .3, .15, .08, .25, .05], 0, 'current_treatment'),
+    'additional_symptoms': (ADDITIONAL_SYMPTOMS, [.3, .1, .2, .15, .1, .05], None, None),
+}
+SYMPTOM_FIELDS = ['fatigue', 'pain', 'nausea', 'appetite', 'sleep', 'mobility']
+# 各分期的症状严重度偏移（Stage I..IV, Unknown, Initial Diagnosis）
+STAGE_SEVERITY = np.array([0, 1, 2, 3.2, 1.5, 1], dtype=np.float32)
+RESOLUTION = 1 << 16  # 抽样概率的精度
+
+
+def _options(options):
+    return TEXTS['en'][options] if isinstance(options, str) else options
+
+
+def categorical(codes, options):
+    """options 为 TEXTS 中的选项列表名或选项列表本身；编码 -1 表示缺失。"""
+    return pd.Categorical.from_codes(
+        np.asarray(codes, dtype=np.int8), categories=pd.RangeIndex(len(_options(options)))
+    )
+
+
+def _mask_dtype(k):
+    return np.uint8 if k <= 8 else np.uint16
+
+
+def _pick(rng, n, weights):
+    # 按权重把 0..65535 划分给各选项，再用 uint16 随机数查表，比 rng.choice(p=...) 快一个数量级
+    bounds = np.rint(np.cumsum(weights, dtype=np.float64) / np.sum(weights) * RESOLUTION).astype(np.int64)
+    table = np.repeat(np.arange(len(weights), dtype=np.int8), np.diff(bounds, prepend=0))
+    return table[rng.integers(0, RESOLUTION, n, dtype=np.uint16)]
+
+
+def _bits(rng, n, probabilities, fallback):
+    dtype = _mask_dtype(len(probabilities))
+    mask = np.zeros(n, dtype=dtype)
+    for i, p in enumerate(probabilities):
+        if p:
+            selected = rng.integers(0, RESOLUTION, n, dtype=np.uint16) < round(p * RESOLUTION)
+            mask |= selected.view(np.uint8).astype(dtype, copy=False) << dtype(i)
+    if fallback is not None:
+        mask[mask == 0] = dtype(1) << dtype(fallback)
+    return mask
+
+
+def generate_cohort(n, seed=0, days=30, end=None):
+    """生成 n 名参与者的合成队列，覆盖问卷的人口统计、病史、症状与研究参与各字段。
+
+    全部按列向量化生成，同一 seed 得到相同的编码（完成时间相对 end，默认当前时间）；
+    千万行约需数秒、每行约 50 字节。完成时间均匀分布在 end 之前 days 天内。
+    返回的 DataFrame 由调用方缓存后在会话间共享，调用方只能读取、不能原地修改（共享的是同一个对象，没有副本）。
+    """
+    rng = np.random.default_rng(seed)
+    end = np.datetime64(end or datetime.now(), 's')
+    frame = {'id': np.arange(1, n + 1, dtype=np.int32)}
+
+    for field, (options, weights) in COHORT_CHOICES.items():
+        frame[field] = categorical(_pick(rng, n, weights), options)
+    for field, (condition, options, weights) in COHORT_CONDITIONAL_CHOICES.items():
+        codes = _pick(rng, n, weights)
+        codes[frame[condition].codes != 0] = -1
+        frame[field] = categorical(codes, options)
+    for field, (options, probabilities, fallback, condition) in COHORT_MULTI_CHOICES.items():
+        mask = _bits(rng, n, probabilities, fallback)
+        if condition is not None:
+            mask[frame[condition].codes != 0] = 0
+        frame[field] = mask
+
+    frame['age'] = rng.normal(58, 11, n).clip(18, 90).astype(np.uint8)
+    # 确诊距填写的天数（最长 20 年），乙肝病史年数与当前治疗月数在不适用时为 0
+    frame['diagnosis_days'] = rng.exponential(400, n).clip(0, 7300).astype(np.uint16)
+    frame['hbv_years'] = np.where(
+        frame['hepatitis_b'].codes == 0, rng.integers(1, 41, n, dtype=np.uint8), 0
+    ).astype(np.uint8)
+    frame['treatment_months'] = np.where(
+        frame['current_treatment'].codes == 0, rng.integers(1, 121, n, dtype=np.uint8), 0
+    ).astype(np.uint8)
+
+    # 症状评分：分期决定的个人严重度 + 各条目噪声，取整到 1–10
+    severity = STAGE_SEVERITY[frame['tumor_stage'].codes] + rng.standard_normal(n, dtype=np.float32)
+    for field in SYMPTOM_FIELDS:
+        score = 2.5 + 1.2 * severity + 1.5 * rng.standard_normal(n, dtype=np.float32)
+        frame[field] = np.rint(score).clip(1, 10).astype(np.int8)
+
+    frame['completion_date'] = end - rng.integers(0, days * 86400, n).astype('timedelta64[s]')
+    return pd.DataFrame(frame)
+
+
+def decode_mask(mask, options):
+    """位掩码 -> 选项下标列表。"""
+    return [i for i in range(len(_options(options))) if mask >> i & 1]
+
+
+def iter_records(frame, language='zh', chunk_size=50000):
+    """把合成队列逐行转换为入库记录（格式同 schema.Questionnaire.encode），用于压测与演示数据入库。"""
+    # completion_date 是本地时间，入库的 submitted_at 是 Unix 时间戳
+    utc_offset = int(datetime.now().astimezone().utcoffset().total_seconds())
+    for start in range(0, len(frame), chunk_size):
+        chunk = frame.iloc[start:start + chunk_size]
+        columns = {
+            field: (chunk[field].cat.codes if isinstance(chunk[field].dtype, pd.CategoricalDtype)
+                    else chunk[field]).tolist()
+            for field in chunk.columns
+        }
+        completed_at = chunk['completion_date'].to_numpy().astype(np.int64).tolist()
+        for i in range(len(chunk)):
+            row = {field: values[i] for field, values in columns.items()}
+            completed = date.fromordinal(completed_at[i] // 86400 + EPOCH_ORDINAL)
+            optional = {field: (row[field] if row[field] >= 0 else None) for field in COHORT_CONDITIONAL_CHOICES}
+            yield {
+                'questionnaire_id': f"S{row['id']:08d}",
+                'language': language,
+                'submitted_at': completed_at[i] - utc_offset,
+                'survey_date': completed.isoformat(),
+                'survey_method': row['survey_method'],
+                'demographics': {
+                    'gender': row['gender'],
+                    'birth_date': completed.replace(year=completed.year - row['age'], day=1).isoformat(),
+                    'education': row['education'], 'occupation': row['occupation'], 'income': row['income'],
+                    'ethnicity': row['ethnicity'], 'residence': row['residence'], 'region': row['region'],
+                    'accessibility_needs': decode_mask(row['accessibility_needs'], 'accessibility_options'),
+                    'communication_preference': decode_mask(row['communication_preference'], 'communication_options'),
+                },
+                'medical_history': {
+                    'diagnosis_date': date.fromordinal(completed.toordinal() - row['diagnosis_days']).isoformat(),
+                    'tumor_stage': row['tumor_stage'],
+                    'diagnosis_location': row['diagnosis_location'],
+                    'hepatitis_b': row['hepatitis_b'],
+                    'hbv_treatment': optional['hbv_treatment'],
+                    'hbv_years': row['hbv_years'] if row['hepatitis_b'] == 0 else None,
+                    'hepatitis_c': row['hepatitis_c'],
+                    'other_liver_disease': decode_mask(row['other_liver_disease'], 'liver_diseases'),
+                    'treatment_experience': decode_mask(row['treatment_experience'], 'treatments'),
+                    'current_treatment': row['current_treatment'],
+                    'current_treatment_types': decode_mask(row['current_treatment_types'], CURRENT_TREATMENT_TYPES),
+                    'treatment_months': row['treatment_months'] if row['current_treatment'] == 0 else None,
+                    'monthly_cost': optional['monthly_cost'],
+                },
+                'symptoms': {
+                    **{field: row[field] for field in SYMPTOM_FIELDS},
+                    'additional_symptoms': [ADDITIONAL_SYMPTOMS[i]
+                                            for i in decode_mask(row['additional_symptoms'], ADDITIONAL_SYMPTOMS)],
+                    'other_symptoms': '',
+                },
+                'research': {
+                    **{field: RESEARCH_OPTIONS[field][row[field]] for field in RESEARCH_OPTIONS},
+                    'suggestions': '',
+                },
+            }
+
+
+def _labels(codes, options):
+    # 编码 -> 英文选项文字，-1（缺失）-> 空字符串
+    return np.array([*_options(options), ''], dtype=object)[np.asarray(codes, dtype=np.int64)]
+
+
+def _joined(mask, options):
+    labels = _options(options)
+    table = {m: '; '.join(labels[i] for i in decode_mask(m, labels)) for m in np.unique(mask).tolist()}
+    return pd.Series(mask).map(table).to_numpy()
+
+
+def flat_frame(frame, language='zh'):
+    """合成队列 -> 与导出文件同列的扁平表（英文选项文字，多选以“; ”连接，不适用的题目为空），
+    全部按列向量化，用于生成批量导入的样例与压测文件。
+    """
+    completed = frame['completion_date'].to_numpy()
+    day = completed.astype('datetime64[D]')
+    # 出生日期取填写当月的 1 号往前推 age 年（与 iter_records 一致）
+    birth = completed.astype('datetime64[M]') - (frame['age'].to_numpy().astype(np.int64) * 12).astype('timedelta64[M]')
+    flat = {
+        'questionnaire_id': np.char.add('S', np.char.zfill(frame['id'].to_numpy().astype(str), 8)).astype(object),
+        'language': language,
+        'submitted_at': np.datetime_as_string(completed, unit='s').astype(object),
+        'survey_date': np.datetime_as_string(day).astype(object),
+        'birth_date': np.datetime_as_string(birth.astype('datetime64[D]')).astype(object),
+        'diagnosis_date': np.datetime_as_string(
+            day - frame['diagnosis_days'].to_numpy().astype('timedelta64[D]')).astype(object),
+        'other_symptoms': '',
+        'suggestions': '',
+    }
+    for field, (options, _) in COHORT_CHOICES.items():
+        flat[field] = _labels(frame[field].cat.codes, options)
+    for field, (_, options, _) in COHORT_CONDITIONAL_CHOICES.items():
+        flat[field] = _labels(frame[field].cat.codes, options)
+    for field, (options, *_) in COHORT_MULTI_CHOICES.items():
+        flat[field] = _joined(frame[field].to_numpy(), options)
+    for field, condition in (('hbv_years', 'hepatitis_b'), ('treatment_months', 'current_treatment')):
+        flat[field] = np.where(frame[condition].cat.codes == 0, frame[field].to_numpy(), -1)
+    for field in SYMPTOM_FIELDS:
+        flat[field] = frame[field].to_numpy()
+    flat = pd.DataFrame(flat)
+    for field in ('hbv_years', 'treatment_months'):
+        flat[field] = flat[field].where(flat[field] >= 0).astype('Int64')
+    return flat[[column for column in FLAT_COLUMNS if column != 'id']]
+
+
+def answered_count(frame):
+    """合成队列中已作答的题目总数（口径同 schema.Questionnaire.answered）。"""
+    # 编号、调查日期、出生日期、诊断日期和全部单选题、评分题每行都有答案；两道文字题在合成队列中为空
+    total = len(frame) * (4 + len(COHORT_CHOICES) + len(SYMPTOM_FIELDS))
+    for field in COHORT_CONDITIONAL_CHOICES:
+        total += int(np.count_nonzero(frame[field].cat.codes.to_numpy() >= 0))
+    for field in COHORT_MULTI_CHOICES:
+        total += int(np.count_nonzero(frame[field].to_numpy()))
+    for condition in ('hepatitis_b', 'current_treatment'):
+        # hbv_years / treatment_months 只在前提题答“是”时出现
+        total += int(np.count_nonzero(frame[condition].cat.codes.to_numpy() == 0))
+    return total
+
+
+def frame_counts(frame):
+    """按整数编码向量化分组计数，返回 (各字段 {下标: 数量}, {日期序号: 数量}, 数据点数)，供仪表盘计数器初始化。"""
+    field_counts = {}
+    for field in CATEGORICAL_FIELDS:
+        counts = np.bincount(frame[field].cat.codes.to_numpy(), minlength=len(frame[field].cat.categories))
+        field_counts[field] = {code: int(n) for code, n in enumerate(counts) if n}
+    days = frame['completion_date'].to_numpy().astype('datetime64[D]').astype(np.int64) + EPOCH_ORDINAL
+    day_values, day_counts = np.unique(days, return_counts=True)
+    return field_counts, dict(zip(day_values.tolist(), day_counts.tolist())), answered_count(frame)
+
+
+def index_columns(frame, fields):
+    """交叉筛选位图索引的各列（{字段: 取值下标数组}，age_band 由 age 推算）与完成日期序号，供 BitmapIndex.extend。"""
+    columns = {field: frame[field].cat.codes.to_numpy() for field in fields if field != 'age_band'}
+    columns['age_band'] = age_band(frame['age'].to_numpy().astype(np.int64))
+    days = frame['completion_date'].to_numpy().astype('datetime64[D]').astype(np.int64) + EPOCH_ORDINAL
+    return columns, days.astype(np.int32)
+
+
+def symptom_columns(frame):
+    """症状直方图的各列（分期、治疗状态的选项下标与 (行数, 6) 的评分数组），供 SymptomHistograms.add_columns。"""
+    return (frame['tumor_stage'].cat.codes.to_numpy(), frame['current_treatment'].cat.codes.to_numpy(),
+            frame[SYMPTOM_FIELDS].to_numpy())
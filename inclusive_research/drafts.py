@@ -0,0 +1,159 @@
+"""问卷草稿：每完成一步就按问卷编号保存该步的数据，断线或刷新页面后可凭编号继续填写。
+
+保存只更新内存中的待写表并立即返回；后台线程每隔 flush_interval 秒把积压的草稿合并到一个事务写盘，
+连续快速点击“下一步”只会产生一次写入。草稿库与问卷库分开，不与正式提交争用写锁。
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .store import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    questionnaire_id TEXT PRIMARY KEY,
+    language TEXT NOT NULL,
+    current_step INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS draft_sections (
+    questionnaire_id TEXT NOT NULL REFERENCES drafts(questionnaire_id) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (questionnaire_id, section)
+) WITHOUT ROWID;
+"""
+
+
+class DraftStore:
+    def __init__(self, path, flush_interval=1.0, max_age_days=30):
+        self.path = path
+        self.flush_interval = flush_interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = connect(path)
+        # 草稿丢失的代价只是重填一步，不需要每次 fsync
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute("DELETE FROM drafts WHERE updated_at < ?", (int(time.time()) - max_age_days * 86400,))
+        self._lock = threading.Lock()
+        self._pending = {}  # 问卷编号 -> {'language', 'current_step', 'sections': {步骤: 数据}} 或 None（待删除）
+        self._flushing = {}  # 正在写盘的一批，写完前 load() 仍从这里读
+        self._wake = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._run, name="draft-flusher", daemon=True)
+        self._flusher.start()
+
+    def save(self, questionnaire_id, language, current_step, sections):
+        """记录一次检查点：sections 只需包含本步新增或修改的部分，与已有草稿合并。"""
+        with self._lock:
+            draft = self._pending.get(questionnaire_id)
+            if draft is None:
+                # 刚提交过（待删除）的编号重新开始填写时，写盘前先清掉旧草稿
+                draft = self._pending[questionnaire_id] = {'sections': {}, 'replace': questionnaire_id in self._pending}
+            draft['language'] = language
+            draft['current_step'] = current_step
+            draft['sections'].update(sections)
+
+    def discard(self, questionnaire_id):
+        """问卷正式提交后删除草稿。"""
+        with self._lock:
+            self._pending[questionnaire_id] = None
+
+    def load(self, questionnaire_id):
+        """返回 (语言, 当前步骤, form_data)；没有草稿时返回 None。尚未写盘的检查点也会合并进来。"""
+        with self._lock:
+            overlays = [layer[questionnaire_id] for layer in (self._flushing, self._pending) if questionnaire_id in layer]
+        # 最近一次删除或整体替换之前的内容都已作废
+        cut = max((i for i, overlay in enumerate(overlays) if overlay is None or overlay['replace']), default=None)
+        if cut is None:
+            draft = self._read(questionnaire_id)
+        else:
+            draft = None
+            overlays = overlays[cut + (overlays[cut] is None):]
+        for overlay in overlays:
+            draft = _merge(draft, overlay)
+        if draft is None:
+            return None
+        form_data = {**draft['sections'], 'questionnaire_id': questionnaire_id}
+        return draft['language'], draft['current_step'], form_data
+
+    def _read(self, questionnaire_id):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            row = conn.execute(
+                "SELECT language, current_step FROM drafts WHERE questionnaire_id = ?", (questionnaire_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            sections = conn.execute(
+                "SELECT section, data FROM draft_sections WHERE questionnaire_id = ?", (questionnaire_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {'language': row[0], 'current_step': row[1], 'replace': False,
+                'sections': {section: json.loads(data) for section, data in sections}}
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._flushing, self._pending = self._pending, {}
+            pending = self._flushing
+        if not pending:
+            return
+        now = int(time.time())
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for questionnaire_id, draft in pending.items():
+                if draft is None or draft['replace']:
+                    self._conn.execute("DELETE FROM drafts WHERE questionnaire_id = ?", (questionnaire_id,))
+                if draft is None:
+                    continue
+                self._conn.execute(
+                    "INSERT INTO drafts VALUES (?, ?, ?, ?) ON CONFLICT (questionnaire_id) DO UPDATE SET "
+                    "language = excluded.language, current_step = excluded.current_step, "
+                    "updated_at = excluded.updated_at",
+                    (questionnaire_id, draft['language'], draft['current_step'], now)
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO draft_sections VALUES (?, ?, ?)",
+                    [(questionnaire_id, section, json.dumps(data, ensure_ascii=False))
+                     for section, data in draft['sections'].items()]
+                )
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            # BEGIN 本身失败（如等锁超时）时没有事务可回滚
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            # 写盘失败时放回待写表（保留期间新到的检查点），下个周期重试
+            with self._lock:
+                for questionnaire_id, draft in pending.items():
+                    if questionnaire_id in self._pending:
+                        if draft is not None and self._pending[questionnaire_id] is not None:
+                            self._pending[questionnaire_id] = _merge(draft, self._pending[questionnaire_id])
+                    else:
+                        self._pending[questionnaire_id] = draft
+        finally:
+            with self._lock:
+                self._flushing = {}
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._wake.set()
+            self._flusher.join()
+            self.flush()
+            self._conn.close()
+
+
+def _merge(draft, overlay):
+    """把较新的检查点 overlay 合并到 draft 上（draft 可为 None）。"""
+    if draft is None:
+        return {**overlay, 'sections': dict(overlay['sections'])}
+    return {**draft, **overlay, 'replace': draft['replace'] or overlay['replace'],
+            'sections': {**draft['sections'], **overlay['sections']}}
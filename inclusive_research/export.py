@@ -0,0 +1,159 @@
+"""流式导出：从存储按块读取问卷行，逐块写出 CSV / JSON Lines / Excel，内存占用与总行数无关。
+
+Parquet 从列式归档（见 archive.py）按 RecordBatch 写出，需要 pyarrow。
+"""
+import csv
+import io
+import json
+import os
+import secrets
+import time
+from datetime import datetime
+from functools import lru_cache
+
+from . import archive
+from .schema import QUESTIONNAIRE
+from .store import FLAT_COLUMNS
+from .texts import TEXTS
+
+# 界面中的导出格式 -> (扩展名, MIME 类型)
+FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'JSON': ('jsonl', 'application/x-ndjson'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+LIST_SEPARATOR = '; '
+XLSX_MAX_ROWS = 1048576
+
+
+def _decoders(flatten):
+    """列下标 -> 解码函数。导出统一使用英文选项文字；入库的选项下标在这里还原。
+
+    多选列在库中是 JSON 字符串，取值组合有限，按原始字符串缓存解码结果；
+    flatten=True 时多选列直接解码为以分号连接的字符串（CSV / Excel 用）。
+    """
+    texts = TEXTS['en']
+
+    def single(options):
+        return lambda code: None if code is None else options[code]
+
+    def multi(options=None):
+        @lru_cache(maxsize=4096)
+        def decode(value):
+            if value is None:
+                return None
+            labels = [options[code] for code in json.loads(value)] if options else json.loads(value)
+            return LIST_SEPARATOR.join(labels) if flatten else labels
+        return decode
+
+    # 选项按问卷结构解码：单选题存下标，多选题存下标（或 codes=False 时存文字）的 JSON 数组
+    decoders = {}
+    for i, column in enumerate(FLAT_COLUMNS):
+        field = QUESTIONNAIRE.fields.get(column)
+        if field is None or field.options is None:
+            continue
+        options = field.option_list(texts) if field.codes else None
+        if field.multi:
+            decoders[i] = multi(options)
+        elif options is not None:
+            decoders[i] = single(options)
+    decoders[FLAT_COLUMNS.index('submitted_at')] = lambda ts: datetime.fromtimestamp(ts).isoformat(timespec='seconds')
+    return list(decoders.items())
+
+
+def iter_records(store, chunk_size=5000, flatten=False):
+    """逐块产出解码后的行（列表），列顺序见 FLAT_COLUMNS。"""
+    decoders = _decoders(flatten)
+    for chunk in store.iter_rows(chunk_size):
+        rows = []
+        for row in chunk:
+            row = list(row)
+            for i, decode in decoders:
+                row[i] = decode(row[i])
+            rows.append(row)
+        yield rows
+
+
+def csv_chunks(store, chunk_size=5000):
+    """CSV 生成器，每次产出一块 UTF-8 字节（首块带 BOM，方便 Excel 识别中文）。"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FLAT_COLUMNS)
+    yield buffer.getvalue().encode('utf-8-sig')
+    for rows in iter_records(store, chunk_size, flatten=True):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def jsonl_chunks(store, chunk_size=5000):
+    """JSON Lines 生成器：每行一个问卷对象。"""
+    for rows in iter_records(store, chunk_size):
+        yield ''.join(
+            json.dumps(dict(zip(FLAT_COLUMNS, row)), ensure_ascii=False) + '\n' for row in rows
+        ).encode('utf-8')
+
+
+def write_xlsx(store, path, chunk_size=5000):
+    # XlsxWriter 的 constant_memory 模式逐行刷新到磁盘，不在内存中保留整张表
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    sheet, row_number = None, XLSX_MAX_ROWS
+    for rows in iter_records(store, chunk_size, flatten=True):
+        for row in rows:
+            # 单张工作表行数有上限，超出后续写到新的工作表
+            if row_number == XLSX_MAX_ROWS:
+                sheet = workbook.add_worksheet(f"submissions{len(workbook.worksheets()) + 1}")
+                sheet.write_row(0, 0, FLAT_COLUMNS)
+                row_number = 1
+            sheet.write_row(row_number, 0, row)
+            row_number += 1
+    if sheet is None:
+        workbook.add_worksheet("submissions1").write_row(0, 0, FLAT_COLUMNS)
+    workbook.close()
+
+
+def write_parquet(store, path, archive_dir):
+    # 先把新提交补进归档，再从归档（内存映射）逐个 RecordBatch 写出：各列已是分析用的类型，不经过逐行解码
+    import pyarrow.parquet as pq
+
+    archive.compact(store, archive_dir)
+    schema = archive.to_table([]).select(FLAT_COLUMNS).schema
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in archive.iter_batches(archive_dir, FLAT_COLUMNS):
+            writer.write_batch(batch)
+
+
+def mime_type(path):
+    extension = os.path.splitext(path)[1].lstrip('.')
+    return next(mime for ext, mime in FORMATS.values() if ext == extension)
+
+
+def write_export(store, export_format, directory, keep=20, archive_dir=None):
+    """把全部问卷导出到 directory 下的新文件，返回文件路径。只保留最近 keep 个导出文件。
+
+    Parquet 格式需要 archive_dir（列式归档目录）。
+    """
+    extension, _ = FORMATS[export_format]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"submissions-{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(4)}.{extension}")
+    if export_format == 'Excel':
+        write_xlsx(store, path)
+    elif export_format == 'Parquet':
+        write_parquet(store, path, archive_dir)
+    else:
+        chunks = csv_chunks(store) if export_format == 'CSV' else jsonl_chunks(store)
+        with open(path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+
+    exports = sorted(
+        (os.path.join(directory, name) for name in os.listdir(directory) if name.startswith("submissions-")),
+        key=os.path.getmtime
+    )
+    for old in exports[:-keep]:
+        os.remove(old)
+    return path
@@ -0,0 +1,92 @@
+"""仪表盘图表：建图函数与按数据版本失效的进程级缓存。
+
+所有会话看到的是同一份计数，图只取决于 (图表, 数据版本, 语言等参数)。缓存按这个键保存建好的 Plotly Figure，
+数据版本不变时各会话直接复用（st.plotly_chart 每次只做一次约 2 毫秒的序列化，省掉建图和取数）；
+新提交使版本号增加后，下一个请求该图的会话重建一次并替换旧版本。同一张图同时被多个会话请求时只建一次，其余等待结果。
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import plotly.graph_objects as go
+
+
+class FigureCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (图表, 参数) -> (数据版本, Future)
+        self.builds = 0
+        self.hits = 0
+
+    def get(self, figure, version, params, build):
+        """返回该图在 version 时的 Figure，没有时调用 build() 建图；params 为语言等其他决定图内容的参数（可哈希）。"""
+        key = (figure, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            # 已缓存的版本不旧于请求的版本即可复用（读取版本号之后又有新提交时，缓存中的反而更新）
+            if entry is not None and entry[0] >= version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                future = entry[1]
+            else:
+                future = None
+                pending = Future()
+                self._entries[key] = (version, pending)
+                self._entries.move_to_end(key)
+                self.builds += 1
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        if future is not None:
+            # 在锁外等待：别的会话可能正在建这张图
+            return future.result()
+        try:
+            pending.set_result(build())
+        except BaseException as exc:
+            with self._lock:
+                if self._entries.get(key, (None, None))[1] is pending:
+                    del self._entries[key]
+            pending.set_exception(exc)
+            raise
+        return pending.result()
+
+
+# 建图都直接用 graph_objects：plotly.express 每次要把整套主题模板展开进 layout，一张图 30～60 毫秒，
+# graph_objects 约 2 毫秒（主题在序列化时套用，两者序列化的耗时相同），自动刷新时有新问卷的周期因此不必为重建图表付出大头
+
+def region_figure(region_counts, texts):
+    # region_counts 为 [(选项下标, 数量), ...]（DashboardAggregates.ranked 或 filtered 的结果）
+    fig = go.Figure(go.Pie(values=[n for _, n in region_counts],
+                           labels=[texts['regions'][code] for code, _ in region_counts]))
+    fig.update_layout(title="Regional Distribution of Participants")
+    return fig
+
+
+def stage_figure(stage_counts, texts):
+    fig = go.Figure(go.Bar(x=[texts['tumor_stages'][code] for code, _ in stage_counts],
+                           y=[n for _, n in stage_counts]))
+    fig.update_layout(title="Tumor Stage Distribution", xaxis={'title': 'Tumor Stage'}, yaxis={'title': 'Count'})
+    return fig
+
+
+def trend_figure(days, day_counts, granularity):
+    # 取数见 DashboardAggregates.trend / timeseries.day_series：按范围分桶，点数有上限，图表大小不随研究时长增长
+    fig = go.Figure(go.Scatter(x=days, y=day_counts, mode='lines'))
+    fig.update_layout(title=f"Participation Trend (per {granularity})",
+                      xaxis={'title': 'completion_date'}, yaxis={'title': 'count'})
+    return fig
+
+
+def symptom_figure(summary, symptom, labels, title):
+    # 由直方图得到的百分位直接画箱线图（箱为 P25–P75，须为 P10–P90），不需要原始评分
+    p10, p25, p50, p75, p90 = summary['percentiles'][:, :, symptom]
+    fig = go.Figure(go.Box(x=labels, q1=p25, median=p50, q3=p75, lowerfence=p10, upperfence=p90,
+                           mean=summary['mean'][:, symptom], boxmean=True))
+    fig.update_layout(title=title, yaxis={'range': [0.5, 10.5], 'title': 'Score (1-10)'})
+    return fig
+
+
+def funnel_figure(reached, labels):
+    fig = go.Figure(go.Funnel(y=labels, x=reached, textinfo="value+percent previous"))
+    fig.update_layout(title="Step Reach and Drop-off")
+    return fig
@@ -0,0 +1,97 @@
+"""预渲染的 HTML 片段，按 (语言, 步骤) 缓存，每个进程只格式化一次。
+
+片段都输出为紧凑的单行 HTML（无缩进、无空行），可以直接交给 st.markdown 渲染，
+不会被 Markdown 误当成代码块，也不需要额外的 iframe。
+"""
+from functools import lru_cache
+
+from .texts import TEXTS
+
+STEP_KEYS = ['basic_info', 'medical_history', 'symptoms', 'treatment', 'research', 'completion']
+
+
+def _compact(html):
+    return "".join(line.strip() for line in html.splitlines())
+
+
+@lru_cache(maxsize=None)
+def header_html(language):
+    """页眉、徽章容器与数据使用承诺横幅，合并为一个元素发送。"""
+    texts = TEXTS[language]
+    return _compact(f"""
+    <div class="inclusive-header">
+        <h1 style="font-size: 3rem; margin-bottom: 0.5rem; text-shadow: 2px 2px 4px rgba(0,0,0,0.3);">{texts['title']}</h1>
+        <h2 style="font-size: 1.5rem; font-weight: 300; margin-bottom: 1rem; opacity: 0.9;">{texts['subtitle']}</h2>
+    </div>
+    <div class="badge-container">
+        <div class="diversity-badge">🌍 {texts['global_participation']}</div>
+        <div class="diversity-badge">♿ {texts['accessibility_design']}</div>
+        <div class="diversity-badge">🌈 {texts['diversity_inclusion']}</div>
+        <div class="diversity-badge">🔒 {texts['data_protection']}</div>
+        <div class="diversity-badge">🎯 {texts['scientific_research']}</div>
+    </div>
+    <div class="promise-banner" style="text-align: center;">
+        <h3 style="margin: 0 0 1rem 0; display: inline-flex; align-items: center; gap: 0.5rem; justify-content: center;">
+            <span>🤝</span> {texts['data_promise_title']}
+        </h3>
+        <p style="margin: 0; font-size: 1rem; line-height: 1.6;">{texts['data_promise']}</p>
+    </div>
+    """)
+
+
+@lru_cache(maxsize=None)
+def progress_html(language, current_step):
+    texts = TEXTS[language]
+    steps = [texts[key] for key in STEP_KEYS]
+    progress_percent = (current_step / (len(steps) - 1)) * 100 if len(steps) > 1 else 0
+    labels = ''.join(
+        f'<span style="color: {"#1f77b4" if i <= current_step else "#999"}; '
+        f'font-weight: {"600" if i == current_step else "400"}; text-align: center; flex: 1;">{step}</span>'
+        for i, step in enumerate(steps)
+    )
+    return _compact(f"""
+    <div style="margin-bottom: 2rem;">
+        <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;">
+            <span style="color: #1f77b4; font-weight: 600; font-size: 1.1rem;">{texts['progress']}</span>
+            <span style="background: #1f77b4; color: white; padding: 0.3rem 1rem; border-radius: 20px; font-size: 0.9rem;">
+                {current_step + 1} / {len(steps)}
+            </span>
+        </div>
+        <div style="background: #e9ecef; height: 12px; border-radius: 8px; overflow: hidden; position: relative;">
+            <div style="background: linear-gradient(90deg, #1f77b4, #2ca02c, #ff7f0e);
+                        width: {progress_percent}%;
+                        height: 100%; transition: width 0.8s ease; border-radius: 8px;"></div>
+        </div>
+        <div style="display: flex; justify-content: space-between; margin-top: 1rem; font-size: 0.9rem;">
+            {labels}
+        </div>
+    </div>
+    """)
+
+
+@lru_cache(maxsize=None)
+def card_html(title, subtitle):
+    return _compact(f"""
+    <div class="inclusive-card">
+        <h2 style="color: #1f77b4; margin-bottom: 1.5rem;">{title}</h2>
+        <p style="color: #666; margin-bottom: 2rem;">{subtitle}</p>
+    </div>
+    """)
+
+
+@lru_cache(maxsize=None)
+def footer_html(language):
+    texts = TEXTS[language]
+    return _compact(f"""
+    <div style="width: 100%; display: flex; justify-content: center;">
+        <div style="max-width: 800px; text-align: center; color: #666; padding: 2rem;">
+            <h4 style="color: #1f77b4; margin-bottom: 1rem;">{texts['team']}</h4>
+            <p style="margin: 0 auto 1.5rem auto; max-width: 600px;"><strong>Inclusive Research Commitment:</strong> We are committed to enabling everyone to participate in scientific research, regardless of age, gender, ethnicity, ability, or background.</p>
+            <div style="display: inline-block;">
+                <div style="background: linear-gradient(135deg, #ff6b6b, #ee5a24); padding: 0.5rem 1rem; margin: 0.3rem; border-radius: 8px; display: inline-block;">🔬 Scientific Research</div>
+                <div style="background: linear-gradient(135deg, #4ecdc4, #00b894); padding: 0.5rem 1rem; margin: 0.3rem; border-radius: 8px; display: inline-block;">🤝 Ethical Compliance</div>
+                <div style="background: linear-gradient(135deg, #45b7d1, #0984e3); padding: 0.5rem 1rem; margin: 0.3rem; border-radius: 8px; display: inline-block;">🌍 Global Collaboration</div>
+            </div>
+        </div>
+    </div>
+    """)
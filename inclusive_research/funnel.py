@@ -0,0 +1,126 @@
+"""问卷漏斗的事件日志：进入 / 离开步骤、切换语言、提交，带时间戳和匿名会话键。
+
+记录时只在内存环形缓冲区追加一条并更新预聚合的计数，立即返回（约 1 微秒），不碰磁盘；
+后台线程每隔 flush_interval 秒把缓冲区中的事件和计数增量合并到一个事务写盘。
+缓冲区满（写盘长时间失败）时丢弃最旧的事件，计数不受影响。
+计数按“到达过该阶段的填写次数”累计，多个服务进程对同一个库做加法更新；漏斗图和完成率只读计数。
+每次写盘后检查库的 data_version：其他进程写入过计数时才重读计数表（几行），各进程的漏斗图最多滞后一个写盘周期。
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+
+from .store import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    ts_ms INTEGER NOT NULL,
+    session TEXT NOT NULL,
+    event TEXT NOT NULL,
+    step INTEGER,
+    detail TEXT
+);
+CREATE TABLE IF NOT EXISTS stage_counts (
+    stage INTEGER PRIMARY KEY,
+    reached INTEGER NOT NULL
+);
+"""
+
+
+class FunnelJournal:
+    def __init__(self, path, capacity=65536, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        # 首次运行时 data/ 可能还不存在（页面第一次渲染就会记录事件，早于问卷库的创建）
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = connect(path)
+        # 丢失最后一秒的事件只影响统计，不需要每次 fsync
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._ring = deque(maxlen=capacity)
+        self._reached = Counter(dict(self._conn.execute("SELECT stage, reached FROM stage_counts")))
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._unsaved = Counter()  # 尚未写盘的计数增量
+        self.version = 0  # 计数每变化一次加一，漏斗图缓存据此失效
+        self.dropped = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._run, name="funnel-flusher", daemon=True)
+        self._flusher.start()
+
+    def record(self, session, event, step=None, detail=None, reached=None):
+        """追加一条事件；reached 为阶段序号时，同时把该阶段的到达次数加一。"""
+        with self._lock:
+            if len(self._ring) == self._ring.maxlen:
+                self.dropped += 1
+            self._ring.append((time.time_ns() // 1_000_000, session, event, step, detail))
+            if reached is not None:
+                self._reached[reached] += 1
+                self._unsaved[reached] += 1
+                self.version += 1
+
+    def reached(self, stages):
+        """[各阶段的到达次数]，stages 为阶段数。"""
+        with self._lock:
+            return [self._reached[stage] for stage in range(stages)]
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            # 整个缓冲区换出，锁内不复制事件
+            events, self._ring = self._ring, deque(maxlen=self._ring.maxlen)
+            unsaved, self._unsaved = self._unsaved, Counter()
+        if events or unsaved:
+            if not self._write(events, unsaved):
+                return
+        self._sync()
+
+    def _write(self, events, unsaved):
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?)", events)
+            self._conn.executemany(
+                "INSERT INTO stage_counts VALUES (?, ?) ON CONFLICT (stage) DO UPDATE SET "
+                "reached = reached + excluded.reached", unsaved.items()
+            )
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            # BEGIN 本身失败（如等锁超时）时没有事务可回滚
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            # 写盘失败时放回缓冲区（排在期间新到的事件之前，超出容量的最旧事件被丢弃），下个周期重试
+            with self._lock:
+                pending, self._ring = self._ring, events
+                self.dropped += max(0, len(events) + len(pending) - events.maxlen)
+                events.extend(pending)
+                self._unsaved.update(unsaved)
+            return False
+        return True
+
+    def _sync(self):
+        # 本连接自己的提交不改变 data_version；变化说明其他进程写入过，到达次数 = 库中计数 + 本进程尚未写盘的增量
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        stored = Counter(dict(self._conn.execute("SELECT stage, reached FROM stage_counts")))
+        with self._lock:
+            reached = stored + self._unsaved
+            if reached != self._reached:
+                self._reached = reached
+                self.version += 1
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._wake.set()
+            self._flusher.join()
+            self.flush()
+            self._conn.close()
@@ -0,0 +1,113 @@
+"""问卷编号查重：存储中的唯一索引 + 每个进程一个布隆过滤器。
+
+过滤器启动时从存储一次性加载全部编号，之后每次查询前只读取 id 大于水位线的新行（其他进程写入的也包括在内），
+所以“过滤器中没有”即可确定编号未被使用；“可能存在”时再用唯一索引精确确认。
+库没有变化时（PRAGMA data_version 不变）连追读也省掉，一次查重只是一条 PRAGMA 加几次位运算。
+查询耗时与库中问卷总数无关。最终仍以唯一索引为准：两个会话同时提交同一编号时，后写入的一方会失败。
+"""
+import math
+import sqlite3
+import threading
+
+import numpy as np
+
+_MASK32 = 0xFFFFFFFF
+
+
+class BloomFilter:
+    """按 Python 内置 hash() 做双重哈希的布隆过滤器。hash() 只在本进程内稳定，过滤器不能持久化或跨进程共享。"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        h = hash(key)
+        h1, h2 = h & _MASK32, (h >> 32 & _MASK32) | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        array = self._array
+        for position in self._positions(key):
+            array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, keys):
+        """批量加入（启动时加载用），位运算全部向量化。"""
+        h = np.array([hash(key) for key in keys], dtype=np.int64).view(np.uint64)
+        if not len(h):
+            return
+        h1, h2 = h & np.uint64(_MASK32), (h >> np.uint64(32)) | np.uint64(1)
+        bits = np.uint64(self.bits)
+        array = np.frombuffer(self._array, dtype=np.uint8)
+        for i in range(self.hashes):
+            positions = (h1 + np.uint64(i) * h2) % bits
+            np.bitwise_or.at(array, positions >> np.uint64(3),
+                             np.left_shift(1, (positions & np.uint64(7)).astype(np.uint8)).astype(np.uint8))
+        self.count += len(h)
+
+    def __contains__(self, key):
+        # 逐位检查并尽早返回：未出现过的编号通常第一位就能否定
+        h = hash(key)
+        h1, h2 = h & _MASK32, (h >> 32 & _MASK32) | 1
+        array, bits = self._array, self.bits
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % bits
+            if not array[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    @property
+    def size_bytes(self):
+        return len(self._array)
+
+
+class QuestionnaireIds:
+    """已提交问卷编号的存在性检查（每个服务进程一个实例，线程安全）。"""
+
+    def __init__(self, store, error_rate=0.01, min_capacity=100_000, chunk_size=100_000):
+        self.store = store
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        # 专用连接：data_version 只在“其他连接”提交后变化，必须始终用同一个连接读取
+        self._conn = sqlite3.connect(store.path, timeout=30, check_same_thread=False)
+        self._version = None
+        self._rebuild()
+
+    def _rebuild(self):
+        # 容量留一倍余量；加载超过容量时按新的规模重建，误判率保持在 error_rate 附近
+        self._filter = BloomFilter(max(self.min_capacity, 2 * self.store.count()), self.error_rate)
+        self.watermark = 0
+        # 新过滤器是空的，必须从头追读，不能因 data_version 未变而跳过
+        self._version = None
+        self._catch_up()
+
+    def _catch_up(self):
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._version:
+            return
+        self._version = version
+        while True:
+            rows = self._conn.execute(
+                "SELECT id, questionnaire_id FROM submissions WHERE id > ? ORDER BY id LIMIT ?",
+                (self.watermark, self.chunk_size)
+            ).fetchall()
+            if not rows:
+                return
+            self._filter.update([questionnaire_id for _, questionnaire_id in rows])
+            self.watermark = rows[-1][0]
+
+    def exists(self, questionnaire_id):
+        with self._lock:
+            self._catch_up()
+            if self._filter.count > self._filter.capacity:
+                self._rebuild()
+            if questionnaire_id not in self._filter:
+                return False
+        # 过滤器“可能存在”（含约 error_rate 的误判）时用唯一索引确认
+        return self.store.has_questionnaire_id(questionnaire_id)
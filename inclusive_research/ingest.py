@@ -0,0 +1,155 @@
+"""批量导入纸质 / 电话问卷：按块流式读取 CSV 或 JSON Lines，向量化校验，按问卷编号去重，每块一个事务批量写入。
+
+输入的列与导出文件相同（见 store.FLAT_COLUMNS，多余的列忽略）：选项可以是任一语言的文字或选项下标，
+多选以分号分隔（JSON Lines 中也可以是数组）。language / submitted_at 列可省略，缺省为参数给定的语言和导入时间。
+内存中只保留当前一块；被拒的行（校验失败、文件内或库中已有相同编号）连同原因写到拒收文件（CSV），修改后可重新导入。
+
+用法：python -m inclusive_research.ingest responses.csv [--db data/submissions.db] [--rejects rejects.csv]
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from .schema import MULTI_SEPARATOR, QUESTIONNAIRE
+from .store import SECTION_COLUMNS, SubmissionStore, connect, insert_columns
+
+JSON_EXTENSIONS = ('.jsonl', '.ndjson', '.json')
+LANGUAGES = ('zh', 'en')
+MULTI_FIELDS = [name for name, field in QUESTIONNAIRE.fields.items() if field.multi]
+# 校验后直接入库的列（language / submitted_at 另行处理）
+RECORD_FIELDS = ['questionnaire_id', 'survey_date', 'survey_method',
+                 *(field for fields in SECTION_COLUMNS.values() for field in fields)]
+
+
+def read_chunks(path, chunk_size=20000):
+    """按块产出 DataFrame（索引为文件中的行序号，从 0 起）。"""
+    if path.lower().endswith(JSON_EXTENSIONS):
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False, convert_dates=False)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    with reader:
+        for chunk in reader:
+            for field in MULTI_FIELDS:
+                # JSON Lines 中的多选是数组（导出即如此），统一为分号分隔的文字
+                if field in chunk.columns and chunk[field].dtype == object:
+                    chunk[field] = chunk[field].map(
+                        lambda v: MULTI_SEPARATOR.join(map(str, v)) if isinstance(v, list) else v)
+            yield chunk
+
+
+def _values(series):
+    """Series -> 可直接绑定到 SQL 参数的 Python 值列表（缺失为 None）。"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _metadata(chunk, language, now):
+    # 语言与提交时间不属于问卷内容，不合法或缺失时用缺省值，不拒收
+    languages = chunk['language'] if 'language' in chunk.columns else pd.Series(language, index=chunk.index)
+    languages = languages.where(languages.isin(LANGUAGES), language)
+    submitted_at = pd.Series(now, index=chunk.index, dtype='int64')
+    if 'submitted_at' in chunk.columns:
+        # 导出文件中的提交时间是本地时间
+        local = pd.to_datetime(chunk['submitted_at'].astype('string'), format='ISO8601', errors='coerce')
+        if local.dt.tz is None:
+            local = local.dt.tz_localize(datetime.now().astimezone().tzinfo, nonexistent='shift_forward',
+                                         ambiguous='NaT')
+        seconds = (local - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+        submitted_at = seconds.astype('Int64').fillna(now).astype('int64')
+    return languages, submitted_at
+
+
+def ingest(store, path, reject_path=None, chunk_size=20000, language='zh', on_progress=None):
+    """把 path 中的问卷导入 store，返回统计字典；on_progress(统计字典) 在每块写入后调用。
+
+    每块：validate_frame 校验 -> 块内重复编号只保留第一次出现 -> 一次索引查询找出库中已有的编号（包括本文件前面各块）
+    -> 各表 executemany 写入，整块在一个写事务中完成。
+    """
+    report = {'rows': 0, 'inserted': 0, 'rejected': 0, 'duplicates': 0, 'seconds': 0.0, 'rows_per_s': 0.0,
+              'first_id': None, 'last_id': None, 'reject_path': None}
+    start = time.perf_counter()
+    now = int(time.time())
+    conn = connect(store.path)
+    try:
+        for chunk in read_chunks(path, chunk_size):
+            encoded, errors = QUESTIONNAIRE.validate_frame(chunk)
+            ok = (errors == '').to_numpy()
+            ids = encoded['questionnaire_id']
+            duplicate = ok & ids.where(ok).duplicated(keep='first').to_numpy()
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                candidates = ids[ok & ~duplicate].tolist()
+                existing = {row[0] for row in conn.execute(
+                    "SELECT questionnaire_id FROM submissions WHERE questionnaire_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(candidates, ensure_ascii=False),)
+                )}
+                if existing:
+                    duplicate |= ok & ids.isin(existing).to_numpy()
+                accepted = ok & ~duplicate
+                if accepted.any():
+                    rows = encoded[accepted]
+                    languages, submitted_at = _metadata(chunk[accepted], language, now)
+                    columns = {field: _values(rows[field]) for field in RECORD_FIELDS}
+                    columns['language'] = languages.tolist()
+                    columns['submitted_at'] = submitted_at.tolist()
+                    first_id = insert_columns(conn, columns)
+                    report['first_id'] = report['first_id'] or first_id
+                    report['last_id'] = first_id + int(accepted.sum()) - 1
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+            rejected = ~accepted
+            if rejected.any():
+                reasons = errors.where(~duplicate, 'questionnaire_id: duplicate')[rejected]
+                out = chunk[rejected].assign(row=chunk.index[rejected] + 1, reject_reason=reasons)
+                if reject_path is None:
+                    reject_path = os.path.splitext(path)[0] + '.rejects.csv'
+                out.to_csv(reject_path, mode='a' if report['reject_path'] else 'w',
+                           header=not report['reject_path'], index=False, encoding='utf-8')
+                report['reject_path'] = reject_path
+
+            report['rows'] += len(chunk)
+            report['inserted'] += int(accepted.sum())
+            report['rejected'] += int(rejected.sum())
+            report['duplicates'] += int(duplicate.sum())
+            report['seconds'] = time.perf_counter() - start
+            report['rows_per_s'] = report['rows'] / report['seconds']
+            if on_progress is not None:
+                on_progress(dict(report))
+    finally:
+        conn.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV 或 JSON Lines 文件")
+    parser.add_argument("--db", default=os.environ.get(
+        "IGEM_DB_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data",
+                                     "submissions.db")))
+    parser.add_argument("--rejects", help="拒收文件路径（默认与输入文件同目录的 <name>.rejects.csv）")
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument("--language", choices=LANGUAGES, default='zh', help="文件中没有 language 列时使用")
+    args = parser.parse_args()
+
+    store = SubmissionStore(args.db)
+    try:
+        report = ingest(store, args.path, args.rejects, args.chunk_size, args.language, on_progress=lambda r: print(
+            f"{r['rows']:>10} rows  {r['inserted']:>10} inserted  {r['rejected']:>8} rejected  "
+            f"{r['rows_per_s']:>8.0f} rows/s", flush=True))
+    finally:
+        store.close()
+    print(f"done: {report['inserted']} inserted, {report['rejected']} rejected "
+          f"({report['duplicates']} duplicate IDs) in {report['seconds']:.1f}s, {report['rows_per_s']:.0f} rows/s")
+    if report['reject_path']:
+        print(f"rejects: {report['reject_path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""问卷结构的声明式定义：每一步的题目、题型、必填标记、显示条件与版面。
+
+模块导入时编译一次（每个服务进程一次）：展开版面得到各步的题目列表，检查显示条件，
+为每道选择题建好“选项文字（任一语言）或下标 -> 下标”的查找表。页面表单按版面生成，
+逐份校验（validate）、入库编码（encode）和批量导入的向量化校验（validate_frame）都用同一份编译结果。
+"""
+import json
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from .texts import ADDITIONAL_SYMPTOMS, CURRENT_TREATMENT_TYPES, MONTHLY_COSTS, RESEARCH_OPTIONS, TEXTS
+
+KINDS = ('text', 'textarea', 'date', 'number', 'slider', 'select', 'radio', 'multiselect')
+MULTI_SEPARATOR = ';'
+
+
+class Field:
+    """一道题。label / options 为 TEXTS 中的键（随界面语言变化）或固定的文字 / 选项列表。
+
+    show_if=(字段, 选项下标)：只有该题选中这一项时才记录本题，否则本题视为未出现（单选为 None，多选为空列表）。
+    codes=False 的选择题入库存选项文字本身（选项只有英文一种）。root=True 的题目写在记录顶层而非所属步骤下。
+    其余关键字参数（value、min_value、max_value、placeholder 等）原样传给控件。
+    """
+
+    __slots__ = ('name', 'kind', 'label', 'options', 'required', 'show_if', 'key', 'codes', 'root', 'note',
+                 'widget', 'lookup')
+
+    def __init__(self, name, kind, label, options=None, *, required=False, show_if=None, key=None, codes=True,
+                 root=False, note=None, **widget):
+        if kind not in KINDS:
+            raise ValueError(f"{name}: unknown kind {kind!r}")
+        self.name = name
+        self.kind = kind
+        self.label = label
+        self.options = options
+        self.required = required
+        self.show_if = show_if
+        self.key = key or name
+        self.codes = codes
+        self.root = root
+        self.note = note  # 控件下方的提示：note(当前值) -> 文字
+        self.widget = widget
+        self.lookup = None
+
+    @property
+    def multi(self):
+        return self.kind == 'multiselect'
+
+    def label_text(self, texts):
+        return texts.get(self.label, self.label)
+
+    def option_list(self, texts):
+        return texts[self.options] if isinstance(self.options, str) else self.options
+
+    def encode(self, value):
+        """表单中的答案（选项文字）-> 入库值（选项下标）。"""
+        if self.options is None or value is None:
+            return value
+        if self.multi:
+            return [self.lookup[v] for v in value]
+        return self.lookup[value]
+
+
+def _age_note(value):
+    return f"**Age**: {datetime.now().year - value.year} years"
+
+
+# 版面：Field，或 ('subheader' / 'markdown', 文字)，或 ('columns', [[第一列的项目...], [第二列...]])
+# 文字中的 {键} 按界面语言的 TEXTS 替换
+STEPS = {
+    'demographics': [
+        ('columns', [
+            [
+                ('subheader', "📋 Basic Identity Information"),
+                Field('questionnaire_id', 'text', 'questionnaire_id', required=True, root=True, placeholder="A001"),
+                Field('survey_date', 'date', 'survey_date', required=True, root=True),
+                Field('survey_method', 'select', 'survey_method', 'survey_methods', required=True, root=True),
+                ('subheader', "👤 Identity Characteristics"),
+                Field('gender', 'select', 'gender', 'genders', required=True),
+                Field('birth_date', 'date', 'birth_date', required=True, value=date(1980, 1, 1), note=_age_note),
+            ],
+            [
+                ('subheader', "🏠 Socioeconomic Background"),
+                Field('education', 'select', 'education_level', 'education_levels', key='education_level'),
+                Field('occupation', 'select', 'occupation', 'occupations'),
+                Field('income', 'select', 'income_level', 'income_levels', key='income_level'),
+                ('subheader', "🌍 Cultural Background"),
+                Field('ethnicity', 'select', 'ethnicity', 'ethnicities'),
+                Field('residence', 'select', 'residence_type', 'residence_types', key='residence_type'),
+                Field('region', 'select', 'region', 'regions', required=True),
+            ],
+        ]),
+        ('markdown', "---"),
+        ('markdown', "### ♿ {accessibility}"),
+        ('columns', [
+            [Field('accessibility_needs', 'multiselect', 'accessibility_needs', 'accessibility_options')],
+            [Field('communication_preference', 'multiselect', 'communication_preference', 'communication_options',
+                   key='preferred_communication')],
+        ]),
+    ],
+    'medical_history': [
+        ('columns', [
+            [
+                ('subheader', "🩺 Liver Cancer Diagnosis Information"),
+                Field('diagnosis_date', 'date', 'diagnosis_date', required=True),
+                Field('tumor_stage', 'select', 'tumor_stage', 'tumor_stages', required=True),
+                Field('diagnosis_location', 'select', 'diagnosis_location', 'hospital_types'),
+                ('subheader', "🦠 Hepatitis and Liver Health"),
+                Field('hepatitis_b', 'radio', 'hepatitis_b', 'yes_no_unknown', required=True),
+                Field('hbv_treatment', 'radio', "HBV Antiviral Treatment", 'yes_no_unknown', show_if=('hepatitis_b', 0)),
+                Field('hbv_years', 'number', "Years of HBV History", show_if=('hepatitis_b', 0),
+                      min_value=0, max_value=50, value=5),
+                Field('hepatitis_c', 'radio', 'hepatitis_c', 'yes_no_unknown', required=True),
+                Field('other_liver_disease', 'multiselect', 'other_liver_disease', 'liver_diseases'),
+            ],
+            [
+                ('subheader', "💊 Treatment Experience"),
+                Field('treatment_experience', 'multiselect', 'treatment_experience', 'treatments', required=True),
+                ('subheader', "🔬 Current Treatment Status"),
+                Field('current_treatment', 'radio', 'current_treatment', 'yes_no_unknown', required=True),
+                Field('current_treatment_types', 'multiselect', "Current Treatment Methods", CURRENT_TREATMENT_TYPES,
+                      show_if=('current_treatment', 0)),
+                Field('treatment_months', 'number', "Current Treatment Duration (months)",
+                      show_if=('current_treatment', 0), min_value=1, max_value=120, value=6),
+                Field('monthly_cost', 'select', "Monthly Treatment Cost", MONTHLY_COSTS,
+                      show_if=('current_treatment', 0)),
+            ],
+        ]),
+    ],
+    'symptoms': [
+        ('subheader', "🩺 Symptom Severity (1-10 scale)"),
+        ('columns', [
+            [
+                Field('fatigue', 'slider', "Fatigue", required=True, min_value=1, max_value=10, value=5),
+                Field('pain', 'slider', "Pain", required=True, min_value=1, max_value=10, value=3),
+                Field('nausea', 'slider', "Nausea", required=True, min_value=1, max_value=10, value=2),
+            ],
+            [
+                Field('appetite', 'slider', "Appetite Loss", required=True, min_value=1, max_value=10, value=4),
+                Field('sleep', 'slider', "Sleep Disturbance", required=True, min_value=1, max_value=10, value=3),
+                Field('mobility', 'slider', "Mobility Issues", required=True, min_value=1, max_value=10, value=2),
+            ],
+        ]),
+        ('subheader', "📝 Additional Symptoms"),
+        Field('additional_symptoms', 'multiselect', "Select any additional symptoms you've experienced:",
+              ADDITIONAL_SYMPTOMS, codes=False),
+        Field('other_symptoms', 'textarea', "Please describe any other symptoms:"),
+    ],
+    'research': [
+        ('subheader', "📋 Future Research Opportunities"),
+        ('columns', [
+            [
+                Field('future_contact', 'radio', "Would you be willing to be contacted for future research studies?",
+                      RESEARCH_OPTIONS['future_contact'], codes=False),
+                Field('sample_collection', 'radio',
+                      "Would you consider providing biological samples (e.g., blood, tissue) for research?",
+                      RESEARCH_OPTIONS['sample_collection'], codes=False),
+            ],
+            [
+                Field('data_sharing', 'radio', "Would you allow your anonymized data to be shared with other researchers?",
+                      RESEARCH_OPTIONS['data_sharing'], codes=False),
+                Field('follow_up', 'radio', "Would you participate in follow-up surveys?",
+                      RESEARCH_OPTIONS['follow_up'], codes=False),
+            ],
+        ]),
+        Field('suggestions', 'textarea', "Any suggestions for improving our research or this platform:"),
+    ],
+}
+
+
+def _walk(layout):
+    for item in layout:
+        if isinstance(item, Field):
+            yield item
+        elif item[0] == 'columns':
+            for column in item[1]:
+                yield from _walk(column)
+
+
+def _empty(value):
+    return value is None or value == '' or (isinstance(value, (list, tuple)) and not value)
+
+
+class Step:
+    __slots__ = ('name', 'layout', 'fields')
+
+    def __init__(self, name, layout):
+        self.name = name
+        self.layout = layout
+        self.fields = list(_walk(layout))
+
+
+class Questionnaire:
+    """编译后的问卷：steps 为 {步骤名: Step}，fields 为 {字段名: Field}（字段名全局唯一，即扁平导出的列名）。"""
+
+    def __init__(self, steps):
+        self.steps = {name: Step(name, layout) for name, layout in steps.items()}
+        self.fields = {}
+        for step in self.steps.values():
+            for field in step.fields:
+                if field.name in self.fields:
+                    raise ValueError(f"duplicate field {field.name!r}")
+                if field.show_if is not None:
+                    parent = self.fields.get(field.show_if[0])
+                    # 前提题必须在同一步、排在本题之前，且是单选题
+                    if parent is None or parent not in step.fields or parent.options is None or parent.multi:
+                        raise ValueError(f"{field.name}: show_if must refer to an earlier single-choice field")
+                    if not 0 <= field.show_if[1] < len(parent.option_list(TEXTS['en'])):
+                        raise ValueError(f"{field.name}: show_if option out of range")
+                if field.options is not None:
+                    field.lookup = self._lookup(field)
+                self.fields[field.name] = field
+
+    @staticmethod
+    def _lookup(field):
+        # 各语言的选项文字和下标本身都映射到入库值；英文优先，避免不同语言的同名选项互相覆盖
+        lookup = {}
+        for language in ('en', *(lang for lang in TEXTS if lang != 'en')):
+            for code, label in enumerate(field.option_list(TEXTS[language])):
+                lookup.setdefault(label, code if field.codes else field.option_list(TEXTS['en'])[code])
+        if field.codes:
+            for code in range(len(field.option_list(TEXTS['en']))):
+                lookup.setdefault(code, code)
+                lookup.setdefault(str(code), code)
+        return lookup
+
+    def applicable(self, field, answers):
+        """按显示条件判断本题是否出现；answers 中的前提题答案可以是选项文字或下标。"""
+        if field.show_if is None:
+            return True
+        parent, code = field.show_if
+        value = answers.get(parent)
+        return value is not None and self.fields[parent].lookup.get(value) == code
+
+    def validate(self, step, answers):
+        """校验一步的答案（控件的原始值）。返回 (清理后的答案, [(字段名, 'required' | 'invalid'), ...])。
+
+        清理：文字去掉首尾空白，日期转为 ISO 字符串，不满足显示条件的题目置空。答案仍是选项文字，入库时再由 encode() 转为下标。
+        """
+        values, errors = {}, []
+        for field in self.steps[step].fields:
+            value = answers.get(field.name)
+            if not self.applicable(field, answers):
+                values[field.name] = [] if field.multi else None
+                continue
+            if isinstance(value, str):
+                value = value.strip()
+            elif isinstance(value, date):
+                value = value.isoformat()
+            if _empty(value):
+                if field.required:
+                    errors.append((field.name, 'required'))
+                values[field.name] = [] if field.multi else ('' if field.kind in ('text', 'textarea') else None)
+                continue
+            if field.options is not None:
+                valid = all(v in field.lookup for v in value) if field.multi else value in field.lookup
+            elif field.kind in ('number', 'slider'):
+                valid = (isinstance(value, (int, float)) and not isinstance(value, bool)
+                         and field.widget.get('min_value', value) <= value <= field.widget.get('max_value', value))
+            else:
+                valid = True
+            if not valid:
+                errors.append((field.name, 'invalid'))
+            values[field.name] = list(value) if field.multi else value
+        return values, errors
+
+    def encode(self, form_data, language):
+        """会话中的 form_data（{步骤名: 清理后的答案}）-> 入库记录（选项下标），格式同 cohort.iter_records。"""
+        record = {
+            'questionnaire_id': form_data['questionnaire_id'],
+            'language': language,
+            'submitted_at': int(time.time()),
+            'survey_date': None,
+            'survey_method': None,
+        }
+        for step in self.steps.values():
+            values = form_data.get(step.name)
+            if values is None:
+                continue
+            section = {}
+            for field in step.fields:
+                (record if field.root else section)[field.name] = field.encode(values.get(field.name))
+            record[step.name] = section
+        return record
+
+    def answered(self, record):
+        """一份入库记录中已作答的题目数（空文字、空多选与不满足显示条件的题目不计），即“数据点”数。"""
+        count = 0
+        for step in self.steps.values():
+            section = record.get(step.name) or {}
+            for field in step.fields:
+                count += not _empty(record.get(field.name) if field.root else section.get(field.name))
+        return count
+
+    def validate_frame(self, frame):
+        """批量校验扁平表（列名为字段名，取值为任一语言的选项文字或下标，多选以分号分隔）。
+
+        全部按列向量化；多选列的取值组合有限，按不同取值各解析一次再整列查表。
+        返回 (编码后的表, 每行的错误说明 Series，空字符串表示通过)。编码后单选题为下标（codes=False 的为英文文字），
+        多选为入库格式的 JSON 数组字符串，日期为 ISO 字符串，数值为 Int64；不满足显示条件的题目置空。
+        """
+        encoded = pd.DataFrame(index=frame.index)
+        errors = pd.Series('', index=frame.index, dtype=object)
+        missing_column = pd.Series(pd.NA, index=frame.index, dtype=object)
+
+        def reject(mask, message):
+            if mask.any():
+                errors[mask] = errors[mask] + message + '; '
+
+        for field in self.fields.values():
+            column = frame[field.name] if field.name in frame.columns else missing_column
+            text = column.astype('string').str.strip()
+            empty = text.isna() | (text == '')
+            if field.multi:
+                text = text.fillna('')
+                values = text.map({value: _parse_multi(field, value) for value in text.unique()})
+                invalid = values.isna()
+            elif field.options is not None:
+                values = text.map(field.lookup)
+                invalid = ~empty & values.isna()
+                if field.codes:
+                    values = values.astype('Int64')
+            elif field.kind in ('number', 'slider'):
+                # 分值、年数等取值很少：只转换不同的取值，再整列查表
+                uniques = text.dropna().unique()
+                numbers = text.map(dict(zip(uniques, pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce'))))
+                numbers = numbers.astype('float64')
+                invalid = ~empty & (numbers.isna() | (numbers % 1 != 0)
+                                    | (numbers < field.widget.get('min_value', -np.inf))
+                                    | (numbers > field.widget.get('max_value', np.inf)))
+                values = numbers.where(~invalid).astype('Int64')
+            elif field.kind == 'date':
+                dates = pd.to_datetime(text, format='ISO8601', errors='coerce')
+                invalid = ~empty & dates.isna()
+                values = dates.dt.strftime('%Y-%m-%d')
+            else:
+                values = text.fillna('')
+                invalid = pd.Series(False, index=frame.index)
+
+            if field.show_if is not None:
+                parent, code = field.show_if
+                applicable = encoded[parent] == code
+                applicable = applicable.fillna(False).astype(bool)
+                invalid &= applicable
+                empty |= ~applicable
+                values = values.where(applicable, '[]' if field.multi else None)
+            if field.required:
+                reject(empty, f"{field.name}: required")
+            reject(invalid, f"{field.name}: invalid")
+            encoded[field.name] = values
+        return encoded, errors.str.rstrip('; ')
+
+
+def _parse_multi(field, value):
+    """'选项; 选项' -> 入库的 JSON 数组字符串；有无法识别的选项时返回 None。"""
+    try:
+        codes = [field.lookup[v.strip()] for v in value.split(MULTI_SEPARATOR) if v.strip()]
+    except KeyError:
+        return None
+    return json.dumps(codes, ensure_ascii=False)
+
+
+QUESTIONNAIRE = Questionnaire(STEPS)
@@ -0,0 +1,353 @@
+"""问卷提交的持久化存储：SQLite（WAL 模式）+ 单写线程分组提交。
+
+多个会话并发提交时，请求先进入队列，由写线程把队列中积压的记录合并到同一个事务里提交，
+一次 fsync 落盘一整批，避免每份问卷各自串行等待磁盘。
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+# 记录格式见 schema.Questionnaire.encode：单选题存选项下标（与界面语言无关），多选题存下标的 JSON 数组
+DEMOGRAPHIC_FIELDS = ['gender', 'birth_date', 'education', 'occupation', 'income', 'ethnicity', 'residence', 'region',
+                      'accessibility_needs', 'communication_preference']
+MEDICAL_FIELDS = ['diagnosis_date', 'tumor_stage', 'diagnosis_location', 'hepatitis_b', 'hbv_treatment', 'hbv_years',
+                  'hepatitis_c', 'other_liver_disease', 'treatment_experience', 'current_treatment',
+                  'current_treatment_types', 'treatment_months', 'monthly_cost']
+MEDICAL_MULTI_FIELDS = ('other_liver_disease', 'treatment_experience', 'current_treatment_types')
+SYMPTOM_SCORES = ['fatigue', 'pain', 'nausea', 'appetite', 'sleep', 'mobility']
+RESEARCH_FIELDS = ['future_contact', 'sample_collection', 'data_sharing', 'follow_up', 'suggestions']
+SUBMISSION_FIELDS = ['questionnaire_id', 'language', 'submitted_at', 'survey_date', 'survey_method']
+# 各步骤的表 -> 列（不含 submission_id），顺序与建表语句一致
+SECTION_COLUMNS = {
+    'demographics': DEMOGRAPHIC_FIELDS,
+    'medical_history': MEDICAL_FIELDS,
+    'symptoms': [*SYMPTOM_SCORES, 'additional_symptoms', 'other_symptoms'],
+    'research': RESEARCH_FIELDS,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY,
+    questionnaire_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    submitted_at INTEGER NOT NULL,
+    survey_date TEXT,
+    survey_method INTEGER
+);
+CREATE TABLE IF NOT EXISTS demographics (
+    submission_id INTEGER PRIMARY KEY REFERENCES submissions(id),
+    gender INTEGER NOT NULL,
+    birth_date TEXT NOT NULL,
+    education INTEGER,
+    occupation INTEGER,
+    income INTEGER,
+    ethnicity INTEGER,
+    residence INTEGER,
+    region INTEGER NOT NULL,
+    accessibility_needs TEXT NOT NULL DEFAULT '[]',
+    communication_preference TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS medical_history (
+    submission_id INTEGER PRIMARY KEY REFERENCES submissions(id),
+    diagnosis_date TEXT,
+    tumor_stage INTEGER NOT NULL,
+    diagnosis_location INTEGER,
+    hepatitis_b INTEGER NOT NULL,
+    hbv_treatment INTEGER,
+    hbv_years INTEGER,
+    hepatitis_c INTEGER NOT NULL,
+    other_liver_disease TEXT NOT NULL DEFAULT '[]',
+    treatment_experience TEXT NOT NULL DEFAULT '[]',
+    current_treatment INTEGER NOT NULL,
+    current_treatment_types TEXT NOT NULL DEFAULT '[]',
+    treatment_months INTEGER,
+    monthly_cost INTEGER
+);
+CREATE TABLE IF NOT EXISTS symptoms (
+    submission_id INTEGER PRIMARY KEY REFERENCES submissions(id),
+    fatigue INTEGER NOT NULL CHECK (fatigue BETWEEN 1 AND 10),
+    pain INTEGER NOT NULL CHECK (pain BETWEEN 1 AND 10),
+    nausea INTEGER NOT NULL CHECK (nausea BETWEEN 1 AND 10),
+    appetite INTEGER NOT NULL CHECK (appetite BETWEEN 1 AND 10),
+    sleep INTEGER NOT NULL CHECK (sleep BETWEEN 1 AND 10),
+    mobility INTEGER NOT NULL CHECK (mobility BETWEEN 1 AND 10),
+    additional_symptoms TEXT NOT NULL DEFAULT '[]',
+    other_symptoms TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS research (
+    submission_id INTEGER PRIMARY KEY REFERENCES submissions(id),
+    future_contact TEXT,
+    sample_collection TEXT,
+    data_sharing TEXT,
+    follow_up TEXT,
+    suggestions TEXT NOT NULL DEFAULT ''
+);
+"""
+
+# 问卷编号唯一。旧库中已有重复编号时建不了唯一索引，退回普通索引（查重仍走索引，只是不再由库兜底）
+UNIQUE_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS submissions_questionnaire_id ON submissions (questionnaire_id)"
+PLAIN_INDEX = "CREATE INDEX IF NOT EXISTS submissions_questionnaire_id_dup ON submissions (questionnaire_id)"
+
+# 导出用的扁平列（每份问卷一行），顺序与 iter_rows() 返回的元组一致
+FLAT_COLUMNS = [
+    'id', 'questionnaire_id', 'language', 'submitted_at', 'survey_date', 'survey_method',
+    *DEMOGRAPHIC_FIELDS,
+    *MEDICAL_FIELDS,
+    *SYMPTOM_SCORES, 'additional_symptoms', 'other_symptoms',
+    *RESEARCH_FIELDS,
+]
+FLAT_SELECT = """
+SELECT s.id, s.questionnaire_id, s.language, s.submitted_at, s.survey_date, s.survey_method,
+       d.gender, d.birth_date, d.education, d.occupation, d.income, d.ethnicity, d.residence, d.region,
+       d.accessibility_needs, d.communication_preference,
+       m.diagnosis_date, m.tumor_stage, m.diagnosis_location, m.hepatitis_b, m.hbv_treatment, m.hbv_years,
+       m.hepatitis_c, m.other_liver_disease, m.treatment_experience, m.current_treatment,
+       m.current_treatment_types, m.treatment_months, m.monthly_cost,
+       y.fatigue, y.pain, y.nausea, y.appetite, y.sleep, y.mobility, y.additional_symptoms, y.other_symptoms,
+       r.future_contact, r.sample_collection, r.data_sharing, r.follow_up, r.suggestions
+FROM submissions s
+LEFT JOIN demographics d ON d.submission_id = s.id
+LEFT JOIN medical_history m ON m.submission_id = s.id
+LEFT JOIN symptoms y ON y.submission_id = s.id
+LEFT JOIN research r ON r.submission_id = s.id
+WHERE s.id > ?
+ORDER BY s.id
+LIMIT ?
+"""
+
+
+def _insert(conn, record):
+    cur = conn.execute(
+        "INSERT INTO submissions (questionnaire_id, language, submitted_at, survey_date, survey_method) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (record['questionnaire_id'], record['language'], record['submitted_at'],
+         record.get('survey_date'), record.get('survey_method'))
+    )
+    submission_id = cur.lastrowid
+
+    demographics = record.get('demographics')
+    if demographics is not None:
+        conn.execute(
+            "INSERT INTO demographics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (submission_id, demographics['gender'], demographics['birth_date'], demographics.get('education'),
+             demographics.get('occupation'), demographics.get('income'), demographics.get('ethnicity'),
+             demographics.get('residence'), demographics['region'],
+             json.dumps(demographics.get('accessibility_needs', [])),
+             json.dumps(demographics.get('communication_preference', [])))
+        )
+
+    medical = record.get('medical_history')
+    if medical is not None:
+        conn.execute(
+            f"INSERT INTO medical_history VALUES (?, {', '.join('?' * len(MEDICAL_FIELDS))})",
+            (submission_id, *[json.dumps(medical.get(k) or []) if k in MEDICAL_MULTI_FIELDS else medical.get(k)
+                              for k in MEDICAL_FIELDS])
+        )
+
+    symptoms = record.get('symptoms')
+    if symptoms is not None:
+        conn.execute(
+            "INSERT INTO symptoms VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (submission_id, *[symptoms[k] for k in SYMPTOM_SCORES],
+             json.dumps(symptoms.get('additional_symptoms', []), ensure_ascii=False),
+             symptoms.get('other_symptoms', ''))
+        )
+
+    research = record.get('research')
+    if research is not None:
+        conn.execute(
+            "INSERT INTO research VALUES (?, ?, ?, ?, ?, ?)",
+            (submission_id, research.get('future_contact'), research.get('sample_collection'),
+             research.get('data_sharing'), research.get('follow_up'), research.get('suggestions', ''))
+        )
+    return submission_id
+
+
+def insert_columns(conn, columns):
+    """按列批量写入一批完整问卷（批量导入用，需在调用方的写事务中执行）：每张表一次 executemany。
+
+    columns 为 {列名: 值列表}，包含 SUBMISSION_FIELDS 与 SECTION_COLUMNS 中的全部列，多选列为 JSON 字符串。
+    id 在写锁内按当前最大 id 顺延分配。返回第一条的 id。
+    """
+    first_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM submissions").fetchone()[0] + 1
+    ids = range(first_id, first_id + len(columns['questionnaire_id']))
+    conn.executemany(
+        f"INSERT INTO submissions (id, {', '.join(SUBMISSION_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+        zip(ids, *[columns[k] for k in SUBMISSION_FIELDS])
+    )
+    for table, fields in SECTION_COLUMNS.items():
+        conn.executemany(
+            f"INSERT INTO {table} VALUES (?, {', '.join('?' * len(fields))})",
+            zip(ids, *[columns[k] for k in fields])
+        )
+    return first_id
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + FULL：每次提交都 fsync，保证已确认的问卷不会因断电丢失
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+class SubmissionStore:
+    """问卷存储。submit() 在记录随所在批次落盘后返回新记录的 id。
+
+    待写队列有上限（max_pending），积压过多时 submit_async() 抛出 queue.Full。
+    """
+
+    def __init__(self, path, max_batch=256, max_pending=1024):
+        self.path = path
+        self.max_batch = max_batch
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = connect(path)
+        self._conn.executescript(SCHEMA)
+        try:
+            self._conn.execute(UNIQUE_INDEX)
+        except sqlite3.IntegrityError:
+            self._conn.execute(PLAIN_INDEX)
+        self._local = threading.local()
+        # 数据版本专用连接：PRAGMA data_version 只反映“其他连接”的提交，必须始终用同一个连接读取
+        self._version_conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._version_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="submission-writer", daemon=True)
+        self._writer.start()
+
+    # ---- 写入 ----
+    def submit_async(self, record):
+        if self._closed:
+            raise RuntimeError("SubmissionStore is closed")
+        future = Future()
+        self._queue.put_nowait((record, future))
+        return future
+
+    def submit(self, record, timeout=None):
+        return self.submit_async(record).result(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            # 分组提交：把等待期间积压的请求一并取出
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._commit_batch(batch)
+                    return
+                batch.append(item)
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch):
+        # 写线程不能因为某一批出错而退出，否则之后的提交都会一直等待；未完成的回执带上异常返回
+        try:
+            self._commit(batch)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def _rollback(self):
+        # BEGIN 本身失败（如其他进程持有写锁、等锁超时）时没有事务可回滚
+        if self._conn.in_transaction:
+            self._conn.execute("ROLLBACK")
+
+    def _commit(self, batch):
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            ids = [_insert(self._conn, record) for record, _ in batch]
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._rollback()
+            # 整批失败时逐条重试，避免一条坏记录拖累同批的其他问卷
+            for record, future in batch:
+                try:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    submission_id = _insert(self._conn, record)
+                    self._conn.execute("COMMIT")
+                except Exception as e:
+                    self._rollback()
+                    future.set_exception(e)
+                else:
+                    future.set_result(submission_id)
+            return
+        for (_, future), submission_id in zip(batch, ids):
+            future.set_result(submission_id)
+
+    def bulk_insert(self, records):
+        """在一个事务中直接写入大批记录（批量导入、压测用），绕过分组提交队列。返回写入条数。"""
+        conn = connect(self.path)
+        count = 0
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for record in records:
+                _insert(conn, record)
+                count += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return count
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._writer.join()
+            self._conn.close()
+            self._version_conn.close()
+
+    # ---- 读取（WAL 下读不阻塞写；每个线程一个只读连接） ----
+    def _reader(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def query(self, sql, params=()):
+        return self._reader().execute(sql, params)
+
+    def data_version(self):
+        """库的数据版本：本进程写线程或其他进程每提交一次就变化，库没有变化时保持不变。
+
+        只执行一条 PRAGMA（不读表），多个服务进程可以频繁调用它判断是否需要追读新问卷。
+        """
+        with self._version_lock:
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def count(self):
+        return self.query("SELECT COUNT(*) FROM submissions").fetchone()[0]
+
+    def has_questionnaire_id(self, questionnaire_id):
+        return self.query(
+            "SELECT 1 FROM submissions WHERE questionnaire_id = ? LIMIT 1", (questionnaire_id,)
+        ).fetchone() is not None
+
+    def iter_rows(self, chunk_size=5000, after_id=0):
+        """按 id 顺序分块读取扁平化的问卷行（列见 FLAT_COLUMNS），每次只在内存中保留一块。"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            while True:
+                chunk = conn.execute(FLAT_SELECT, (after_id, chunk_size)).fetchall()
+                if not chunk:
+                    return
+                yield chunk
+                after_id = chunk[-1][0]
+        finally:
+            conn.close()
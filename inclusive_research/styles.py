@@ -0,0 +1,148 @@
+"""全局 CSS 样式（包容性设计配色、卡片、徽章、按钮等）。"""
+
+GLOBAL_CSS = """
+<style>
+    /* 包容性设计配色 */
+    :root {
+        --primary-blue: #1f77b4;
+        --primary-green: #0FEE07;
+        --primary-orange: #ff7f0e;
+        --primary-red: #d62728;
+        --primary-purple: #9467bd;
+        --accessibility-yellow: #ffd700;
+        --inclusion-teal: #17becf;
+        --diversity-pink: #e377c2;
+    }
+    .main .block-container {
+        text-align: center;
+    }
+
+    .inclusive-header {
+        background: linear-gradient(135deg, #CC6CE7, #060270, #5DE2E7);
+        background-size: 400% 400%;
+        animation: gradientShift 15s ease infinite;
+        padding: 3rem 2rem;
+        border-radius: 20px;
+        color: white;
+        text-align: center;
+        margin-bottom: 2rem;
+        box-shadow: 0 20px 40px rgba(0,0,0,0.1);
+        position: relative;
+        overflow: hidden;
+    }
+
+    @keyframes gradientShift {
+        0% { background-position: 0% 50%; }
+        50% { background-position: 100% 50%; }
+        100% { background-position: 0% 50%; }
+    }
+
+    /* 修复徽章样式 */
+    .diversity-badge {
+        background: linear-gradient(135deg, #ff6b6b, #4ecdc4, #45b7d1, #96ceb4, #feca57);
+        background-size: 400% 400%;
+        animation: gradientShift 8s ease infinite;
+        color: white;
+        padding: 0.8rem 1.5rem;
+        border-radius: 25px;
+        font-size: 0.9rem;
+        font-weight: 600;
+        display: inline-flex;
+        align-items: center;
+        margin: 0.3rem;
+        box-shadow: 0 4px 15px rgba(0,0,0,0.2);
+        border: 2px solid rgba(255,255,255,0.3);
+        backdrop-filter: blur(10px);
+        transition: all 0.3s ease;
+        min-width: 120px;
+        justify-content: center;
+        text-shadow: 1px 1px 2px rgba(0,0,0,0.3);
+    }
+
+    .diversity-badge:hover {
+        transform: translateY(-3px) scale(1.05);
+        box-shadow: 0 8px 25px rgba(0,0,0,0.3);
+    }
+
+    .badge-container {
+        display: flex;
+        justify-content: center;
+        gap: 0.8rem;
+        margin-top: 1.5rem;
+        flex-wrap: wrap;
+        padding: 1rem;
+    }
+
+    .promise-banner {
+        background: linear-gradient(135deg, var(--primary-green), var(--inclusion-teal));
+        color: white;
+        padding: 1.5rem;
+        border-radius: 15px;
+        margin: 1rem 0;
+        border-left: 6px solid var(--accessibility-yellow);
+        box-shadow: 0 8px 25px rgba(44, 160, 44, 0.2);
+        text-align: center;
+    }
+
+    .inclusive-card {
+        background: rgba(255, 255, 255, 0.95);
+        backdrop-filter: blur(10px);
+        padding: 2.5rem;
+        border-radius: 20px;
+        margin: 1.5rem 0;
+        box-shadow: 0 15px 35px rgba(0,0,0,0.1);
+        border: 2px solid transparent;
+        background-clip: padding-box;
+        position: relative;
+        transition: all 0.3s ease;
+        text-align: center;
+    }
+
+    .inclusive-card::before {
+        content: "";
+        position: absolute;
+        top: 0;
+        left: 0;
+        right: 0;
+        bottom: 0;
+        border-radius: 20px;
+        padding: 2px;
+        background: linear-gradient(135deg, var(--primary-blue), var(--primary-green), var(--primary-orange));
+        -webkit-mask: linear-gradient(#fff 0 0) content-box, linear-gradient(#fff 0 0);
+        -webkit-mask-composite: xor;
+        mask-composite: exclude;
+        z-index: -1;
+    }
+
+    .inclusive-card:hover {
+        transform: translateY(-5px);
+        box-shadow: 0 20px 40px rgba(0,0,0,0.15);
+    }
+    h1, h2, h3, h4, h5, h6, p {
+        text-align: center;
+    }
+    .stProgress > div > div > div > div {
+        background: linear-gradient(90deg, var(--primary-blue), var(--inclusion-teal), var(--primary-green));
+        background-size: 200% 100%;
+        animation: gradientShift 3s ease infinite;
+    }
+
+    .stButton > button {
+        background: linear-gradient(135deg, var(--primary-blue), var(--primary-green));
+        color: white;
+        border: none;
+        padding: 0.75rem 2rem;
+        border-radius: 50px;
+        font-weight: 600;
+        transition: all 0.3s ease;
+        box-shadow: 0 5px 15px rgba(31, 119, 180, 0.4);
+        margin: 0 auto;
+        display: block;
+    }
+
+    .stButton > button:hover {
+        transform: translateY(-3px);
+        box-shadow: 0 8px 25px rgba(31, 119, 180, 0.6);
+    }
+</style>
+"""
@@ -0,0 +1,94 @@
+"""症状评分（第 4 步的六个 1–10 分滑块）的分组直方图。
+
+评分只有 10 个取值，按 (肿瘤分期, 是否正在治疗, 症状, 评分) 计数即可完整保存分布：一份提交加 6 个计数，
+中位数、分位数和均值都由直方图的累计和得到，不需要原始答卷。不同进程或站点的直方图逐格相加即合并，结果与
+在全部答卷上直接计算完全一致（不是近似的分位数草图）。
+"""
+import threading
+
+import numpy as np
+
+from .schema import QUESTIONNAIRE
+from .store import SYMPTOM_SCORES
+from .texts import TEXTS
+
+SCORES = 10
+# 分组字段 -> 选项个数；每个分组字段另留最后一格给缺失
+GROUP_FIELDS = {name: len(QUESTIONNAIRE.fields[name].option_list(TEXTS['en']))
+                for name in ('tumor_stage', 'current_treatment')}
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def _group_code(codes, n):
+    # 缺失（None / 负数）-> 最后一格
+    codes = np.asarray(codes, dtype=np.int64)
+    return np.where(codes >= 0, codes, n)
+
+
+class SymptomHistograms:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # counts[分期, 治疗, 症状, 评分 - 1]
+        self.counts = np.zeros((*(n + 1 for n in GROUP_FIELDS.values()), len(SYMPTOM_SCORES), SCORES), dtype=np.int64)
+
+    def add(self, tumor_stage, current_treatment, scores):
+        """计入一份问卷：scores 为 {症状: 评分}，缺少的症状不计数。"""
+        stage = tumor_stage if tumor_stage is not None else GROUP_FIELDS['tumor_stage']
+        treatment = current_treatment if current_treatment is not None else GROUP_FIELDS['current_treatment']
+        with self._lock:
+            for i, symptom in enumerate(SYMPTOM_SCORES):
+                score = scores.get(symptom)
+                if score is not None:
+                    self.counts[stage, treatment, i, score - 1] += 1
+
+    def add_columns(self, tumor_stage, current_treatment, scores):
+        """批量计入：分期、治疗状态为选项下标数组（-1 为缺失），scores 为 (行数, 6) 的评分数组（不在 1–10 内的不计数）。"""
+        stage = _group_code(tumor_stage, GROUP_FIELDS['tumor_stage'])
+        treatment = _group_code(current_treatment, GROUP_FIELDS['current_treatment'])
+        scores = np.asarray(scores, dtype=np.int64)
+        # 展平为一维下标后 bincount，一次遍历得到全部格子
+        cells = np.ravel_multi_index(
+            (stage[:, None], treatment[:, None], np.arange(len(SYMPTOM_SCORES))[None, :], scores - 1),
+            self.counts.shape, mode='clip')
+        valid = (scores >= 1) & (scores <= SCORES)
+        counts = np.bincount(cells[valid], minlength=self.counts.size).reshape(self.counts.shape)
+        self.merge(counts)
+
+    def merge(self, other):
+        """逐格加上另一份直方图（SymptomHistograms 或同形状的数组），合并是精确的。"""
+        counts = other.snapshot() if isinstance(other, SymptomHistograms) else other
+        with self._lock:
+            self.counts += counts
+
+    def snapshot(self):
+        with self._lock:
+            return self.counts.copy()
+
+    def by_group(self, by):
+        """按 by（GROUP_FIELDS 之一）分组的直方图：(组, 症状, 评分)，最后一组为缺失。"""
+        axis = list(GROUP_FIELDS).index(by)
+        return self.snapshot().sum(axis=1 - axis)
+
+    def summary(self, by):
+        """按 by 分组的分布概况，只含有答卷的组。
+
+        返回 {'groups': [选项下标，缺失为 None], 'n': 数组[组], 'mean': 数组[组, 症状],
+        'percentiles': 数组[百分位, 组, 症状]（PERCENTILES 各百分位，取累计比例首次达到该比例的评分）,
+        'histograms': 数组[组, 症状, 评分]}。
+        """
+        histograms = self.by_group(by)
+        n = histograms.sum(axis=2).max(axis=1)
+        present = np.flatnonzero(n)
+        histograms, n = histograms[present], n[present]
+        scores = np.arange(1, SCORES + 1)
+        cumulative = histograms.cumsum(axis=2)
+        totals = cumulative[:, :, -1:]
+        # 整数比较，避免 0.1 * n 之类的浮点误差
+        percentiles = np.stack([(cumulative * 100 >= p * totals).argmax(axis=2) + 1 for p in PERCENTILES])
+        return {
+            'groups': [int(code) if code < GROUP_FIELDS[by] else None for code in present],
+            'n': n,
+            'mean': (histograms * scores).sum(axis=2) / np.maximum(totals[:, :, 0], 1),
+            'percentiles': percentiles,
+            'histograms': histograms,
+        }
@@ -0,0 +1,244 @@
+"""界面文字与选项列表（静态目录）。作为模块只在进程启动时加载一次，Streamlit 重跑脚本时不再重建。"""
+
+# 扩展的多语言支持
+LANGUAGES = {
+    "en": "English",
+    "zh": "中文"
+}
+
+TEXTS = {
+    "en": {
+        # Header and General
+        "title": "🌍 SYPHU-CHINA iGEM Inclusive Research Platform",
+        "subtitle": "Diverse Participant Engagement for Global Health Innovation",
+        "global_participation": "Global Participation",
+        "accessibility_design": "Accessibility Designed",
+        "diversity_inclusion": "Diversity & Inclusion",
+        "data_protection": "Data Protection",
+        "scientific_research": "Scientific Research",
+        "team": "SYPHU-CHINA iGEM Team 2025",
+        "data_promise_title": "🔒 Our Data Usage Promise",
+        "data_promise": "We sincerely promise that all data collected through this platform will be used exclusively for the iGEM synthetic biology competition and related scientific research purposes.",
+        "inclusive_research": "Inclusive Research Commitment",
+        "diversity_statement": "We believe that medical research should represent all people.",
+
+        # Navigation
+        "progress": "Progress",
+        "complete": "Complete",
+        "next": "Next →",
+        "previous": "← Previous",
+        "submit": "Submit",
+        "save": "Save Progress",
+        "required": "Required *",
+
+        # Steps
+        "basic_info": "Basic Information",
+        "medical_history": "Medical History",
+        "symptoms": "Symptoms Assessment",
+        "treatment": "Treatment Information",
+        "research": "Research Participation",
+        "completion": "Completion",
+        "dashboard": "Live Dashboard",
+        "analytics": "Data Analytics",
+        "export": "Export Data",
+        "consent": "Informed Consent",
+        "demographics": "Demographic Details",
+        "accessibility": "Accessibility Needs",
+
+        # Form Labels - Basic Info
+        "questionnaire_id": "Questionnaire ID",
+        "survey_date": "Survey Date",
+        "survey_method": "Survey Method",
+        "gender": "Gender Identity",
+        "birth_date": "Date of Birth",
+        "height": "Height (cm)",
+        "weight": "Weight (kg)",
+        "education_level": "Highest Education",
+        "occupation": "Employment Status",
+        "income_level": "Annual Household Income",
+        "ethnicity": "Ethnicity",
+        "residence_type": "Residence Type",
+        "region": "Region",
+
+        # Options - Basic Info
+        "survey_methods": ["Clinic Paper", "Ward Paper", "WeChat QR", "Phone", "Video Conference", "Other"],
+        "genders": ["Male", "Female", "Non-binary", "Transgender", "Prefer not to say", "Other"],
+        "education_levels": ["Primary School", "Middle School", "High School", "College", "Bachelor", "Master", "PhD",
+                             "Other"],
+        "occupations": ["Employed", "Retired", "Student", "Unemployed", "Homemaker", "Disabled", "Other"],
+        "income_levels": ["Under 50k", "50k-100k", "100k-200k", "200k-500k", "500k-1M", "Over 1M", "Prefer not to say"],
+        "ethnicities": ["Han", "Mongolian", "Hui", "Tibetan", "Uyghur", "Miao", "Other Minority"],
+        "residence_types": ["Urban", "Town", "Rural", "Pastoral", "Other"],
+        "regions": ["East China", "South China", "North China", "Central China", "Southwest", "Northwest", "Northeast",
+                    "Hong Kong/Macao/Taiwan", "Overseas"],
+
+        # Accessibility
+        "accessibility_needs": "Accessibility Support Needs",
+        "communication_preference": "Preferred Communication Methods",
+        "accessibility_options": ["Visual Assistance", "Hearing Assistance", "Mobility Assistance", "Cognitive Support",
+                                  "Language Translation", "Other", "No Needs"],
+        "communication_options": ["Text", "Voice", "Video", "Face-to-face", "Email", "Phone", "Other"],
+
+        # Medical History
+        "diagnosis_date": "Diagnosis Date",
+        "tumor_stage": "Tumor Stage",
+        "diagnosis_location": "Diagnosis Hospital Type",
+        "hepatitis_b": "Hepatitis B Infection",
+        "hepatitis_c": "Hepatitis C Infection",
+        "other_liver_disease": "Other Liver Diseases",
+        "treatment_experience": "Previous Treatment Experience",
+        "current_treatment": "Currently Receiving Treatment",
+
+        # Medical Options
+        "tumor_stages": ["Stage I", "Stage II", "Stage III", "Stage IV", "Unknown", "Initial Diagnosis"],
+        "hospital_types": ["Tertiary Hospital", "Cancer Specialist Hospital", "City-level Hospital", "County Hospital",
+                           "Private Hospital", "Overseas Hospital"],
+        "yes_no_unknown": ["Yes", "No", "Unknown"],
+        "liver_diseases": ["Fatty Liver", "Cirrhosis", "Autoimmune Liver Disease", "Alcoholic Liver Disease", "None",
+                           "Other"],
+        "treatments": ["Surgery", "Liver Transplant", "TACE", "Ablation Therapy", "Targeted Therapy", "Immunotherapy",
+                       "Chemotherapy", "Radiotherapy", "Traditional Medicine", "Supportive Care", "No Treatment"],
+
+        # Buttons and Messages
+        "start_questionnaire": "Start Questionnaire →",
+        "continue": "Continue",
+        "thank_you": "Thank you for completing the questionnaire!",
+        "consent_required": "Please agree to all terms to continue",
+        "all_consent_required": "Please agree to all terms to submit the questionnaire",
+        "resume_title": "Continue a saved questionnaire",
+        "resume_help": "Enter your Questionnaire ID and birth date to continue where you left off.",
+        "resume_button": "Continue",
+        "resume_not_found": "No saved questionnaire matches this ID and birth date.",
+        "duplicate_id": "This Questionnaire ID has already been submitted. Please check the ID on your form.",
+        "field_required": "Please answer: {field}",
+        "field_invalid": "Please check your answer: {field}",
+        "server_busy": "The server is busy right now. Please retry in a moment.",
+        "exports_busy": "Too many exports are being prepared right now. Please retry in a moment.",
+        "jobs_busy": "Too many background jobs are running right now. Please retry in a moment.",
+        "saving_response": "Saving your response...",
+        "response_saved": "### 🎉 Your response has been recorded!",
+        "job_receipt": "{message} (receipt {receipt})",
+        "job_failed": "Something went wrong (receipt {receipt}): {error}"
+    },
+    "zh": {
+        # Header and General
+        "title": "🌍 SYPHU-CHINA iGEM 包容性研究平台",
+        "subtitle": "多元化参与者参与，推动全球健康创新",
+        "global_participation": "全球参与",
+        "accessibility_design": "无障碍设计",
+        "diversity_inclusion": "多元包容",
+        "data_protection": "数据保护",
+        "scientific_research": "科学研究",
+        "team": "SYPHU-CHINA iGEM 团队 2025",
+        "data_promise_title": "🔒 我们的数据使用承诺",
+        "data_promise": "我们真诚承诺，通过本平台收集的所有数据将仅用于iGEM合成生物学竞赛及相关科学研究目的。",
+        "inclusive_research": "包容性研究承诺",
+        "diversity_statement": "我们相信医学研究应该代表所有人。",
+
+        # Navigation
+        "progress": "进度",
+        "complete": "完成",
+        "next": "下一步 →",
+        "previous": "← 上一步",
+        "submit": "提交",
+        "save": "保存进度",
+        "required": "必填 *",
+
+        # Steps
+        "basic_info": "基本信息",
+        "medical_history": "疾病历史",
+        "symptoms": "症状评估",
+        "treatment": "治疗信息",
+        "research": "研究参与",
+        "completion": "完成问卷",
+        "dashboard": "实时仪表盘",
+        "analytics": "数据分析",
+        "export": "导出数据",
+        "consent": "知情同意",
+        "demographics": "人口统计详情",
+        "accessibility": "无障碍需求",
+
+        # Form Labels - Basic Info
+        "questionnaire_id": "问卷编号",
+        "survey_date": "调查日期",
+        "survey_method": "调查方式",
+        "gender": "性别认同",
+        "birth_date": "出生日期",
+        "height": "身高 (cm)",
+        "weight": "体重 (kg)",
+        "education_level": "最高教育程度",
+        "occupation": "职业状况",
+        "income_level": "家庭年收入",
+        "ethnicity": "民族",
+        "residence_type": "居住类型",
+        "region": "常住地区",
+
+        # Options - Basic Info
+        "survey_methods": ["门诊纸质", "病房纸质", "微信二维码", "电话", "视频会议", "其他"],
+        "genders": ["男性", "女性", "非二元性别", "跨性别", "不愿透露", "其他"],
+        "education_levels": ["小学", "初中", "高中", "大专", "本科", "硕士", "博士", "其他"],
+        "occupations": ["在职", "退休", "学生", "失业", "家庭主妇/主夫", "残疾", "其他"],
+        "income_levels": ["5万以下", "5-10万", "10-20万", "20-50万", "50-100万", "100万以上", "不愿透露"],
+        "ethnicities": ["汉族", "蒙古族", "回族", "藏族", "维吾尔族", "苗族", "其他少数民族"],
+        "residence_types": ["城市", "乡镇", "农村", "牧区", "其他"],
+        "regions": ["华东", "华南", "华北", "华中", "西南", "西北", "东北", "港澳台", "海外"],
+
+        # Accessibility
+        "accessibility_needs": "无障碍支持需求",
+        "communication_preference": "偏好的沟通方式",
+        "accessibility_options": ["视觉辅助", "听觉辅助", "移动辅助", "认知支持", "语言翻译", "其他", "无需求"],
+        "communication_options": ["文字", "语音", "视频", "面对面", "电子邮件", "电话", "其他"],
+
+        # Medical History
+        "diagnosis_date": "确诊日期",
+        "tumor_stage": "肿瘤分期",
+        "diagnosis_location": "确诊医院类型",
+        "hepatitis_b": "乙肝感染",
+        "hepatitis_c": "丙肝感染",
+        "other_liver_disease": "其他肝脏疾病",
+        "treatment_experience": "既往治疗经历",
+        "current_treatment": "是否正在接受治疗",
+
+        # Medical Options
+        "tumor_stages": ["I期", "II期", "III期", "IV期", "不确定", "初次诊断"],
+        "hospital_types": ["三甲医院", "肿瘤专科医院", "地市级医院", "县级医院", "私立医院", "海外医院"],
+        "yes_no_unknown": ["是", "否", "不确定"],
+        "liver_diseases": ["脂肪肝", "肝硬化", "自身免疫性肝病", "酒精性肝病", "无", "其他"],
+        "treatments": ["手术切除", "肝移植", "TACE", "消融治疗", "靶向治疗", "免疫治疗", "化疗", "放疗", "中医治疗",
+                       "支持治疗", "未治疗"],
+
+        # Buttons and Messages
+        "start_questionnaire": "开始问卷 →",
+        "continue": "继续",
+        "thank_you": "感谢您完成问卷！",
+        "consent_required": "请同意所有条款以继续",
+        "all_consent_required": "请确认所有条款以提交问卷",
+        "resume_title": "继续填写已保存的问卷",
+        "resume_help": "输入问卷编号和出生日期，从上次中断的地方继续填写。",
+        "resume_button": "继续填写",
+        "resume_not_found": "没有找到与该编号和出生日期匹配的问卷草稿。",
+        "duplicate_id": "该问卷编号已提交过，请核对问卷上的编号。",
+        "field_required": "请填写：{field}",
+        "field_invalid": "请检查该项答案：{field}",
+        "server_busy": "服务器正忙，请稍后重试。",
+        "exports_busy": "正在准备的导出过多，请稍后重试。",
+        "jobs_busy": "正在运行的后台任务过多，请稍后重试。",
+        "saving_response": "正在保存您的问卷……",
+        "response_saved": "### 🎉 您的问卷已记录！",
+        "job_receipt": "{message}（回执号 {receipt}）",
+        "job_failed": "出错了（回执号 {receipt}）：{error}"
+    }
+}
+
+
+# 问卷中仅提供英文的选项
+CURRENT_TREATMENT_TYPES = ["Targeted Drugs", "Immunotherapy", "Chemotherapy", "Radiation", "Interventional", "Other"]
+MONTHLY_COSTS = ["Under 10k", "10k-30k", "30k-50k", "50k-100k", "Over 100k", "Insurance Covered"]
+ADDITIONAL_SYMPTOMS = ["Weight Loss", "Fever", "Jaundice", "Abdominal Swelling", "Shortness of Breath", "Other"]
+RESEARCH_OPTIONS = {
+    'future_contact': ["Yes", "No", "Maybe"],
+    'sample_collection': ["Yes", "No", "Need more information"],
+    'data_sharing': ["Yes, fully anonymized", "Yes, with restrictions", "No"],
+    'follow_up': ["Yes", "No", "Depends on timing"],
+}
+EXPORT_FORMATS = ["CSV", "JSON", "Excel"]
@@ -0,0 +1,123 @@
+"""参与趋势的时间序列：写入时维护的日 / 周 / 月分桶计数，按可见范围自动选粒度，超出点数上限时用 LTTB 降采样。
+
+桶键都是整数：日为 date.toordinal()，周为该周周一的序号，月为 年*12+月-1。
+每种粒度保存 {桶: 数量} 和有序的桶列表（新桶出现时插入），按日期范围取数只需两次二分查找，
+一张图最多 MAX_POINTS 个点，数据量和渲染耗时不随研究时长增长。
+"""
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+
+import numpy as np
+
+GRANULARITIES = ('day', 'week', 'month')
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+MAX_POINTS = 365  # 一张图的点数上限
+OVERSAMPLE = 3  # 可见范围内的桶数不超过 OVERSAMPLE * MAX_POINTS 时用该粒度，再由 LTTB 降到上限
+
+
+def bucket(granularity, ordinal):
+    """日期序号 -> 该粒度的桶键。"""
+    if granularity == 'day':
+        return ordinal
+    if granularity == 'week':
+        # 0001-01-01（序号 1）是周一
+        return ordinal - (ordinal - 1) % 7
+    day = date.fromordinal(ordinal)
+    return day.year * 12 + day.month - 1
+
+
+def bucket_date(granularity, key):
+    """桶键 -> 桶的起始日期。"""
+    if granularity == 'month':
+        return date(key // 12, key % 12 + 1, 1)
+    return date.fromordinal(key)
+
+
+class Rollup:
+    """一种粒度的计数（不加锁，由 DashboardAggregates 持锁调用）。"""
+
+    __slots__ = ('granularity', 'counts', 'keys')
+
+    def __init__(self, granularity):
+        self.granularity = granularity
+        self.counts = {}
+        self.keys = []  # 有序的桶键
+
+    def add(self, ordinal, n=1):
+        key = bucket(self.granularity, ordinal)
+        if key not in self.counts:
+            insort(self.keys, key)
+            self.counts[key] = 0
+        self.counts[key] += n
+
+    def get(self, ordinal):
+        return self.counts.get(bucket(self.granularity, ordinal), 0)
+
+    def window(self, start, end):
+        """日期序号 [start, end] 内的 ([桶键], [数量])。"""
+        keys = self.keys[bisect_left(self.keys, bucket(self.granularity, start)):
+                         bisect_right(self.keys, bucket(self.granularity, end))]
+        return keys, [self.counts[key] for key in keys]
+
+
+def granularity_for(start, end, max_points=MAX_POINTS):
+    """可见范围（日期序号）内桶数不超过 OVERSAMPLE * max_points 的最细粒度。"""
+    days = end - start + 1
+    limit = OVERSAMPLE * max_points
+    if days <= limit:
+        return 'day'
+    if days / 7 <= limit:
+        return 'week'
+    return 'month'
+
+
+def downsample(keys, counts, granularity, max_points=MAX_POINTS):
+    """(桶键, 数量) -> ([桶起始日期], [数量], 粒度)，超过 max_points 个点时用 LTTB 降采样。"""
+    if len(keys) > max_points:
+        index = lttb(keys, counts, max_points)
+        keys, counts = [keys[i] for i in index], [counts[i] for i in index]
+    return [bucket_date(granularity, int(key)) for key in keys], [int(n) for n in counts], granularity
+
+
+def day_series(ordinals, counts, start=None, end=None, max_points=MAX_POINTS):
+    """按日计数数组（日期序号升序，如筛选后的结果）-> 可见范围内的趋势，口径同 DashboardAggregates.trend。"""
+    if not len(ordinals):
+        return [], [], 'day'
+    start = start or int(ordinals[0])
+    end = end or int(ordinals[-1])
+    granularity = granularity_for(start, end, max_points)
+    if granularity == 'day':
+        keys = ordinals
+    elif granularity == 'week':
+        keys = ordinals - (ordinals - 1) % 7
+    else:
+        months = (ordinals - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        keys = months + 1970 * 12
+    keys, first = np.unique(keys, return_index=True)
+    counts = np.add.reduceat(counts, first)
+    lo, hi = np.searchsorted(keys, bucket(granularity, start)), np.searchsorted(keys, bucket(granularity, end), 'right')
+    return downsample(keys[lo:hi].tolist(), counts[lo:hi].tolist(), granularity, max_points)
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets：从 n 个点中选出 threshold 个点的下标（含首尾），保留曲线的峰谷形状。
+
+    首尾之外的点均分为 threshold - 2 段，每段选与“上一个选中点”和“下一段均值点”构成三角形面积最大的点。
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
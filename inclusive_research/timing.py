@@ -0,0 +1,111 @@
+"""常驻的分段计时：页面各部分包在 span() 中，耗时按进程汇总为固定分桶的直方图。
+
+每个 span 只做两次 perf_counter_ns 和一次加锁的计数更新（约 2 微秒），可以一直开着；
+汇总结果以 Prometheus 文本格式导出，供隐藏的管理面板或 /metrics 端口读取。
+"""
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 直方图桶上界（秒），覆盖 50 微秒到 10 秒
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_BOUNDS_NS = [round(b * 1e9) for b in BUCKETS]
+METRIC = 'igem_section_duration_seconds'
+
+
+class _Span:
+    __slots__ = ('timings', 'name', 'start')
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        # 异常（包括 st.rerun() 的 RerunException）也照常计时，不吞掉异常
+        self.timings.observe(self.name, time.perf_counter_ns() - self.start)
+
+
+class SectionTimings:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # 名称 -> [各桶计数..., +Inf 桶, 总纳秒]
+
+    def span(self, name):
+        """with timings.span('dashboard.fig1'): ... —— 计时一段代码。"""
+        return _Span(self, name)
+
+    def observe(self, name, elapsed_ns):
+        bucket = bisect_left(_BOUNDS_NS, elapsed_ns)
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = [0] * (len(BUCKETS) + 2)
+            histogram[bucket] += 1
+            histogram[-1] += elapsed_ns
+
+    def snapshot(self):
+        """{名称: ([各桶计数（非累计，末尾为 +Inf 桶）], 总秒数)}"""
+        with self._lock:
+            return {name: (h[:-1], h[-1] / 1e9) for name, h in sorted(self._histograms.items())}
+
+    def summary(self):
+        """[(名称, 次数, 平均毫秒, p50, p95, p99 毫秒)]；分位数由分桶线性插值估算。"""
+        rows = []
+        for name, (counts, total) in self.snapshot().items():
+            n = sum(counts)
+            rows.append((name, n, total / n * 1000, *(quantile(counts, q) * 1000 for q in (0.5, 0.95, 0.99))))
+        return rows
+
+    def prometheus(self):
+        """Prometheus 文本格式（histogram 类型）。"""
+        lines = [f"# HELP {METRIC} Wall time of page sections per script run.", f"# TYPE {METRIC} histogram"]
+        for name, (counts, total) in self.snapshot().items():
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'{METRIC}_bucket{{section="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{METRIC}_sum{{section="{name}"}} {total:.9f}')
+            lines.append(f'{METRIC}_count{{section="{name}"}} {cumulative}')
+        return "\n".join(lines) + "\n"
+
+
+def quantile(counts, q):
+    """按 Prometheus histogram_quantile 的方式估算分位数（秒）；落在 +Inf 桶时返回最大有限上界。"""
+    rank = q * sum(counts)
+    cumulative = 0
+    for i, count in enumerate(counts):
+        if count and cumulative + count >= rank:
+            if i == len(BUCKETS):
+                return BUCKETS[-1]
+            lower = BUCKETS[i - 1] if i else 0
+            return lower + (BUCKETS[i] - lower) * (rank - cumulative) / count
+        cumulative += count
+    return 0.0
+
+
+def serve(timings, port, host='127.0.0.1'):
+    """在后台线程里开一个只提供 GET /metrics 的 HTTP 服务，返回服务器对象。"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = timings.prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
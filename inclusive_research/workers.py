@@ -0,0 +1,69 @@
+"""后台任务池：有界队列 + 固定数量的工作线程，入队后立即返回回执号，完成情况按回执号查询。
+
+队列满时 run() 抛出 queue.Full，由页面提示用户稍后重试，而不是无限堆积线程。
+"""
+import queue
+import secrets
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobPool:
+    def __init__(self, workers=4, max_pending=64, max_receipts=10000):
+        self.max_receipts = max_receipts
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # 回执号 -> Future
+        self._threads = [
+            threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def run(self, func, *args):
+        """把 func(*args) 放入队列，返回回执号；队列已满时抛出 queue.Full。"""
+        future = Future()
+        self._queue.put_nowait((future, func, args))
+        return self.track(future)
+
+    def track(self, future):
+        """为已在别处执行的 Future（例如存储的分组提交）登记回执号。"""
+        receipt = secrets.token_hex(6).upper()
+        with self._lock:
+            self._jobs[receipt] = future
+            # 只保留最近的回执，旧的已完成任务直接丢弃
+            while len(self._jobs) > self.max_receipts:
+                oldest, oldest_future = next(iter(self._jobs.items()))
+                if not oldest_future.done():
+                    break
+                del self._jobs[oldest]
+        return receipt
+
+    def status(self, receipt):
+        """返回 (状态, 结果或异常)；未知回执号视为失败。"""
+        with self._lock:
+            future = self._jobs.get(receipt)
+        if future is None:
+            return FAILED, KeyError(receipt)
+        if not future.done():
+            return PENDING, None
+        if future.exception() is not None:
+            return FAILED, future.exception()
+        return DONE, future.result()
+
+    def _run(self):
+        while True:
+            future, func, args = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = func(*args)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)